@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 import collections
+import hashlib
 import itertools
 import os
 import re
 import time
+import uuid
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -42,7 +44,7 @@ from translations.fields import (LinkifiedField, PurifiedField, save_signal,
 from translations.query import order_by_translation
 from users.models import UserForeignKey, UserProfile
 from versions.compare import version_int
-from versions.models import Version
+from versions.models import ApplicationsVersions, Version
 
 
 from . import query, signals
@@ -2248,6 +2250,37 @@ models.signals.post_delete.connect(update_incompatible_versions,
                                    dispatch_uid='cor_update_incompatible')
 
 
+def invalidate_update_responses(sender, instance, **kw):
+    """
+    Make the update service (services/update.py) render the responses for
+    the add-on again instead of reusing the ones it kept.
+    """
+    if kw.get('raw'):
+        return
+    try:
+        if isinstance(instance, Addon):
+            addon = instance
+        elif isinstance(instance, Version):
+            addon = instance.addon
+        else:
+            addon = instance.version.addon
+    except ObjectDoesNotExist:
+        return
+    if addon.guid:
+        cache.set(amo.UPDATE_RESPONSES_KEY %
+                  hashlib.md5(addon.guid.encode('utf-8')).hexdigest(),
+                  uuid.uuid4().hex)
+
+
+for _model in (Addon, Version, File, ApplicationsVersions,
+               IncompatibleVersions):
+    dbsignals.post_save.connect(
+        invalidate_update_responses, sender=_model,
+        dispatch_uid='update_responses_%s' % _model._meta.db_table)
+    dbsignals.post_delete.connect(
+        invalidate_update_responses, sender=_model,
+        dispatch_uid='update_responses_delete_%s' % _model._meta.db_table)
+
 # webapps.models imports addons.models to get Addon, so we need to keep the
 # Webapp import down here.
 from mkt.webapps.models import Webapp
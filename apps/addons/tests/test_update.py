@@ -4,6 +4,7 @@ from email import utils
 
 from django.db import connection
 
+import mock
 from nose.tools import eq_
 
 import amo
@@ -793,3 +794,29 @@ class TestResponse(amo.tests.TestCase):
         data['appVersion'] = '5.0.1'
         upd = self.get(data)
         eq_(upd.get_rdf(), upd.get_no_updates_rdf())
+
+    @mock.patch.object(settings_local, 'UPDATE_RESPONSES_TIMEOUT', 60,
+                       create=True)
+    def test_responses_reused(self):
+        update._responses.clear()
+        rdf = update.get_rdf(self.get(self.good_data))
+        up = self.get(self.good_data)
+        with mock.patch.object(up, 'get_rdf') as get_rdf:
+            eq_(update.get_rdf(up), rdf)
+        assert not get_rdf.called
+
+        data = self.good_data.copy()
+        data['appVersion'] = '5.0.1'
+        up = self.get(data)
+        eq_(update.get_rdf(up), up.get_no_updates_rdf())
+
+    @mock.patch.object(settings_local, 'UPDATE_RESPONSES_TIMEOUT', 60,
+                       create=True)
+    def test_responses_invalidated(self):
+        update._responses.clear()
+        rdf = update.get_rdf(self.get(self.good_data))
+        assert rdf.find('updateHash') > -1
+
+        File.objects.get(pk=67442).update(hash='')
+        rdf = update.get_rdf(self.get(self.good_data))
+        eq_(rdf.find('updateHash'), -1)
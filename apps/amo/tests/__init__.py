@@ -521,8 +521,6 @@ class TestCase(MockEsMixin, RedisTest, test_utils.TestCase):
         addon.update(premium_type=amo.ADDON_PREMIUM)
         addon._premium = AddonPremium.objects.create(addon=addon,
                                                      price=price_obj)
-        if hasattr(Price, '_currencies'):
-            del Price._currencies
         return addon._premium
 
     def create_sample(self, name=None, db=False, **kw):
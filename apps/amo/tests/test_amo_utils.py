@@ -10,10 +10,12 @@ from django.utils import translation
 
 import mock
 from nose.tools import eq_, assert_raises, raises
+from PIL import Image
 
 from amo.utils import (cache_ns_key, escape_all, find_language,
                        LocalFileStorage, no_translation, resize_image,
-                       rm_local_tmp_dir, slugify, slug_validator, to_language)
+                       rm_local_tmp_dir, save_resized_images, slugify,
+                       slug_validator, to_language)
 from product_details import product_details
 from translations.models import Translation
 
@@ -72,6 +74,28 @@ def test_resize_transparency():
             os.remove(dest)
 
 
+def test_save_resized_images():
+    src = os.path.join(settings.ROOT, 'apps', 'amo', 'tests',
+                       'images', 'transparent.png')
+    dests = [tempfile.mkstemp(dir=settings.TMP_PATH)[1] for i in range(2)]
+    try:
+        with open(src, 'rb') as fp:
+            im = Image.open(fp).convert('RGBA')
+        with mock.patch('amo.utils.Image.open') as image_open:
+            sizes = save_resized_images(im, zip(dests, [(32, 32), (16, 16)]),
+                                        locally=True)
+        # Nothing had to be decoded again.
+        assert not image_open.called
+        eq_(sizes, [(32, 32), (16, 16)])
+        with open(dests[0]) as dfh:
+            with open(src.replace('.png', '-expected.png')) as efh:
+                assert dfh.read() == efh.read()
+    finally:
+        for dest in dests:
+            if os.path.exists(dest):
+                os.remove(dest)
+
+
 def test_to_language():
     tests = (('en-us', 'en-US'),
              ('en_US', 'en-US'),
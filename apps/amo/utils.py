@@ -515,21 +515,39 @@ def resize_image(src, dst, size=None, remove_src=True, locally=False):
     if src == dst:
         raise Exception("src and dst can't be the same: %s" % src)
 
-    open_ = open if locally else storage.open
     delete = os.unlink if locally else storage.delete
 
-    with open_(src, 'rb') as fp:
-        im = Image.open(fp)
-        im = im.convert('RGBA')
-        if size:
-            im = processors.scale_and_crop(im, size)
-    with open_(dst, 'wb') as fp:
-        im.save(fp, 'png')
+    im = open_image(src, locally=locally)
+    [size] = save_resized_images(im, [(dst, size)], locally=locally)
 
     if remove_src:
         delete(src)
 
-    return im.size
+    return size
+
+
+def open_image(src, locally=False):
+    """Opens and decodes the image at src, converted to RGBA."""
+    open_ = open if locally else storage.open
+    with open_(src, 'rb') as fp:
+        return Image.open(fp).convert('RGBA')
+
+
+def save_resized_images(im, dsts, locally=False):
+    """Saves the decoded image resized to each (dst, size) of dsts as PNGs.
+
+    All the sizes are derived from the same decoded image, so that it only
+    has to be read and decoded once. Returns the width and height of each
+    image.
+    """
+    open_ = open if locally else storage.open
+    sizes = []
+    for dst, size in dsts:
+        resized = processors.scale_and_crop(im, size) if size else im
+        with open_(dst, 'wb') as fp:
+            resized.save(fp, 'png')
+        sizes.append(resized.size)
+    return sizes
 
 
 def remove_icons(destination):
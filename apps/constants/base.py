@@ -392,6 +392,11 @@ FOUNDATION_ORG = 1  # The charities.id of the Mozilla Foundation.
 VERSION_BETA = re.compile('(a|alpha|b|beta|pre|rc)\d*$')
 VERSION_SEARCH = re.compile('\.(\d+)$')
 
+# Cache key of the token the update service (services/update.py) compares
+# to know if the responses it rendered for an add-on are still current. Takes
+# the md5 of the add-on guid.
+UPDATE_RESPONSES_KEY = 'services:update:responses:%s'
+
 # Editor Tools
 EDITOR_VIEWING_INTERVAL = 8  # How often we ping for "who's watching?"
 
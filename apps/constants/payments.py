@@ -47,6 +47,10 @@ _CONTRIB_INAPP = 6
 CONTRIB_NO_CHARGE = 7
 CONTRIB_OTHER = 99
 
+# Cache key of the purchase the receipt verify service (services/verify.py)
+# looked up, by add-on id and md5 of the purchase uuid.
+VERIFY_PURCHASE_KEY = 'services:verify:purchase:%s:%s'
+
 CONTRIB_TYPES = {
     CONTRIB_CHARGEBACK: _('Chargeback'),
     CONTRIB_OTHER: _('Other'),
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import threading
+import time
 import uuid
+from collections import defaultdict
 
 from django.conf import settings
 from django.core.cache import cache
@@ -20,7 +24,8 @@ from amo.decorators import write
 from amo.utils import get_locale_from_lang
 from constants.payments import (CARRIER_CHOICES, PAYMENT_METHOD_ALL,
                                 PAYMENT_METHOD_CHOICES, PROVIDER_BANGO,
-                                PROVIDER_CHOICES, PROVIDER_LOOKUP)
+                                PROVIDER_CHOICES, PROVIDER_LOOKUP,
+                                VERIFY_PURCHASE_KEY)
 from lib.constants import ALL_CURRENCIES
 from mkt.constants import apps
 from mkt.constants.regions import RESTOFWORLD, REGIONS_CHOICES_ID_DICT as RID
@@ -56,16 +61,99 @@ def price_locale(price, currency):
     return pricestr
 
 
-def price_key(data):
-    return ('carrier={carrier}|tier={tier}|region={region}|provider={provider}'
-            .format(**data))
+PRICE_MATRIX_KEY = 'market:price-matrix:generation'
 
 
-class PriceManager(amo.models.ManagerBase):
+class PriceMatrix(object):
+    """
+    A snapshot of all the PriceCurrency rows, indexed by (tier, region,
+    carrier, provider). It's never changed once built: a new one is built
+    when the prices change, see get_price_matrix().
+
+    The regions of each tier and the localised prices are computed the first
+    time they're asked for and kept with the snapshot.
+    """
 
-    def get_query_set(self):
-        qs = super(PriceManager, self).get_query_set()
-        return qs.transform(Price.transformer)
+    def __init__(self, currencies, generation=None):
+        self.generation = generation
+        self.loaded = time.time()
+        self.currencies = {}
+        self.tiers = defaultdict(list)
+        for currency in currencies:
+            self.currencies[(currency.tier_id, currency.region,
+                             currency.carrier, currency.provider)] = currency
+            self.tiers[currency.tier_id].append(model_to_dict(currency))
+        self.regions = {}
+        self.locales = {}
+
+    def get(self, tier, region, carrier, provider):
+        return self.currencies.get((tier, region, carrier, provider))
+
+    def prices(self, tier, providers):
+        return [dict(price) for price in self.tiers.get(tier, [])
+                if price['provider'] in providers]
+
+    def regions_by_name(self, tier, providers):
+        # The regions are sorted by their localised name.
+        key = (tier, tuple(providers), translation.get_language())
+        if key not in self.regions:
+            regions = set()
+            append_rest_of_world = False
+
+            for price in self.prices(tier, providers):
+                region = RID[price['region']]
+                if price['paid'] is True and region != RESTOFWORLD:
+                    regions.add(region)
+                if price['paid'] is True and region == RESTOFWORLD:
+                    append_rest_of_world = True
+
+            if regions:
+                # Sort by name based on normalized unicode name.
+                regions = sorted(regions,
+                                 key=lambda r: remove_accents(unicode(r.name)))
+                if append_rest_of_world:
+                    regions.append(RESTOFWORLD)
+
+            self.regions[key] = regions if regions else []
+        return list(self.regions[key])
+
+    def price_locale(self, price, currency):
+        key = (price, currency, translation.get_language())
+        if key not in self.locales:
+            self.locales[key] = price_locale(price, currency)
+        return self.locales[key]
+
+
+_price_matrix = None
+_price_matrix_lock = threading.Lock()
+
+
+def bump_price_matrix():
+    """Tell every process to rebuild its PriceMatrix."""
+    generation = uuid.uuid4().hex
+    cache.set(PRICE_MATRIX_KEY, generation, settings.PRICE_MATRIX_TIMEOUT)
+    return generation
+
+
+def get_price_matrix():
+    """
+    Returns the PriceMatrix of this process, rebuilding it when the prices
+    changed or when it's older than PRICE_MATRIX_TIMEOUT seconds.
+    """
+    global _price_matrix
+    generation = cache.get(PRICE_MATRIX_KEY)
+    matrix = _price_matrix
+    if (matrix is None or generation is None or
+            generation != matrix.generation or
+            time.time() - matrix.loaded > settings.PRICE_MATRIX_TIMEOUT):
+        with _price_matrix_lock:
+            currencies = PriceCurrency.objects.no_cache().order_by('id')
+            matrix = PriceMatrix(currencies, generation or bump_price_matrix())
+            _price_matrix = matrix
+    return matrix
+
+
+class PriceManager(amo.models.ManagerBase):
 
     def active(self):
         return self.filter(active=True).order_by('price')
@@ -90,18 +178,11 @@ class Price(amo.models.ModelBase):
 
     def tier_locale(self, currency='USD'):
         # A way to display the price of the tier.
-        return price_locale(self.price, currency)
+        return get_price_matrix().price_locale(self.price, currency)
 
     def __unicode__(self):
         return u'$%s' % self.price
 
-    @staticmethod
-    def transformer(prices):
-        # There are a constrained number of price currencies, let's just
-        # get them all.
-        Price._currencies = dict((price_key(model_to_dict(p)), p)
-                                 for p in PriceCurrency.objects.all())
-
     def get_price_currency(self, carrier=None, region=None, provider=None):
         """
         Returns the PriceCurrency object or none.
@@ -115,20 +196,7 @@ class Price(amo.models.ModelBase):
         # This is probably ok for now, because Bango is the default fall back
         # however we might need to think about this for the long term.
         provider = provider or PROVIDER_BANGO
-        if not hasattr(self, '_currencies'):
-            Price.transformer([])
-
-        lookup = price_key({
-            'tier': self.id, 'carrier': carrier,
-            'provider': provider, 'region': region
-        })
-
-        try:
-            price_currency = Price._currencies[lookup]
-        except KeyError:
-            return None
-
-        return price_currency
+        return get_price_matrix().get(self.id, region, carrier, provider)
 
     def get_price_data(self, carrier=None, region=None, provider=None):
         """
@@ -155,7 +223,7 @@ class Price(amo.models.ModelBase):
         price, currency = self.get_price_data(carrier=carrier, region=region,
                                               provider=provider)
         if price is not None and currency is not None:
-            return price_locale(price, currency)
+            return get_price_matrix().price_locale(price, currency)
 
     def prices(self, provider=None):
         """
@@ -165,8 +233,7 @@ class Price(amo.models.ModelBase):
             If not provided it will use settings.PAYMENT_PROVIDERS,
         """
         providers = [provider] if provider else default_providers()
-        return [model_to_dict(o) for o in
-                self.pricecurrency_set.filter(provider__in=providers)]
+        return get_price_matrix().prices(self.id, providers)
 
     def regions_by_name(self, provider=None):
         """A list of price regions sorted by name.
@@ -175,27 +242,8 @@ class Price(amo.models.ModelBase):
             If not provided it will use settings.PAYMENT_PROVIDERS,
 
         """
-
-        prices = self.prices(provider=provider)
-
-        regions = set()
-        append_rest_of_world = False
-
-        for price in prices:
-            region = RID[price['region']]
-            if price['paid'] is True and region != RESTOFWORLD:
-                regions.add(region)
-            if price['paid'] is True and region == RESTOFWORLD:
-                append_rest_of_world = True
-
-        if regions:
-            # Sort by name based on normalized unicode name.
-            regions = sorted(regions,
-                             key=lambda r: remove_accents(unicode(r.name)))
-            if append_rest_of_world:
-                regions.append(RESTOFWORLD)
-
-        return regions if regions else []
+        providers = [provider] if provider else default_providers()
+        return get_price_matrix().regions_by_name(self.id, providers)
 
     def region_ids_by_name(self, provider=None):
         """A list of price region ids sorted by name.
@@ -269,8 +317,10 @@ class PriceCurrency(amo.models.ModelBase):
 def update_price_currency(sender, instance, **kw):
     """
     Ensure that when PriceCurrencies are updated, all the apps that use them
-    are re-indexed into ES so that the region information will be correct.
+    are re-indexed into ES so that the region information will be correct,
+    and that every process rebuilds its PriceMatrix.
     """
+    bump_price_matrix()
     if kw.get('raw'):
         return
 
@@ -314,6 +364,18 @@ def add_uuid(sender, **kw):
             record.save()
 
 
+@receiver(models.signals.post_save, sender=AddonPurchase,
+          dispatch_uid='clear_verify_purchase')
+@receiver(models.signals.post_delete, sender=AddonPurchase,
+          dispatch_uid='clear_verify_purchase_delete')
+def clear_verify_purchase(sender, instance, **kw):
+    """Make the receipt verify service look the purchase up again."""
+    if instance.uuid:
+        cache.delete(VERIFY_PURCHASE_KEY %
+                     (instance.addon_id,
+                      hashlib.md5(instance.uuid.encode('utf-8')).hexdigest()))
+
+
 @write
 @receiver(models.signals.post_save, sender=Contribution,
           dispatch_uid='create_addon_purchase')
@@ -10,7 +10,8 @@ import amo
 import amo.tests
 from addons.models import Addon, AddonUser
 from constants.payments import PROVIDER_BANGO, PROVIDER_BOKU
-from market.models import AddonPremium, Price, PriceCurrency, Refund
+from market.models import (AddonPremium, get_price_matrix, Price,
+                           PriceCurrency, PriceMatrix, Refund)
 from mkt.constants import apps
 from mkt.constants.regions import (ALL_REGION_IDS, BR, HU,
                                    SPAIN, UK, US, RESTOFWORLD)
@@ -39,8 +40,6 @@ class TestPrice(amo.tests.TestCase):
 
     def setUp(self):
         self.tier_one = Price.objects.get(pk=1)
-        if hasattr(Price, '_currencies'):
-            del Price._currencies  # needed to pick up fixtures.
 
     def test_active(self):
         eq_(Price.objects.count(), 2)
@@ -84,12 +83,40 @@ class TestPrice(amo.tests.TestCase):
         eq_(Price.objects.get(pk=1).get_price(), Decimal('0.99'))
         eq_(Price.objects.get(pk=1).get_price_locale(), u'$0.99')
 
-    def test_transformer(self):
+    def test_price_matrix(self):
         price = Price.objects.get(pk=1)
+        # Warm up the price matrix.
         price.get_price_locale()
-        # Warm up Price._currencies.
         with self.assertNumQueries(0):
             eq_(price.get_price_locale(), u'$0.99')
+            eq_(len(price.prices()), 2)
+            price.regions_by_name()
+
+    def test_price_matrix_rebuilt(self):
+        price = Price.objects.get(pk=1)
+        matrix = get_price_matrix()
+        eq_(get_price_matrix(), matrix)
+        PriceCurrency.objects.create(region=US.id, currency='USD',
+                                     price='0.89', tier=price,
+                                     provider=PROVIDER_BANGO)
+        ok_(get_price_matrix() is not matrix)
+        eq_(price.get_price(region=US.id), Decimal('0.89'))
+
+    def test_regions_by_name_per_language(self):
+        matrix = PriceMatrix(PriceCurrency.objects.all())
+        matrix.regions_by_name(2, [PROVIDER_BANGO])
+        translation.activate('fr')
+        matrix.regions_by_name(2, [PROVIDER_BANGO])
+        # Sorted by their localised names, so kept for each language.
+        eq_(len(matrix.regions), 2)
+
+    @mock.patch('market.models.price_locale')
+    def test_price_locale_memoized(self, price_locale):
+        price_locale.return_value = u'$0.99'
+        price = Price.objects.get(pk=1)
+        eq_(price.get_price_locale(), u'$0.99')
+        eq_(price.get_price_locale(), u'$0.99')
+        eq_(price_locale.call_count, 1)
 
     def test_get_tier_price(self):
         eq_(Price.objects.get(pk=2).get_price_locale(region=BR.id), 'R$1.01')
@@ -102,7 +102,7 @@ class Review(amo.models.ModelBase):
             tasks.update_denorm(pair, using='default')
 
         # Review counts have changed, so run the task and trigger a reindex.
-        tasks.addon_review_aggregates.delay(self.addon_id, using='default')
+        tasks.update_ratings.delay([self.addon_id], using='default')
 
     @staticmethod
     def transformer(reviews):
@@ -183,6 +183,21 @@ class GroupedRating(object):
         cache.set(cls.key(addon), ratings)
         return ratings
 
+    @classmethod
+    def set_many(cls, addons, using=None):
+        """Like `set()` for many add-ons, with a single query."""
+        q = (Review.objects.valid().no_cache().using(using)
+             .filter(addon__in=addons, is_latest=True)
+             .values_list('addon', 'rating')
+             .annotate(models.Count('rating')))
+        counts = dict((addon, {}) for addon in addons)
+        for addon, rating, count in q:
+            counts[addon][rating] = count
+        cache.set_many(dict(
+            (cls.key(addon), [(rating, addon_counts.get(rating, 0))
+                              for rating in range(1, 6)])
+            for addon, addon_counts in counts.items()))
+
 
 class Spam(object):
 
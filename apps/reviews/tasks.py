@@ -1,11 +1,15 @@
 import logging
 
+from django.db import connections
 from django.db.models import Count, Avg, F
 
 import caching.base as caching
 from celeryutils import task
 
+import amo
 from addons.models import Addon
+from amo.decorators import write
+from lib.post_request_task.task import task as post_request_task
 from .models import Review, GroupedRating
 
 log = logging.getLogger('z.task')
@@ -35,30 +39,27 @@ def update_denorm(*pairs, **kw):
             review.save()
 
 
-@task
-def addon_review_aggregates(*addons, **kw):
-    log.info('[%s@%s] Updating total reviews and average ratings.' %
-             (len(addons), addon_review_aggregates.rate_limit))
-    using = kw.get('using')
-    addon_objs = list(Addon.objects.filter(pk__in=addons))
+def _update_review_aggregates(addons, using=None):
+    """Sets the total reviews and average rating of the add-ons in SQL."""
     stats = dict((x[0], x[1:]) for x in
                  Review.objects.valid().no_cache().using(using)
                  .filter(addon__in=addons, is_latest=True)
                  .values_list('addon')
                  .annotate(Avg('rating'), Count('addon')))
-    for addon in addon_objs:
-        rating, reviews = stats.get(addon.id, [0, 0])
-        addon.update(total_reviews=reviews, average_rating=rating)
-
-    # Delay bayesian calculations to avoid slave lag.
-    addon_bayesian_rating.apply_async(args=addons, countdown=5)
-    addon_grouped_rating.apply_async(args=addons, kwargs={'using': using})
-
-
-@task
-def addon_bayesian_rating(*addons, **kw):
-    log.info('[%s@%s] Updating bayesian ratings.' %
-             (len(addons), addon_bayesian_rating.rate_limit))
+    totals, ratings = [], []
+    for addon in addons:
+        rating, reviews = stats.get(addon, [0, 0])
+        totals.extend([addon, reviews])
+        ratings.extend([addon, rating])
+    whens = ' '.join(['WHEN %s THEN %s'] * len(addons))
+    cursor = connections[using or 'default'].cursor()
+    cursor.execute('UPDATE addons SET total_reviews = CASE id %s END, '
+                   'average_rating = CASE id %s END WHERE id IN (%s)' %
+                   (whens, whens, ','.join(['%s'] * len(addons))),
+                   totals + ratings + list(addons))
+
+
+def _update_bayesian_ratings(addons):
     f = lambda: Addon.objects.aggregate(rating=Avg('average_rating'),
                                         reviews=Avg('total_reviews'))
     avg = caching.cached(f, 'task.bayes.avg', 60 * 60 * 60)
@@ -66,18 +67,55 @@ def addon_bayesian_rating(*addons, **kw):
     if avg['rating'] is None:
         return
     mc = avg['reviews'] * avg['rating']
-    for addon in Addon.objects.no_cache().filter(id__in=addons):
-        if addon.average_rating is None:
-            # Ignoring addons with no average rating.
-            continue
+    # Ignoring addons with no average rating.
+    qs = Addon.objects.no_cache().filter(id__in=addons,
+                                         average_rating__isnull=False)
+    num = mc + F('total_reviews') * F('average_rating')
+    denom = avg['reviews'] + F('total_reviews')
+    qs.exclude(total_reviews=0).update(bayesian_rating=num / denom)
+    qs.filter(total_reviews=0).update(bayesian_rating=0)
+
+
+@post_request_task(merge_ids=True)
+@write
+def update_ratings(ids, **kw):
+    """
+    Updates the rating aggregates, bayesian ratings and grouped ratings of the
+    add-ons with a few bulk queries, then reindexes them at once.
+
+    The calls made for the reviews saved during the same request, or within
+    POST_REQUEST_TASK_MERGE_WINDOW, are merged into one.
+    """
+    log.info('[%s@%s] Updating ratings.' %
+             (len(ids), update_ratings.rate_limit))
+    using = kw.get('using')
+    _update_review_aggregates(ids, using=using)
+    _update_bayesian_ratings(ids)
+    GroupedRating.set_many(ids, using=using)
+
+    # All our updates were sql, so invalidate and reindex manually.
+    addons = list(Addon.objects.no_cache().filter(id__in=ids)
+                                          .no_transforms())
+    Addon.objects.invalidate(*addons)
+    webapps = [addon.id for addon in addons
+               if addon.type == amo.ADDON_WEBAPP]
+    if webapps:
+        from mkt.webapps.tasks import index_webapps
+        index_webapps.delay(webapps)
+
+
+@task
+def addon_review_aggregates(*addons, **kw):
+    log.info('[%s@%s] Updating total reviews and average ratings.' %
+             (len(addons), addon_review_aggregates.rate_limit))
+    update_ratings(list(addons), **kw)
+
 
-        q = Addon.objects.filter(id=addon.id)
-        if addon.total_reviews:
-            num = mc + F('total_reviews') * F('average_rating')
-            denom = avg['reviews'] + F('total_reviews')
-            q.update(bayesian_rating=num / denom)
-        else:
-            q.update(bayesian_rating=0)
+@task
+def addon_bayesian_rating(*addons, **kw):
+    log.info('[%s@%s] Updating bayesian ratings.' %
+             (len(addons), addon_bayesian_rating.rate_limit))
+    _update_bayesian_ratings(addons)
 
 
 @task
@@ -86,6 +124,4 @@ def addon_grouped_rating(*addons, **kw):
     # We stick this all in memcached since it's not critical.
     log.info('[%s@%s] Updating addon grouped ratings.' %
              (len(addons), addon_grouped_rating.rate_limit))
-    using = kw.get('using')
-    for addon in addons:
-        GroupedRating.set(addon, using=using)
+    GroupedRating.set_many(addons, using=kw.get('using'))
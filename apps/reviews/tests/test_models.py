@@ -1,9 +1,12 @@
 from django.utils import translation
 
+import mock
 from nose.tools import eq_
 import test_utils
 
 import amo.tests
+from addons.models import Addon
+from lib.post_request_task import task as post_request_task
 from reviews import tasks
 from reviews.models import check_spam, Review, GroupedRating, Spam
 
@@ -54,6 +57,36 @@ class TestGroupedRating(amo.tests.TestCase):
         eq_(GroupedRating.get(1865, update_none=False), None)
         eq_(GroupedRating.get(1865, update_none=True), self.grouped_ratings)
 
+    def test_set_many(self):
+        GroupedRating.set_many([1865, 3])
+        eq_(GroupedRating.get(1865, update_none=False), self.grouped_ratings)
+        eq_(GroupedRating.get(3, update_none=False),
+            [(1, 0), (2, 0), (3, 0), (4, 0), (5, 0)])
+
+
+class TestUpdateRatings(amo.tests.TestCase):
+    fixtures = ['base/apps', 'reviews/dev-reply']
+
+    def test_aggregates(self):
+        Addon.objects.filter(id=1865).update(total_reviews=0,
+                                             average_rating=0)
+        tasks.update_ratings([1865])
+        addon = Addon.objects.no_cache().get(id=1865)
+        eq_(addon.total_reviews, 1)
+        eq_(addon.average_rating, 4)
+        eq_(GroupedRating.get(1865, update_none=False),
+            [(1, 0), (2, 0), (3, 0), (4, 1), (5, 0)])
+
+    @mock.patch('lib.post_request_task.task.PostRequestTask'
+                '.original_apply_async')
+    def test_merged(self, apply_async):
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            for review in Review.objects.filter(addon=1865):
+                review.save()
+                review.save()
+        post_request_task._send_tasks()
+        apply_async.assert_called_once_with(([1865],), {'using': 'default'})
+
 
 class TestSpamTest(amo.tests.TestCase):
     fixtures = ['base/apps', 'base/platforms', 'reviews/test_models']
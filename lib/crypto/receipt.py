@@ -1,21 +1,43 @@
 import json
-import urllib2
+import threading
 
 from django.conf import settings
 from django_statsd.clients import statsd
 
 import commonware.log
-
 import jwt
+import requests
 
 
 log = commonware.log.getLogger('z.crypto')
 
+# The session to the signing service, see `get_session`.
+_session = None
+_session_lock = threading.Lock()
+
 
 class SigningError(Exception):
     pass
 
 
+def get_session():
+    """
+    Returns the HTTP session shared by the process to talk to the signing
+    service, so that connections to it are kept alive and reused.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.SIGNING_SERVER_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
 def sign(receipt):
     """
     Send the receipt to the signing service.
@@ -34,30 +56,25 @@ def sign(receipt):
     log.info('Receipt contents: %s' % receipt_json)
     headers = {'Content-Type': 'application/json'}
     data = receipt if isinstance(receipt, basestring) else receipt_json
-    request = urllib2.Request(destination, data, headers)
 
     try:
         with statsd.timer('services.sign.receipt'):
-            response = urllib2.urlopen(request, timeout=timeout)
-    except urllib2.HTTPError, error:
-        # Will occur when a 3xx or greater code is returned
-        msg = error.read().strip()
-        log.error('Posting to receipt signing failed: %s, %s'
-                  % (error.code, msg))
-        raise SigningError('Posting to receipt signing failed: %s, %s'
-                           % (error.code, msg))
+            response = get_session().post(destination, data=data,
+                                          headers=headers, timeout=timeout)
     except:
         # Will occur when some other error occurs.
         log.error('Posting to receipt signing failed', exc_info=True)
         raise SigningError('Posting receipt signing failed')
 
-    if response.getcode() != 200:
-        log.error('Posting to signing failed: %s'
-                  % (response.getcode()))
-        raise SigningError('Posting to signing failed: %s'
-                           % (response.getcode()))
+    if response.status_code != 200:
+        # Will occur when a 3xx or greater code is returned
+        msg = response.content.strip()
+        log.error('Posting to receipt signing failed: %s, %s'
+                  % (response.status_code, msg))
+        raise SigningError('Posting to receipt signing failed: %s, %s'
+                           % (response.status_code, msg))
 
-    return json.loads(response.read())['receipt']
+    return json.loads(response.content)['receipt']
 
 
 def decode(receipt):
@@ -9,11 +9,12 @@ from django.core.files.storage import default_storage as storage
 
 import jwt
 import mock
-from nose.tools import eq_, raises
+import requests
+from nose.tools import eq_, ok_, raises
 
 import amo.tests
 from lib.crypto import packaged
-from lib.crypto.receipt import crack, sign, SigningError
+from lib.crypto.receipt import crack, get_session, sign, SigningError
 from mkt.webapps.models import Webapp
 from versions.models import Version
 
@@ -37,41 +38,54 @@ def mock_sign(version_id, reviewer=False):
     return path
 
 
-@mock.patch('lib.crypto.receipt.urllib2.urlopen')
+@mock.patch('lib.crypto.receipt.get_session')
 @mock.patch.object(settings, 'SIGNING_SERVER', 'http://localhost')
 class TestReceipt(amo.tests.TestCase):
 
-    def test_called(self, urlopen):
-        urlopen.return_value = self.get_response(200)
+    def test_called(self, get_session):
+        post = get_session.return_value.post
+        post.return_value = self.get_response(200)
         sign('my-receipt')
-        eq_(urlopen.call_args[0][0].data, 'my-receipt')
+        eq_(post.call_args[0][0], 'http://localhost/1.0/sign')
+        eq_(post.call_args[1]['data'], 'my-receipt')
 
-    def test_some_unicode(self, urlopen):
-        urlopen.return_value = self.get_response(200)
+    def test_some_unicode(self, get_session):
+        get_session.return_value.post.return_value = self.get_response(200)
         sign({'name': u'Вагиф Сәмәдоғлу'})
 
     def get_response(self, code):
         response = mock.Mock()
-        response.getcode = mock.Mock()
-        response.getcode.return_value = code
-        response.read.return_value = json.dumps({'receipt': ''})
+        response.status_code = code
+        response.content = json.dumps({'receipt': ''})
         return response
 
     @raises(SigningError)
-    def test_error(self, urlopen):
-        urlopen.return_value = self.get_response(403)
+    def test_error(self, get_session):
+        get_session.return_value.post.return_value = self.get_response(403)
         sign('x')
 
-    def test_good(self, urlopen):
-        urlopen.return_value = self.get_response(200)
+    @raises(SigningError)
+    def test_connection_error(self, get_session):
+        get_session.return_value.post.side_effect = (
+            requests.ConnectionError)
+        sign('x')
+
+    def test_good(self, get_session):
+        get_session.return_value.post.return_value = self.get_response(200)
         sign('x')
 
     @raises(SigningError)
-    def test_other(self, urlopen):
-        urlopen.return_value = self.get_response(206)
+    def test_other(self, get_session):
+        get_session.return_value.post.return_value = self.get_response(206)
         sign('x')
 
 
+class TestSession(amo.tests.TestCase):
+
+    def test_shared(self):
+        ok_(get_session() is get_session())
+
+
 class TestCrack(amo.tests.TestCase):
 
     def test_crack(self):
@@ -13,13 +13,14 @@ import time
 from optparse import make_option
 
 import pyelasticsearch
-from celery import task
+from celery import chord, task
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-from amo.utils import chunked, timestamp_index
+from amo.utils import timestamp_index
 from addons.models import Webapp  # To avoid circular import.
+from lib.es.models import Reindexing, ReindexingChunk
 from lib.es.utils import (flag_reindexing_mkt, is_reindexing_mkt,
                           unflag_reindexing_mkt)
 
@@ -46,8 +47,13 @@ else:
 ES = pyelasticsearch.ElasticSearch(ES_URL)
 
 
-job = 'lib.es.management.commands.reindex_mkt.run_indexing'
-time_limits = settings.CELERY_TIME_LIMITS[job]
+job = 'lib.es.management.commands.reindex_mkt.%s'
+time_limits = settings.CELERY_TIME_LIMITS[job % 'run_indexing']
+chunk_time_limits = settings.CELERY_TIME_LIMITS[job % 'index_chunk']
+
+# Our ES doc sizes are about 5k in size. Chunking by 100 sends ~500kb of data
+# to ES at a time.
+CHUNK_SIZE = 100
 
 
 @task
@@ -92,34 +98,107 @@ def index_webapp(ids, **kw):
     qs = Webapp.indexing_transformer(Webapp.with_deleted.no_cache()
                                      .filter(id__in=ids))
 
-    docs = []
-    for obj in qs:
-        try:
-            docs.append(WebappIndexer.extract_document(obj.id, obj=obj))
-        except Exception as e:
-            sys.stdout.write('Failed to index obj: {0}. {1}'.format(obj.id, e))
+    try:
+        docs = WebappIndexer.extract_documents(ids, objs=qs)
+    except Exception as e:
+        # Fall back to one app at a time so that a single broken app doesn't
+        # keep the rest of the chunk out of the index.
+        sys.stdout.write('Failed to extract documents in bulk: {0}'.format(e))
+        docs = []
+        for obj in qs:
+            try:
+                docs.append(WebappIndexer.extract_document(obj.id, obj=obj))
+            except Exception as e:
+                sys.stdout.write(
+                    'Failed to index obj: {0}. {1}'.format(obj.id, e))
 
     WebappIndexer.bulk_index(docs, es=ES, index=index)
 
 
+# The results of the chunks have to be stored for the chord callback to run,
+# CELERY_IGNORE_RESULT is on by default.
+@task(time_limit=chunk_time_limits['hard'],
+      soft_time_limit=chunk_time_limits['soft'], ignore_result=False)
+def index_chunk(chunk_id, index):
+    """Index the objects of a chunk and record how it went.
+
+    - chunk_id: id of the ReindexingChunk
+    - index: name of the index
+
+    Errors are stored on the chunk instead of being raised so that the other
+    chunks of the chord still get indexed.
+
+    """
+    chunk = ReindexingChunk.objects.get(pk=chunk_id)
+    try:
+        index_webapp(chunk.get_ids(), index=index)
+    except Exception as e:
+        logger.exception('Failed to index chunk %s' % chunk_id)
+        chunk.status = ReindexingChunk.STATUS_FAILED
+        chunk.error = unicode(e)
+    else:
+        chunk.status = ReindexingChunk.STATUS_DONE
+        chunk.error = None
+    chunk.save()
+
+
 @task(time_limit=time_limits['hard'], soft_time_limit=time_limits['soft'])
-def run_indexing(index):
+def run_indexing(index, old_index, alias, index_settings,
+                 chunk_size=CHUNK_SIZE):
     """Index the objects.
 
     - index: name of the index
+    - old_index: name of the index currently aliased, if any
+    - alias: alias name
+    - index_settings: a dictionary of settings applied once indexing is
+      over
+    - chunk_size: number of objects indexed by each task
 
-    Note: Our ES doc sizes are about 5k in size. Chunking by 100 sends ~500kb
-    of data to ES at a time.
-
-    TODO: Use celery chords here to parallelize these indexing chunks. This
-          requires celery 3 (bug 825938).
+    The objects are split in chunks stored along with the reindexing flag,
+    which are indexed in parallel with a chord. If the chunks already exist,
+    we are resuming a previous indexing and only the chunks that are not
+    done yet are indexed again.
 
     """
     sys.stdout.write('Indexing apps into index: %s' % index)
 
-    qs = WebappIndexer.get_indexable()
-    for chunk in chunked(list(qs), 100):
-        index_webapp(chunk, index=index)
+    reindexing = Reindexing.objects.get(new_index=index, alias=alias)
+    if not reindexing.chunks.exists():
+        reindexing.create_chunks(list(WebappIndexer.get_indexable()),
+                                 chunk_size)
+
+    chunk_ids = (reindexing.chunks.exclude(status=ReindexingChunk.STATUS_DONE)
+                                  .values_list('id', flat=True))
+    header = [index_chunk.si(chunk_id, index) for chunk_id in chunk_ids]
+    callback = finish_indexing.si(index, old_index, alias, index_settings)
+    if header:
+        chord(header, callback).apply_async()
+    else:
+        callback.apply_async()
+
+
+@task
+def finish_indexing(new_index, old_index, alias, index_settings):
+    """
+    Point the alias to the new index if every chunk has been indexed.
+
+    Otherwise the database stays flagged so that the indexing can be resumed
+    with `reindex_mkt --resume` once the failures are fixed.
+
+    """
+    reindexing = Reindexing.objects.get(new_index=new_index, alias=alias)
+    progress = reindexing.get_progress()
+    sys.stdout.write('Indexing chunks: %s' % progress)
+    if progress['failed'] or progress['pending']:
+        logger.error('Reindexing %s is incomplete (%s), run reindex_mkt '
+                     '--resume to finish it.' % (new_index, progress))
+        return
+
+    update_alias(new_index, old_index, alias, index_settings)
+    unflag_database()
+    if old_index:
+        delete_index(old_index)
+    output_summary()
 
 
 @task
@@ -175,6 +254,16 @@ def output_summary():
         'Reindexation done. Current Aliases configuration: %s\n' % aliases)
 
 
+def get_index_settings(index):
+    """Return the settings of `index`, or an empty dict if there is none."""
+    if not index:
+        return {}
+    try:
+        return ES.get_settings(index).get(index, {}).get('settings', {})
+    except pyelasticsearch.exceptions.ElasticHttpNotFoundError:
+        return {}
+
+
 class Command(BaseCommand):
     help = 'Reindex all ES indexes'
     option_list = BaseCommand.option_list + (
@@ -185,6 +274,14 @@ class Command(BaseCommand):
                     help=('Bypass the database flag that says '
                           'another indexation is ongoing'),
                     default=False),
+        make_option('--resume', action='store_true',
+                    help=('Resume the ongoing indexation, only indexing the '
+                          'chunks that are not done yet'),
+                    default=False),
+        make_option('--chunk-size', action='store', type='int',
+                    dest='chunk_size',
+                    help='Number of apps indexed by each task',
+                    default=CHUNK_SIZE),
     )
 
     def handle(self, *args, **kwargs):
@@ -195,10 +292,14 @@ class Command(BaseCommand):
         """
         force = kwargs.get('force', False)
         prefix = kwargs.get('prefix', '')
+        chunk_size = kwargs.get('chunk_size') or CHUNK_SIZE
+
+        if kwargs.get('resume', False):
+            return self.resume(chunk_size)
 
         if is_reindexing_mkt() and not force:
             raise CommandError('Indexation already occuring - use --force to '
-                               'bypass')
+                               'bypass, or --resume to resume it')
         elif force:
             unflag_database()
 
@@ -212,14 +313,7 @@ class Command(BaseCommand):
         new_index = timestamp_index(prefix + ALIAS)
 
         # See how the index is currently configured.
-        if old_index:
-            try:
-                s = (ES.get_settings(old_index).get(old_index, {})
-                                               .get('settings', {}))
-            except pyelasticsearch.exceptions.ElasticHttpNotFoundError:
-                s = {}
-        else:
-            s = {}
+        s = get_index_settings(old_index)
 
         num_replicas = s.get('number_of_replicas',
                              settings.ES_DEFAULT_NUM_REPLICAS)
@@ -240,26 +334,38 @@ class Command(BaseCommand):
             'store.compress.tv': True, 'store.compress.stored': True,
             'refresh_interval': '-1'})
 
-        # Index all the things!
-        chain |= run_indexing.si(new_index)
-
-        # After indexing we optimize the index, adjust settings, and point the
-        # alias to the new index.
-        chain |= update_alias.si(new_index, old_index, ALIAS, {
-            'number_of_replicas': num_replicas, 'refresh_interval': '5s'})
+        # Index all the things! Once every chunk is indexed, we optimize the
+        # index, adjust settings, point the alias to the new index, unflag the
+        # database and delete the old index, if any.
+        chain |= run_indexing.si(new_index, old_index, ALIAS, {
+            'number_of_replicas': num_replicas, 'refresh_interval': '5s'},
+            chunk_size)
 
-        # Unflag the database.
-        chain |= unflag_database.si()
+        self.stdout.write('\nNew index and indexing tasks all queued up.\n')
+        os.environ['FORCE_INDEXING'] = '1'
+        try:
+            chain.apply_async()
+        finally:
+            del os.environ['FORCE_INDEXING']
 
-        # Delete the old index, if any.
-        if old_index:
-            chain |= delete_index.si(old_index)
+    def resume(self, chunk_size):
+        """Requeue the chunks of the ongoing indexation that aren't done."""
+        try:
+            reindexing = Reindexing.objects.get(site='mkt')
+        except Reindexing.DoesNotExist:
+            raise CommandError('No indexation to resume')
 
-        chain |= output_summary.si()
+        num_replicas = get_index_settings(reindexing.old_index).get(
+            'number_of_replicas', settings.ES_DEFAULT_NUM_REPLICAS)
 
-        self.stdout.write('\nNew index and indexing tasks all queued up.\n')
+        self.stdout.write('\nResuming indexation into %s: %s\n' % (
+            reindexing.new_index, reindexing.get_progress()))
         os.environ['FORCE_INDEXING'] = '1'
         try:
-            chain.apply_async()
+            run_indexing.delay(reindexing.new_index, reindexing.old_index,
+                               reindexing.alias,
+                               {'number_of_replicas': num_replicas,
+                                'refresh_interval': '5s'},
+                               chunk_size)
         finally:
             del os.environ['FORCE_INDEXING']
@@ -77,3 +77,46 @@ class Reindexing(models.Model):
 
     class Meta:
         db_table = 'zadmin_reindexing'
+
+    def create_chunks(self, ids, chunk_size):
+        """Split `ids` into pending chunks for this reindexing."""
+        chunks = []
+        for i in xrange(0, len(ids), chunk_size):
+            chunk = ReindexingChunk(reindexing=self)
+            chunk.set_ids(ids[i:i + chunk_size])
+            chunks.append(chunk)
+        ReindexingChunk.objects.bulk_create(chunks)
+
+    def get_progress(self):
+        """Return a dict of the number of chunks for each status."""
+        counts = dict(self.chunks.values_list('status')
+                          .annotate(models.Count('id')))
+        return dict((label.lower(), counts.get(status, 0))
+                    for status, label in ReindexingChunk.STATUS_CHOICES)
+
+
+class ReindexingChunk(models.Model):
+    """A chunk of ids indexed by one task during a reindexing."""
+    STATUS_PENDING = 0
+    STATUS_DONE = 1
+    STATUS_FAILED = 2
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+    reindexing = models.ForeignKey(Reindexing, related_name='chunks')
+    ids = models.TextField()
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES,
+                                              default=STATUS_PENDING)
+    error = models.TextField(null=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'zadmin_reindexing_chunk'
+
+    def get_ids(self):
+        return [int(id_) for id_ in self.ids.split(',') if id_]
+
+    def set_ids(self, ids):
+        self.ids = ','.join(str(id_) for id_ in ids)
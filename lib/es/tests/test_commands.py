@@ -0,0 +1,96 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+import mock
+from nose.tools import eq_, ok_, raises
+
+import amo.tests
+from lib.es.management.commands import reindex_mkt
+from lib.es.models import Reindexing, ReindexingChunk
+
+
+@mock.patch.object(reindex_mkt, 'output_summary')
+@mock.patch.object(reindex_mkt, 'delete_index')
+@mock.patch.object(reindex_mkt, 'update_alias')
+@mock.patch.object(reindex_mkt, 'index_webapp')
+@mock.patch.object(reindex_mkt.WebappIndexer, 'get_indexable')
+class TestRunIndexing(amo.tests.TestCase):
+
+    def setUp(self):
+        self.reindexing = Reindexing.objects.flag_reindexing_mkt(
+            'new_index', 'old_index', 'alias')
+        self.index_settings = {'number_of_replicas': 1}
+
+    def run_indexing(self):
+        reindex_mkt.run_indexing('new_index', 'old_index', 'alias',
+                                 self.index_settings, chunk_size=2)
+
+    def indexed(self, index_webapp):
+        """The chunks of ids indexed into the new index, sorted."""
+        calls = index_webapp.call_args_list
+        eq_(set(kwargs['index'] for args, kwargs in calls),
+            set(['new_index']))
+        return sorted(args[0] for args, kwargs in calls)
+
+    def test_run_indexing(self, get_indexable, index_webapp, update_alias,
+                          delete_index, output_summary):
+        get_indexable.return_value = [5, 4, 3, 2, 1]
+        self.run_indexing()
+
+        eq_(self.indexed(index_webapp), [[1], [3, 2], [5, 4]])
+        update_alias.assert_called_with('new_index', 'old_index', 'alias',
+                                        self.index_settings)
+        delete_index.assert_called_with('old_index')
+        ok_(not Reindexing.objects.is_reindexing_mkt())
+        eq_(ReindexingChunk.objects.count(), 0)
+
+    def test_failed_chunk(self, get_indexable, index_webapp, update_alias,
+                          delete_index, output_summary):
+        def index(ids, **kw):
+            if 3 in ids:
+                raise ValueError('oops')
+
+        get_indexable.return_value = [5, 4, 3, 2, 1]
+        index_webapp.side_effect = index
+        self.run_indexing()
+
+        # The other chunks got indexed, but the alias stays on the old index.
+        eq_(len(index_webapp.call_args_list), 3)
+        ok_(not update_alias.called)
+        ok_(Reindexing.objects.is_reindexing_mkt())
+        eq_(self.reindexing.get_progress(),
+            {'pending': 0, 'done': 2, 'failed': 1})
+        failed = self.reindexing.chunks.get(
+            status=ReindexingChunk.STATUS_FAILED)
+        eq_(failed.get_ids(), [3, 2])
+        eq_(failed.error, 'oops')
+
+        # Resuming only indexes the failed chunk again.
+        index_webapp.reset_mock()
+        index_webapp.side_effect = None
+        get_indexable.reset_mock()
+        self.run_indexing()
+
+        ok_(not get_indexable.called)
+        eq_(self.indexed(index_webapp), [[3, 2]])
+        update_alias.assert_called_with('new_index', 'old_index', 'alias',
+                                        self.index_settings)
+        ok_(not Reindexing.objects.is_reindexing_mkt())
+
+
+@mock.patch.object(reindex_mkt, 'get_index_settings')
+@mock.patch.object(reindex_mkt.run_indexing, 'delay')
+class TestResume(amo.tests.TestCase):
+
+    def test_resume(self, run_indexing, get_index_settings):
+        get_index_settings.return_value = {'number_of_replicas': 2}
+        Reindexing.objects.flag_reindexing_mkt('new_index', 'old_index',
+                                               'alias')
+        call_command('reindex_mkt', resume=True, chunk_size=50)
+        run_indexing.assert_called_with(
+            'new_index', 'old_index', 'alias',
+            {'number_of_replicas': 2, 'refresh_interval': '5s'}, 50)
+
+    @raises(CommandError)
+    def test_nothing_to_resume(self, run_indexing, get_index_settings):
+        call_command('reindex_mkt', resume=True)
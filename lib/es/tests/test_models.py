@@ -2,7 +2,7 @@ import mock
 from nose.tools import eq_
 
 import amo.tests
-from lib.es.models import Reindexing
+from lib.es.models import Reindexing, ReindexingChunk
 
 
 class TestReindexManager(amo.tests.TestCase):
@@ -102,3 +102,32 @@ class TestReindexManager(amo.tests.TestCase):
 
         # Doesn't clash on other sites.
         assert Reindexing.objects.get_indices('other') == ['other']
+
+
+class TestReindexingChunks(amo.tests.TestCase):
+
+    def setUp(self):
+        self.reindexing = Reindexing.objects.create(
+            site='mkt', new_index='bar', old_index='baz', alias='quux')
+
+    def test_create_chunks(self):
+        self.reindexing.create_chunks(range(1, 8), 3)
+        chunks = self.reindexing.chunks.order_by('id')
+        eq_([c.get_ids() for c in chunks], [[1, 2, 3], [4, 5, 6], [7]])
+        eq_(set(c.status for c in chunks),
+            set([ReindexingChunk.STATUS_PENDING]))
+
+    def test_get_progress(self):
+        self.reindexing.create_chunks(range(1, 8), 2)
+        chunks = list(self.reindexing.chunks.order_by('id'))
+        chunks[0].status = ReindexingChunk.STATUS_DONE
+        chunks[0].save()
+        chunks[1].status = ReindexingChunk.STATUS_FAILED
+        chunks[1].save()
+        eq_(self.reindexing.get_progress(),
+            {'pending': 2, 'done': 1, 'failed': 1})
+
+    def test_unflag_deletes_chunks(self):
+        self.reindexing.create_chunks(range(1, 8), 2)
+        Reindexing.objects.unflag_reindexing_mkt()
+        eq_(ReindexingChunk.objects.count(), 0)
@@ -1,4 +1,11 @@
+import binascii
+import bisect
+import csv
 import logging
+import socket
+import threading
+from array import array
+from collections import OrderedDict
 
 import requests
 from django_statsd.clients import statsd
@@ -8,68 +15,221 @@ from mkt import regions
 log = logging.getLogger('z.geoip')
 
 
+def parse_ip(address):
+    """
+    Return a (version, integer) tuple for an IPv4 or IPv6 address, or None if
+    it isn't a valid address.
+
+    IPv4-mapped IPv6 addresses (::ffff:1.2.3.4) are returned as IPv4.
+    """
+    for version, family in ((4, socket.AF_INET), (6, socket.AF_INET6)):
+        try:
+            packed = socket.inet_pton(family, address)
+        except (socket.error, TypeError, ValueError):
+            continue
+        value = int(binascii.hexlify(packed), 16)
+        if version == 6 and value >> 32 == 0xffff:
+            return 4, value & 0xffffffff
+        return version, value
+    return None
+
+
+ADDRESS_BITS = {4: 32, 6: 128}
+
+# (network, prefix length) of the ranges we never send to the lookups.
+PRIVATE_NETWORKS = [
+    (parse_ip(network), prefix) for network, prefix in (
+        ('127.0.0.0', 8),  # localhost
+        ('10.0.0.0', 8),
+        ('192.168.0.0', 16),
+        ('172.16.0.0', 12),  # 172.16-31.x.x
+        ('::1', 128),  # localhost
+        ('fc00::', 7),  # Unique local addresses.
+        ('fe80::', 10),  # Link-local addresses.
+    )
+]
+
+
 def is_public(ip):
-    parts = map(int, ip.split('.'))
-    # localhost
-    if ip == '127.0.0.1':
-        return False
-    # 10.x.x.x
-    elif parts[0] == 10:
-        return False
-    # 192.168.x.x
-    elif parts[0] == 192 and parts[1] == 168:
-        return False
-    # 172.16-32.x.x
-    elif parts[0] == 172 and 16 <= parts[1] <= 31:
+    parsed = parse_ip(ip)
+    if parsed is None:
         return False
+    version, value = parsed
+    for (net_version, network), prefix in PRIVATE_NETWORKS:
+        shift = ADDRESS_BITS[version] - prefix
+        if net_version == version and value >> shift == network >> shift:
+            return False
     return True
 
 
+class LRUCache(object):
+    """A thread-safe dict keeping only the `size` most recently used keys."""
+
+    def __init__(self, size):
+        self.size = size
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                value = self.data.pop(key)
+            except KeyError:
+                return None
+            # Put it back as the most recently used.
+            self.data[key] = value
+            return value
+
+    def set(self, key, value):
+        if not self.size:
+            return
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = value
+            if len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+
+class GeoIPDatabase(object):
+    """
+    A sorted table of IP ranges to country codes, searched by bisection.
+
+    The file is a CSV whose rows are `start,end,country_code`, where `start`
+    and `end` are the first and last IPv4 or IPv6 addresses of the range. The
+    legacy MaxMind country CSV, whose fifth column is the country code, can be
+    used as is. Ranges must not overlap.
+    """
+
+    def __init__(self, path):
+        self.codes = []
+        # For each IP version: range starts, range ends and country indexes.
+        # IPv6 addresses don't fit in an array so they are kept in lists.
+        self.starts = {4: array('L'), 6: []}
+        self.ends = {4: array('L'), 6: []}
+        self.countries = {4: array('H'), 6: array('H')}
+        self.load(path)
+
+    def load(self, path):
+        code_ids = {}
+        ranges = {4: [], 6: []}
+        with open(path, 'rb') as f:
+            for row in csv.reader(f):
+                if len(row) < 3:
+                    continue
+                start, end = parse_ip(row[0]), parse_ip(row[1])
+                if not start or not end or start[0] != end[0]:
+                    continue
+                code = (row[4] if len(row) > 4 else row[2]).strip().lower()
+                if code not in code_ids:
+                    code_ids[code] = len(self.codes)
+                    self.codes.append(code)
+                ranges[start[0]].append((start[1], end[1], code_ids[code]))
+
+        for version, version_ranges in ranges.items():
+            version_ranges.sort()
+            for start, end, code_id in version_ranges:
+                self.starts[version].append(start)
+                self.ends[version].append(end)
+                self.countries[version].append(code_id)
+        log.info('Loaded %s IPv4 and %s IPv6 ranges from %s' % (
+            len(ranges[4]), len(ranges[6]), path))
+
+    def lookup(self, address):
+        """Return the country code of the address, or None if not found."""
+        parsed = parse_ip(address)
+        if parsed is None:
+            return None
+        version, value = parsed
+        # The range to look at is the last one starting before the address.
+        i = bisect.bisect_right(self.starts[version], value) - 1
+        if i >= 0 and value <= self.ends[version][i]:
+            return self.codes[self.countries[version][i]]
+        return None
+
+
 class GeoIP:
-    """Call to geodude server to resolve an IP to Geo Info block."""
+    """
+    Resolve an IP to a country code.
+
+    If a local database is configured with GEOIP_DB_PATH it is used first,
+    then we call the geodude server if GEOIP_URL is set. Resolved addresses are
+    kept in an LRU cache of GEOIP_CACHE_SIZE entries.
+    """
 
     def __init__(self, settings):
         self.timeout = float(getattr(settings, 'GEOIP_DEFAULT_TIMEOUT', .2))
         self.url = getattr(settings, 'GEOIP_URL', '')
         self.default_val = getattr(settings, 'GEOIP_DEFAULT_VAL',
                                    regions.RESTOFWORLD.slug).lower()
+        self.cache = LRUCache(int(getattr(settings, 'GEOIP_CACHE_SIZE', 0)))
+        self.db = None
+        db_path = getattr(settings, 'GEOIP_DB_PATH', '')
+        if db_path:
+            try:
+                self.db = GeoIPDatabase(db_path)
+            except (IOError, csv.Error) as e:
+                log.error('Could not load GeoIP database {0}: {1}'
+                          .format(db_path, e))
 
     def lookup(self, address):
         """Resolve an IP address to a block of geo information.
 
-        If a given address is unresolvable or the geoip server is not defined,
-        return the default as defined by the settings, or "restofworld".
+        If a given address is unresolvable or neither the local database nor
+        the geoip server are defined, return the default as defined by the
+        settings, or "restofworld".
 
         """
-        public_ip = is_public(address)
-        if self.url and public_ip:
-            with statsd.timer('z.geoip'):
-                res = None
-                try:
-                    res = requests.post('{0}/country.json'.format(self.url),
-                                        timeout=self.timeout,
-                                        data={'ip': address})
-                except requests.Timeout:
-                    statsd.incr('z.geoip.timeout')
-                    log.error(('Geodude timed out looking up: {0}'
-                               .format(address)))
-                except requests.RequestException as e:
-                    statsd.incr('z.geoip.error')
-                    log.error('Geodude connection error: {0}'.format(str(e)))
-                if res and res.status_code == 200:
-                    statsd.incr('z.geoip.success')
-                    country_code = res.json().get('country_code',
-                        self.default_val).lower()
-                    log.info(('Geodude lookup for {0} returned {1}'
-                              .format(address, country_code)))
-                    return country_code
-                    log.info('Geodude lookup returned non-200 response: {0}'
-                             .format(res.status_code))
-        else:
-            if public_ip:
-                log.info('Geodude lookup skipped for public IP: {0}'
-                         .format(address))
+        if not is_public(address):
+            log.info('Geodude lookup skipped for private IP: {0}'
+                     .format(address))
+            return self.default_val
+
+        country_code = self.cache.get(address)
+        if country_code:
+            statsd.incr('z.geoip.cache_hit')
+            return country_code
+
+        if self.db:
+            with statsd.timer('z.geoip.local'):
+                country_code = self.db.lookup(address)
+            if country_code:
+                statsd.incr('z.geoip.local.success')
             else:
-                log.info('Geodude lookup skipped for private IP: {0}'
-                         .format(address))
+                statsd.incr('z.geoip.local.miss')
+
+        if not country_code and self.url:
+            country_code = self.remote_lookup(address)
+        elif not country_code:
+            log.info('Geodude lookup skipped for public IP: {0}'
+                     .format(address))
+
+        if country_code:
+            self.cache.set(address, country_code)
+            return country_code
         return self.default_val
+
+    def remote_lookup(self, address):
+        """Ask the geodude server about the address, returns None on error."""
+        with statsd.timer('z.geoip'):
+            res = None
+            try:
+                res = requests.post('{0}/country.json'.format(self.url),
+                                    timeout=self.timeout,
+                                    data={'ip': address})
+            except requests.Timeout:
+                statsd.incr('z.geoip.timeout')
+                log.error(('Geodude timed out looking up: {0}'
+                           .format(address)))
+            except requests.RequestException as e:
+                statsd.incr('z.geoip.error')
+                log.error('Geodude connection error: {0}'.format(str(e)))
+            if res and res.status_code == 200:
+                statsd.incr('z.geoip.success')
+                country_code = res.json().get('country_code',
+                    self.default_val).lower()
+                log.info(('Geodude lookup for {0} returned {1}'
+                          .format(address, country_code)))
+                return country_code
+            elif res is not None:
+                log.info('Geodude lookup returned non-200 response: {0}'
+                         .format(res.status_code))
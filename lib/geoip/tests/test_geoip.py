@@ -1,3 +1,5 @@
+import os
+import tempfile
 from random import randint
 
 import mock
@@ -6,12 +8,14 @@ from nose.tools import eq_
 
 import amo.tests
 
-from lib.geoip import GeoIP
+from lib.geoip import GeoIP, GeoIPDatabase, is_public
 
 
-def generate_settings(url='', default='restofworld', timeout=0.2):
+def generate_settings(url='', default='restofworld', timeout=0.2,
+                      db_path='', cache_size=0):
     return mock.Mock(GEOIP_URL=url, GEOIP_DEFAULT_VAL=default,
-                     GEOIP_DEFAULT_TIMEOUT=timeout)
+                     GEOIP_DEFAULT_TIMEOUT=timeout, GEOIP_DB_PATH=db_path,
+                     GEOIP_CACHE_SIZE=cache_size)
 
 
 class GeoIPTest(amo.tests.TestCase):
@@ -86,3 +90,73 @@ class GeoIPTest(amo.tests.TestCase):
             result = geoip.lookup(ip)
             assert not mock_post.called
             eq_(result, 'restofworld')
+
+    def test_private_ipv6(self):
+        for ip in ('::1', 'fe80::1', 'fd00::1', '::ffff:10.0.0.1'):
+            assert not is_public(ip), ip
+        assert is_public('2001:db8::1')
+        assert not is_public('not an ip')
+
+    @mock.patch('requests.post')
+    def test_cache(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', cache_size=1))
+        mock_post.return_value = mock.Mock(status_code=200, json=lambda: {
+            'country_code': 'US',
+        })
+        eq_(geoip.lookup('1.1.1.1'), 'us')
+        eq_(geoip.lookup('1.1.1.1'), 'us')
+        eq_(mock_post.call_count, 1)
+
+        # The least recently used address is dropped from the cache.
+        eq_(geoip.lookup('2.2.2.2'), 'us')
+        eq_(geoip.lookup('1.1.1.1'), 'us')
+        eq_(mock_post.call_count, 3)
+
+
+class GeoIPDatabaseTest(amo.tests.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as f:
+            f.write('1.0.0.0,1.0.0.255,AU\n'
+                    '"2.0.0.0","2.255.255.255","33554432","50331647",'
+                    '"FR","France"\n'
+                    '2001:db8::,2001:db8::ffff,BR\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_lookup(self):
+        db = GeoIPDatabase(self.path)
+        eq_(db.lookup('1.0.0.0'), 'au')
+        eq_(db.lookup('1.0.0.255'), 'au')
+        eq_(db.lookup('2.1.2.3'), 'fr')
+        eq_(db.lookup('::ffff:2.1.2.3'), 'fr')
+        eq_(db.lookup('2001:db8::42'), 'br')
+
+    def test_lookup_unknown(self):
+        db = GeoIPDatabase(self.path)
+        eq_(db.lookup('1.0.1.0'), None)
+        eq_(db.lookup('0.0.0.1'), None)
+        eq_(db.lookup('2001:db9::'), None)
+        eq_(db.lookup('not an ip'), None)
+
+    @mock.patch('requests.post')
+    def test_geoip_local(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', db_path=self.path))
+        eq_(geoip.lookup('1.0.0.1'), 'au')
+        assert not mock_post.called
+
+    @mock.patch('requests.post')
+    def test_geoip_local_fallback(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', db_path=self.path))
+        mock_post.return_value = mock.Mock(status_code=200, json=lambda: {
+            'country_code': 'US',
+        })
+        eq_(geoip.lookup('3.3.3.3'), 'us')
+        assert mock_post.called
+
+    def test_geoip_missing_db(self):
+        geoip = GeoIP(generate_settings(db_path='/does/not/exist.csv'))
+        eq_(geoip.db, None)
+        eq_(geoip.lookup('1.0.0.1'), 'restofworld')
@@ -1,14 +1,25 @@
+import datetime
+import hashlib
+import json
 import threading
 
 from django.conf import settings
+from django.core.cache import cache
 
 import commonware.log
+import requests
+from monolith.client import util
 
 from mkt.monolith import record_stat
 
 
 log = commonware.log.getLogger('z.metrics')
 
+# The ((server, index), client) shared by the process, see
+# `get_monolith_client`.
+_monolith_client = None
+_monolith_lock = threading.Lock()
+
 
 def record_action(action, request, data=None):
     """Records the given action by sending it to the metrics servers.
@@ -31,17 +42,153 @@ def record_action(action, request, data=None):
 
 
 def get_monolith_client():
-    _locals = threading.local()
-    if not hasattr(_locals, 'monolith'):
-        server = getattr(settings, 'MONOLITH_SERVER', None)
-        index = getattr(settings, 'MONOLITH_INDEX', 'time_*')
-        if server is None:
-            raise ValueError('You need to configure MONOLITH_SERVER')
+    """Returns the Monolith client shared by the whole process.
+
+    The client is created on first use and its HTTP session keeps a pool of
+    up to MONOLITH_POOL_SIZE connections alive to the Monolith server.
+
+    """
+    global _monolith_client
+    server = getattr(settings, 'MONOLITH_SERVER', None)
+    index = getattr(settings, 'MONOLITH_INDEX', 'time_*')
+    if server is None:
+        raise ValueError('You need to configure MONOLITH_SERVER')
+
+    with _monolith_lock:
+        if _monolith_client is None or _monolith_client[0] != (server, index):
+            statsd = {
+                'statsd.host': getattr(settings, 'STATSD_HOST', 'localhost'),
+                'statsd.port': getattr(settings, 'STATSD_PORT', 8125)}
+
+            from monolith.client import Client as MonolithClient
+            client = MonolithClient(server, index, **statsd)
+            pool_size = getattr(settings, 'MONOLITH_POOL_SIZE', 10)
+            client.session.mount(server, requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=pool_size))
+            _monolith_client = ((server, index), client)
+
+    return _monolith_client[1]
+
+
+def reset_monolith_client():
+    """Forgets the shared Monolith client, the next call creates a new one."""
+    global _monolith_client
+    with _monolith_lock:
+        _monolith_client = None
+
+
+def _to_date(value):
+    if isinstance(value, basestring):
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    elif isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+def _iter_dates(start, end, interval):
+    """Yields the start date of each `interval` between `start` and `end`."""
+    if interval == 'day':
+        return util.iterdays(start, end)
+    elif interval == 'week':
+        return util.iterweeks(start, end)
+    elif interval == 'month':
+        return util.itermonths(start, end)
+    elif interval == 'quarter':
+        return (date for date in util.itermonths(start, end)
+                if date.month % 3 == 1)
+    return util.iteryears(start, end)
+
+
+def get_monolith_query(metric, start, end, interval, dimensions):
+    """Returns the query done by the Monolith client for this series."""
+    date_range = {'range': {'date': {'gte': start.strftime('%Y-%m-%d'),
+                                     'lte': end.strftime('%Y-%m-%d')}}}
+    if dimensions:
+        facet_filter = {'and': [{'term': {k: v}}
+                                for k, v in dimensions.items()] +
+                               [date_range]}
+    else:
+        facet_filter = date_range
+
+    return {
+        'query': {'match_all': {}},
+        'size': 0,
+        'facets': {
+            'histo1': {
+                'date_histogram': {
+                    'value_field': metric,
+                    'interval': interval,
+                    'key_field': 'date',
+                },
+                'facet_filter': facet_filter,
+            }
+        }
+    }
+
+
+def parse_monolith_result(result, start, end, interval):
+    """Turns a Monolith search result into a list of daily counts.
+
+    Like the Monolith client, every interval of the range is returned and the
+    ones without data have a `None` count.
+
+    """
+    if 'error' in result:
+        raise ValueError(result['error'])
 
-        statsd = {'statsd.host': getattr(settings, 'STATSD_HOST', 'localhost'),
-                  'statsd.port': getattr(settings, 'STATSD_PORT', 8125)}
+    counts = {}
+    for entry in result['facets']['histo1']['entries']:
+        date = datetime.datetime.utcfromtimestamp(entry['time'] / 1000.0)
+        counts[date.date()] = entry.get('total', entry.get('count'))
 
-        from monolith.client import Client as MonolithClient
-        _locals.monolith = MonolithClient(server, index, **statsd)
+    return [{'count': counts.get(date), 'date': date}
+            for date in _iter_dates(start, end, interval)]
 
-    return _locals.monolith
+
+def _get_cache_key(metric, start, end, interval, dimensions):
+    key = json.dumps([metric, start.isoformat(), end.isoformat(), interval,
+                      sorted(dimensions.items())])
+    return 'monolith:%s' % hashlib.md5(key).hexdigest()
+
+
+def get_monolith_data(client, queries):
+    """Fetches several Monolith series at once.
+
+    `queries` is a list of `(metric, start, end, interval, dimensions)`
+    tuples, a list of results in the same order is returned. Series are
+    cached for MONOLITH_CACHE_TIMEOUT seconds and all those missing from the
+    cache are fetched with a single multi-search request.
+
+    """
+    timeout = getattr(settings, 'MONOLITH_CACHE_TIMEOUT', 0)
+    queries = [(metric, _to_date(start), _to_date(end), interval,
+                dimensions) for metric, start, end, interval, dimensions
+               in queries]
+    keys = [_get_cache_key(*query) for query in queries]
+    results = cache.get_many(keys) if timeout else {}
+
+    missing = [(key, query) for key, query in zip(keys, queries)
+               if key not in results]
+    if len(missing) == 1:
+        key, (metric, start, end, interval, dimensions) = missing[0]
+        results[key] = list(client(metric, start, end, interval,
+                                   **dimensions))
+    elif missing:
+        body = []
+        for key, (metric, start, end, interval, dimensions) in missing:
+            body.append('{}')
+            body.append(json.dumps(get_monolith_query(
+                metric, start, end, interval, dimensions)))
+        url = client.es.rsplit('/', 1)[0] + '/_msearch'
+        with client.statsd.timer('elasticsearch-msearch'):
+            res = client.session.post(url, data='\n'.join(body) + '\n')
+        if res.status_code != 200:
+            raise ValueError(res.content)
+        for (key, (metric, start, end, interval, dimensions)), result in zip(
+                missing, res.json()['responses']):
+            results[key] = parse_monolith_result(result, start, end, interval)
+
+    if timeout and missing:
+        cache.set_many(dict((key, results[key]) for key, query in missing),
+                       timeout)
+    return [results[key] for key in keys]
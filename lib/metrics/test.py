@@ -1,8 +1,16 @@
 # -*- coding: utf8 -*-
+import calendar
+import datetime
+import json
+
+from django.conf import settings
+
 import mock
+from nose.tools import eq_, ok_
 
 import amo.tests
-from lib.metrics import record_action
+from lib.metrics import (get_monolith_client, get_monolith_data,
+                         record_action, reset_monolith_client)
 
 
 class TestMetrics(amo.tests.TestCase):
@@ -16,3 +24,87 @@ class TestMetrics(amo.tests.TestCase):
         record_action('install', request, {})
         record_stat.assert_called_with('install', request,
             **{'locale': 'en', 'src': 'foo', 'user-agent': 'py'})
+
+
+class TestMonolithClient(amo.tests.TestCase):
+
+    def setUp(self):
+        reset_monolith_client()
+        self.addCleanup(reset_monolith_client)
+        patches = [
+            mock.patch.object(settings, 'MONOLITH_SERVER', 'http://0.0.0.0:0'),
+            mock.patch.object(settings, 'MONOLITH_CACHE_TIMEOUT', 60),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = get_monolith_client()
+        self.client.session = mock.Mock()
+        self.start = datetime.date(2013, 4, 1)
+        self.end = datetime.date(2013, 4, 2)
+
+    def entry(self, date, count):
+        return {'time': calendar.timegm(date.timetuple()) * 1000,
+                'count': count}
+
+    def response(self, *counts):
+        res = mock.Mock()
+        res.status_code = 200
+        res.json.return_value = {'responses': [
+            {'facets': {'histo1': {'entries': [self.entry(self.start, c)]}}}
+            for c in counts]}
+        return res
+
+    def test_shared_client(self):
+        eq_(get_monolith_client(), self.client)
+        with self.settings(MONOLITH_INDEX='other-time_*'):
+            ok_(get_monolith_client() is not self.client)
+
+    def test_no_server(self):
+        with self.settings(MONOLITH_SERVER=None):
+            with self.assertRaises(ValueError):
+                get_monolith_client()
+
+    def test_multi_search(self):
+        self.client.session.post.return_value = self.response(1, 2)
+        data = get_monolith_data(self.client, [
+            ('foo', self.start, self.end, 'day', {'region': 'us'}),
+            ('bar', self.start, self.end, 'day', {})])
+
+        eq_(self.client.session.post.call_count, 1)
+        url, = self.client.session.post.call_args[0]
+        ok_(url.endswith('/_msearch'))
+        body = self.client.session.post.call_args[1]['data'].splitlines()
+        eq_(len(body), 4)
+        query = json.loads(body[1])['facets']['histo1']
+        eq_(query['date_histogram']['value_field'], 'foo')
+        ok_({'term': {'region': 'us'}} in query['facet_filter']['and'])
+
+        eq_(data, [[{'count': 1, 'date': self.start},
+                    {'count': None, 'date': self.end}],
+                   [{'count': 2, 'date': self.start},
+                    {'count': None, 'date': self.end}]])
+
+    def test_multi_search_error(self):
+        self.client.session.post.return_value.status_code = 500
+        with self.assertRaises(ValueError):
+            get_monolith_data(self.client, [
+                ('foo', self.start, self.end, 'day', {}),
+                ('bar', self.start, self.end, 'day', {})])
+
+    def test_cached(self):
+        self.client.session.post.return_value = self.response(1, 2)
+        queries = [('foo', self.start, self.end, 'day', {}),
+                   ('bar', self.start, self.end, 'day', {})]
+        data = get_monolith_data(self.client, queries)
+        eq_(get_monolith_data(self.client, queries), data)
+        eq_(self.client.session.post.call_count, 1)
+
+    def test_single_query(self):
+        client = mock.Mock()
+        client.return_value = iter([{'count': 1, 'date': self.start}])
+        eq_(get_monolith_data(client, [
+            ('foo', '2013-04-01', '2013-04-01', 'day', {'region': 'us'})]),
+            [[{'count': 1, 'date': self.start}]])
+        client.assert_called_with('foo', self.start, self.start, 'day',
+                                  region='us')
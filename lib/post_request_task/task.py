@@ -1,6 +1,8 @@
+import atexit
 import threading
 from functools import partial
 
+from django.conf import settings
 from django.core.signals import got_request_exception, request_finished
 
 import commonware.log
@@ -13,18 +15,40 @@ log = commonware.log.getLogger('z.post_request_task')
 
 _locals = threading.local()
 
+# Tasks held back after their request finished so that they can be merged with
+# the same tasks from the next requests, see `_send_tasks`.
+_window_queue = []
+_window_lock = threading.Lock()
+_window_timer = None
+
 
 def _get_task_queue():
     """Returns the calling thread's task queue."""
     return _locals.__dict__.setdefault('task_queue', [])
 
 
+def _get_merge_window():
+    """Returns the number of seconds merged tasks are held for, if any."""
+    return getattr(settings, 'POST_REQUEST_TASK_MERGE_WINDOW', 0)
+
+
 def _send_tasks(**kwargs):
-    """Sends all delayed Celery tasks."""
+    """Sends all delayed Celery tasks.
+
+    If a merge window is set, tasks that merge their ids are held for that
+    many seconds in a queue shared by the whole process instead, to be merged
+    with the same tasks coming from other requests.
+
+    """
     queue = _get_task_queue()
+    window = _get_merge_window()
     while queue:
-        cls, args, kwargs = queue.pop(0)
-        cls.original_apply_async(*args, **kwargs)
+        t = queue.pop(0)
+        if window and t[0].merge_ids:
+            _append_window_task(t, window)
+        else:
+            cls, args, kwargs = t
+            cls.original_apply_async(*args, **kwargs)
 
 
 def _discard_tasks(**kwargs):
@@ -32,19 +56,69 @@ def _discard_tasks(**kwargs):
     _get_task_queue()[:] = []
 
 
+def _merge_task(queue, t):
+    """Merge the ids of the task into a compatible task of the queue.
+
+    Tasks are compatible when they are the same task, called with the same
+    keyword arguments and options, and a list of ids as the only positional
+    argument. Returns whether the task has been merged.
+
+    """
+    cls, (args, kwargs), options = t
+    if len(args) != 1:
+        return False
+    for i, (queued_cls, (queued_args, queued_kwargs), queued_options) in (
+            enumerate(queue)):
+        if (queued_cls is cls and len(queued_args) == 1 and
+            queued_kwargs == kwargs and queued_options == options):
+            ids = list(queued_args[0])
+            ids.extend(id_ for id_ in args[0] if id_ not in ids)
+            queue[i] = (cls, ((ids,), kwargs), options)
+            log.debug('Merged task: %s' % (t,))
+            return True
+    return False
+
+
 def _append_task(t):
     """Append a task to the queue.
 
     Expected argument is a tuple of the (task class, args, kwargs).
 
-    This doesn't append to queue if the argument is already in the queue.
+    This doesn't append to queue if the argument is already in the queue. If
+    the task merges its ids, they are added to the same task already in the
+    queue instead.
 
     """
     queue = _get_task_queue()
-    if t not in queue:
-        queue.append(t)
-    else:
+    if t in queue:
         log.debug('Removed duplicate task: %s' % (t,))
+    elif not (t[0].merge_ids and _merge_task(queue, t)):
+        queue.append(t)
+
+
+def _append_window_task(t, window):
+    """Append a task to the process wide queue, merging its ids."""
+    global _window_timer
+    with _window_lock:
+        if not _merge_task(_window_queue, t):
+            _window_queue.append(t)
+        if _window_timer is None:
+            _window_timer = threading.Timer(window, _send_window_tasks)
+            _window_timer.daemon = True
+            _window_timer.start()
+
+
+def _send_window_tasks():
+    """Sends all the tasks held in the process wide queue."""
+    global _window_timer
+    with _window_lock:
+        tasks = _window_queue[:]
+        _window_queue[:] = []
+        if _window_timer is not None:
+            _window_timer.cancel()
+            _window_timer = None
+    for cls, args, kwargs in tasks:
+        cls.original_apply_async(*args, **kwargs)
 
 
 class PostRequestTask(Task):
@@ -53,14 +127,19 @@ class PostRequestTask(Task):
     This simply wraps celery's `@task` decorator and stores the task calls
     until after the request is finished, then fires them off.
 
+    Tasks taking a list of ids as their only positional argument can be
+    declared with `merge_ids=True`: calls made during the same request with the
+    same keyword arguments are then merged into a single call with all the ids.
+
     """
     abstract = True
+    merge_ids = False
 
     def original_apply_async(self, *args, **kwargs):
         return super(PostRequestTask, self).apply_async(*args, **kwargs)
 
-    def apply_async(self, *args, **kwargs):
-        _append_task((self, args, kwargs))
+    def apply_async(self, args=None, kwargs=None, **options):
+        _append_task((self, (tuple(args or ()), kwargs or {}), options))
 
 
 # Replacement `@task` decorator.
@@ -70,3 +149,5 @@ task = partial(base_task, base=PostRequestTask)
 # Hook the signal handlers up.
 request_finished.connect(_send_tasks)
 got_request_exception.connect(_discard_tasks)
+# Don't lose the tasks held for merging when the process exits.
+atexit.register(_send_window_tasks)
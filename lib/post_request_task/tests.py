@@ -4,7 +4,8 @@ from django.test import TestCase
 from mock import Mock, patch
 from nose.tools import eq_
 
-from .task import task, _get_task_queue, _discard_tasks
+from .task import (task, _discard_tasks, _get_task_queue, _send_window_tasks,
+                   _window_queue)
 
 
 task_mock = Mock()
@@ -15,6 +16,11 @@ def test_task():
     task_mock()
 
 
+@task(merge_ids=True)
+def test_merge_task(ids, **kw):
+    task_mock(ids, **kw)
+
+
 class TestTask(TestCase):
 
     def tearDown(self):
@@ -69,3 +75,39 @@ class TestTask(TestCase):
             test_task.delay()
 
         self._verify_task_filled()
+
+    def test_merge_ids(self):
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            test_merge_task.delay([1, 2])
+            test_merge_task.delay([2, 3])
+            test_merge_task.delay([4], index='foo')
+
+        queue = _get_task_queue()
+        eq_(len(queue), 2)
+        eq_(queue[0][1], (([1, 2, 3],), {}))
+        eq_(queue[1][1], (([4],), {'index': 'foo'}))
+
+    def test_no_merge_ids(self):
+        with self.settings(CELERY_ALWAYS_EAGER=False):
+            test_task.delay(1)
+            test_task.delay(2)
+        eq_(len(_get_task_queue()), 2)
+
+    @patch('lib.post_request_task.task.PostRequestTask.original_apply_async')
+    def test_merge_window(self, _mock):
+        with self.settings(CELERY_ALWAYS_EAGER=False,
+                           POST_REQUEST_TASK_MERGE_WINDOW=60):
+            test_merge_task.delay([1])
+            test_task.delay()
+            request_finished.send(sender=self)
+            test_merge_task.delay([2])
+            request_finished.send(sender=self)
+
+        # Only the task that doesn't merge its ids has been sent.
+        eq_(_mock.call_count, 1)
+        eq_(len(_window_queue), 1)
+
+        _send_window_tasks()
+        eq_(_mock.call_count, 2)
+        eq_(_mock.call_args[0], (([1, 2],), {}))
+        eq_(len(_window_queue), 0)
@@ -4,6 +4,11 @@ items.
 
 Check the function docs, they expect specific preconditions.
 """
+import collections
+import heapq
+import multiprocessing
+import operator
+
 
 # Placeholders for the fast functions implemented in C.
 
@@ -20,3 +25,90 @@ try:
     from _recommend import symmetric_diff_count, similarity
 except ImportError:
     pass
+
+
+def build_index(addons):
+    """
+    Return a {collection: [addon]} inverted index of an {addon: [collection]}
+    dict.
+    """
+    index = collections.defaultdict(list)
+    for addon, cs in addons.iteritems():
+        for c in cs:
+            index[c].append(addon)
+    return index
+
+
+def top_similar(addon, addons, index, by_size, limit=10):
+    """
+    Return the `limit` (other addon, similarity) pairs most similar to `addon`,
+    most similar first.
+
+    Only the add-ons sharing a collection with `addon` are scored one by one.
+    The similarity of the other ones only depends on how many collections they
+    are in, so the best of them are the first ones of `by_size`, the list of
+    add-ons sorted by number of collections.
+    """
+    cs = addons[addon]
+    shared = collections.defaultdict(int)
+    for c in cs:
+        for other in index[c]:
+            shared[other] += 1
+
+    size = len(cs)
+    # |xs ^ ys| = |xs| + |ys| - 2 * |xs & ys|, see similarity().
+    candidates = [(other, 1. / (1 + size + len(addons[other]) - 2 * count))
+                  for other, count in shared.iteritems() if other != addon]
+    found = 0
+    for other in by_size:
+        if found == limit:
+            break
+        if other != addon and other not in shared:
+            candidates.append((other, 1. / (1 + size + len(addons[other]))))
+            found += 1
+    return heapq.nlargest(limit, candidates, key=operator.itemgetter(1))
+
+
+# State shared with the worker processes of all_similar(), which inherit it
+# when they are forked instead of having it pickled for every shard.
+_state = {}
+
+
+def _similar_shard(shard):
+    return [(addon, top_similar(addon, limit=_state['limit'],
+                                **_state['data']))
+            for addon in shard]
+
+
+def all_similar(addons, limit=10, processes=1, shard_size=50):
+    """
+    Yield (addon, top_similar(addon)) for every add-on of an
+    {addon: [collection]} dict.
+
+    With more than one process the add-ons are split in shards of
+    `shard_size` add-ons computed by a pool of `processes` workers, in which
+    case the add-ons are not yielded in any particular order.
+    """
+    data = {
+        'addons': addons,
+        'index': build_index(addons),
+        'by_size': sorted(addons, key=lambda addon: len(addons[addon])),
+    }
+    if processes <= 1:
+        for addon in addons:
+            yield addon, top_similar(addon, limit=limit, **data)
+        return
+
+    ids = list(addons)
+    shards = [ids[i:i + shard_size] for i in xrange(0, len(ids), shard_size)]
+    _state.update(data=data, limit=limit)
+    pool = multiprocessing.Pool(processes)
+    try:
+        for results in pool.imap_unordered(_similar_shard, shards):
+            for result in results:
+                yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+        _state.clear()
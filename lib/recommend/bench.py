@@ -0,0 +1,75 @@
+"""
+Benchmark of the add-on similarity computations used by the recs cron.
+
+Compares scoring every pair of add-ons with similarity() to all_similar() on
+random {addon: [collection]} data:
+
+    python lib/recommend/bench.py --addons 2000 --collections 5000
+"""
+import operator
+import optparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import recommend  # noqa
+
+
+def make_addons(num_addons, num_collections, max_size):
+    addons = {}
+    for addon in xrange(num_addons):
+        size = random.randint(4, max_size)
+        addons[addon] = array('l', sorted(
+            random.sample(xrange(num_collections), size)))
+    return addons
+
+
+def naive(addons, limit):
+    recs = {}
+    for addon, cs in addons.iteritems():
+        xs = [(other, recommend.similarity(cs, ys))
+              for other, ys in addons.iteritems()]
+        others = sorted(xs, key=operator.itemgetter(1), reverse=True)
+        recs[addon] = [(k, v) for k, v in others[:limit + 1]
+                       if k != addon][:limit]
+    return recs
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('--addons', type='int', default=2000)
+    parser.add_option('--collections', type='int', default=5000)
+    parser.add_option('--max-size', type='int', default=40,
+                      help='Maximum number of collections per add-on.')
+    parser.add_option('--processes', type='int', default=1)
+    parser.add_option('--skip-naive', action='store_true', default=False)
+    options, args = parser.parse_args()
+
+    random.seed(42)
+    addons = make_addons(options.addons, options.collections,
+                         options.max_size)
+    limit = 10
+
+    start = time.time()
+    recs = dict(recommend.all_similar(addons, limit=limit,
+                                      processes=options.processes))
+    print 'all_similar: %.2fs' % (time.time() - start)
+
+    if not options.skip_naive:
+        start = time.time()
+        expected = naive(addons, limit)
+        print 'naive: %.2fs' % (time.time() - start)
+        # Ties can be ordered differently, compare the scores.
+        mismatches = sum(1 for addon in addons
+                         if [s for _, s in recs[addon]] !=
+                            [s for _, s in expected[addon]])
+        print 'mismatches: %s' % mismatches
+
+
+if __name__ == '__main__':
+    main()
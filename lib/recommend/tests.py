@@ -31,3 +31,38 @@ def test_symmetric_diff_count():
 # The algorithm is in flux so this is minimal coverage.
 def test_similarity():
     eq_(1/2., recommend.similarity([1], [1, 2]))
+
+
+def test_build_index():
+    index = recommend.build_index({1: [1, 2], 2: [2, 3]})
+    eq_(dict(index), {1: [1], 2: [1, 2], 3: [2]})
+
+
+def test_top_similar():
+    addons = {
+        1: [1, 2, 3, 4],
+        2: [1, 2, 3, 5],
+        3: [6, 7, 8, 9],
+        4: [1, 6, 7, 8, 9, 10, 11],
+    }
+    index = recommend.build_index(addons)
+    by_size = sorted(addons, key=lambda a: len(addons[a]))
+    # Add-on 3 doesn't share any collection with 1 but is still scored.
+    eq_(recommend.top_similar(1, addons, index, by_size),
+        [(2, 1 / 3.), (3, 1 / 9.), (4, 1 / 10.)])
+    eq_(recommend.top_similar(1, addons, index, by_size, limit=1),
+        [(2, 1 / 3.)])
+
+
+def test_all_similar():
+    addons = dict((a, array('l', range(a, a + 4 + a % 3)))
+                  for a in range(20))
+    for processes in (1, 2):
+        recs = dict(recommend.all_similar(addons, limit=5,
+                                          processes=processes, shard_size=3))
+        eq_(sorted(recs), sorted(addons))
+        for addon, others in recs.items():
+            expected = sorted((recommend.similarity(addons[addon], cs)
+                               for other, cs in addons.items()
+                               if other != addon), reverse=True)[:5]
+            eq_([score for _, score in others], expected)
@@ -68,6 +68,9 @@ UGLIFY_BIN = 'uglifyjs'  # Set as None to use YUI instead (at your risk).
 
 # Path to pngcrush (for image optimization).
 PNGCRUSH_BIN = 'pngcrush'
+# Have pngcrush try all its methods (-brute). That saves a few more bytes but
+# is much slower than its default trials.
+PNGCRUSH_BRUTE = False
 
 ADMINS = (
     # ('Your Name', 'your_email@domain.com'),
@@ -850,6 +853,12 @@ MIRROR_URL = 'http://releases.mozilla.org/pub/mozilla.org/addons'
 LOCAL_MIRROR_URL = 'https://static.addons.mozilla.net/_files'
 PRIVATE_MIRROR_URL = '/_privatefiles'
 
+# Number of seconds each update service process reuses the responses it
+# rendered for a request, as long as the add-on doesn't change. 0 disables it.
+UPDATE_RESPONSES_TIMEOUT = 0
+# Number of responses each update service process keeps at most.
+UPDATE_RESPONSES_MAX = 10000
+
 # File paths
 ADDON_ICONS_PATH = UPLOADS_PATH + '/addon_icons'
 COLLECTIONS_ICON_PATH = UPLOADS_PATH + '/collection_icons'
@@ -1029,6 +1038,18 @@ CELERY_TIME_LIMITS = {
         'soft': 60 * 20,  # 20 mins to reindex.
         'hard': 60 * 120,  # 120 mins hard limit.
     },
+    'lib.es.management.commands.reindex_mkt.index_chunk': {
+        'soft': 60 * 5,  # 5 mins to index a chunk.
+        'hard': 60 * 10,  # 10 mins hard limit.
+    },
+    'mkt.webapps.tasks.combine_export': {
+        'soft': 60 * 30,  # 30 mins to write the public data export.
+        'hard': 60 * 60,  # 60 mins hard limit.
+    },
+    'mkt.webapps.tasks.dump_user_installs': {
+        'soft': 60 * 60 * 3,  # 3 hours to export all the user installs.
+        'hard': 60 * 60 * 4,  # 4 hours hard limit.
+    },
 }
 
 # When testing, we always want tasks to raise exceptions. Good for sanity.
@@ -1039,6 +1060,27 @@ CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
 # a separate, shorter timeout for validation tasks.
 CELERYD_TASK_SOFT_TIME_LIMIT = 60 * 2
 
+# Number of seconds post request tasks declared with `merge_ids=True` are held
+# by each process after their request finished, so that they can be merged
+# with the same tasks from the following requests. 0 sends them right away.
+POST_REQUEST_TASK_MERGE_WINDOW = 0
+
+# Number of seconds the install and stat events are held in memory before
+# being written to the database in bulk, or number of waiting events that
+# triggers the write. A 0 interval writes them right away.
+MONOLITH_BUFFER_INTERVAL = 0
+MONOLITH_BUFFER_SIZE = 100
+# Maximum number of events kept for a retry when writing them failed.
+MONOLITH_BUFFER_MAX_SIZE = 10000
+
+# Number of seconds after which each process reloads the region exclusions
+# of the apps, even if no change was signalled.
+REGION_EXCLUSIONS_TIMEOUT = 60 * 5
+
+# Number of seconds after which each process rebuilds its snapshot of the
+# price tiers, even if no change was signalled.
+PRICE_MATRIX_TIMEOUT = 60 * 60
+
 ## Fixture Magic
 CUSTOM_DUMPS = {
     'addon': {  # ./manage.py custom_dump addon id
@@ -1195,6 +1237,9 @@ MAX_PERSONA_UPLOAD_SIZE = 300 * 1024
 MAX_REVIEW_ATTACHMENT_UPLOAD_SIZE = 5 * 1024 * 1024
 MAX_WEBAPP_UPLOAD_SIZE = 2 * 1024 * 1024
 
+# Number of manifests fetched at the same time when updating manifests.
+UPDATE_MANIFESTS_POOL_SIZE = 10
+
 # RECAPTCHA - copy all three statements to settings_local.py
 RECAPTCHA_PUBLIC_KEY = ''
 RECAPTCHA_PRIVATE_KEY = ''
@@ -1243,6 +1288,9 @@ DEFAULT_SUGGESTED_CONTRIBUTION = 5
 # Path to `ps`.
 PS_BIN = '/bin/ps'
 
+# Number of processes computing add-on recommendations in the recs cron.
+RECS_PROCESSES = 1
+
 # The maximum file size that is shown inside the file viewer.
 FILE_VIEWER_SIZE_LIMIT = 1048576
 # The maximum file size that you can have inside a zip file.
@@ -1314,6 +1362,12 @@ WEBAPPS_RECEIPT_KEY = ''
 WEBAPPS_RECEIPT_EXPIRY_SECONDS = 60 * 60 * 24 * 182
 # Send a new receipt back when it expires.
 WEBAPPS_RECEIPT_EXPIRED_SEND = False
+# Number of seconds the receipt verify service reuses the purchase it looked
+# up for a receipt. Changes to the purchase clear it. 0 disables it.
+WEBAPPS_RECEIPT_PURCHASE_TIMEOUT = 0
+# Number of seconds each receipt verify process reuses the contents of a
+# receipt it decoded and checked the signature of. 0 disables it.
+WEBAPPS_RECEIPT_DECODE_TIMEOUT = 0
 
 CSRF_FAILURE_VIEW = 'amo.views.csrf_failure'
 
@@ -1346,6 +1400,8 @@ SIGNING_SERVER_ACTIVE = False
 SIGNING_SERVER = ''
 # And how long we'll give the server to respond.
 SIGNING_SERVER_TIMEOUT = 10
+# How many connections to the signing server each process keeps alive.
+SIGNING_SERVER_POOL_SIZE = 10
 # The domains that we will accept certificate issuers for receipts.
 SIGNING_VALID_ISSUERS = []
 
@@ -1447,6 +1503,10 @@ JINGO_MINIFY_USE_STATIC = False
 MONOLITH_SERVER = None
 MONOLITH_INDEX = 'time_*'
 MONOLITH_MAX_DATE_RANGE = 365
+# Number of connections kept alive to the Monolith server by each process.
+MONOLITH_POOL_SIZE = 10
+# Number of seconds Monolith series are cached for, 0 to disable.
+MONOLITH_CACHE_TIMEOUT = 60
 
 # Error generation service. Should *not* be on in production.
 ENABLE_API_ERROR_SERVICE = False
@@ -1458,9 +1518,28 @@ APP_FEATURES_VERSION = 4
 # Whether to throttle API requests. Default is True. Disable where appropriate.
 API_THROTTLE = True
 
+# How long OAuth credentials of API requests are cached for. They are also
+# cleared from the cache when they change.
+OAUTH_CREDENTIALS_CACHE_TIMEOUT = 60 * 5  # 5 minutes.
+
 # Cache timeout on the /search/featured API.
 CACHE_SEARCH_FEATURED_API_TIMEOUT = 60 * 60  # 1 hour.
 
+# The anonymous GET API requests whose responses are cached server side, as
+# (path regexp, timeout) pairs, when the api-response-cache switch is on. The
+# responses are also thrown away when apps, collections or categories change.
+API_RESPONSE_CACHE = (
+    (r'^/api/(v\d+/)?(apps|fireplace)/search/featured/',
+     CACHE_SEARCH_FEATURED_API_TIMEOUT),
+    (r'^/api/(v\d+/)?(apps|fireplace)/search/', 60 * 5),
+    (r'^/api/(v\d+/)?apps/category/', 60 * 60),
+    (r'^/api/(v\d+/)?(apps|fireplace)/app/[^/]+/$', 60 * 5),
+)
+
+# How long the table of public collections used to pick the collections of
+# the /search/featured API is cached for. It's also cleared when they change.
+COLLECTIONS_LOOKUP_CACHE_TIMEOUT = 60 * 5  # 5 minutes.
+
 # Whitelist IP addresses of the allowed clients that can post email
 # through the API.
 WHITELISTED_CLIENTS_EMAIL_API = []
@@ -0,0 +1,13 @@
+CREATE TABLE `zadmin_reindexing_chunk` (
+    `id` int(11) AUTO_INCREMENT NOT NULL PRIMARY KEY,
+    `reindexing_id` int(11) NOT NULL,
+    `ids` longtext NOT NULL,
+    `status` smallint UNSIGNED NOT NULL DEFAULT 0,
+    `error` longtext,
+    `modified` datetime NOT NULL
+) ENGINE=InnoDB CHARACTER SET utf8 COLLATE utf8_general_ci;
+ALTER TABLE `zadmin_reindexing_chunk`
+    ADD CONSTRAINT FOREIGN KEY (`reindexing_id`)
+    REFERENCES `zadmin_reindexing` (`id`) ON DELETE CASCADE;
+CREATE INDEX `zadmin_reindexing_chunk_status`
+    ON `zadmin_reindexing_chunk` (`reindexing_id`, `status`);
@@ -0,0 +1,3 @@
+INSERT INTO waffle_switch_mkt (name, active, created, modified, note)
+    VALUES ('featured-search-msearch', 0, NOW(), NOW(),
+            'Fetch featured search collections in the same ES request.');
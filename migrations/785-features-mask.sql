@@ -0,0 +1,50 @@
+ALTER TABLE `addons_features` ADD COLUMN `features_mask` bigint NOT NULL DEFAULT 0;
+
+UPDATE `addons_features` SET `features_mask` =
+    has_apps << 46 |
+    has_packaged_apps << 45 |
+    has_pay << 44 |
+    has_activity << 43 |
+    has_light_events << 42 |
+    has_archive << 41 |
+    has_battery << 40 |
+    has_bluetooth << 39 |
+    has_contacts << 38 |
+    has_device_storage << 37 |
+    has_indexeddb << 36 |
+    has_geolocation << 35 |
+    has_idle << 34 |
+    has_network_info << 33 |
+    has_network_stats << 32 |
+    has_proximity << 31 |
+    has_push << 30 |
+    has_orientation << 29 |
+    has_time_clock << 28 |
+    has_vibrate << 27 |
+    has_fm << 26 |
+    has_sms << 25 |
+    has_touch << 24 |
+    has_qhd << 23 |
+    has_mp3 << 22 |
+    has_audio << 21 |
+    has_webaudio << 20 |
+    has_video_h264 << 19 |
+    has_video_webm << 18 |
+    has_fullscreen << 17 |
+    has_gamepad << 16 |
+    has_quota << 15 |
+    has_camera << 14 |
+    has_mic << 13 |
+    has_screen_capture << 12 |
+    has_webrtc_media << 11 |
+    has_webrtc_data << 10 |
+    has_webrtc_peer << 9 |
+    has_speech_syn << 8 |
+    has_speech_rec << 7 |
+    has_pointer_lock << 6 |
+    has_notification << 5 |
+    has_alarm << 4 |
+    has_systemxhr << 3 |
+    has_tcpsocket << 2 |
+    has_thirdparty_keyboard_support << 1 |
+    has_network_info_multiple << 0;
@@ -0,0 +1,3 @@
+INSERT INTO waffle_switch_mkt (name, active, created, modified, note)
+    VALUES ('reviewer-queue-stats', 0, NOW(), NOW(),
+            'Read the reviewer queue counts and progress from the cache.');
@@ -0,0 +1,3 @@
+INSERT INTO waffle_switch_mkt (name, active, created, modified, note)
+    VALUES ('api-response-cache', 0, NOW(), NOW(),
+            'Cache anonymous API responses server side.');
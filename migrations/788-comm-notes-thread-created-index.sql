@@ -0,0 +1 @@
+CREATE INDEX `comm_thread_notes_thread_created` ON `comm_thread_notes` (`thread_id`, `created`);
@@ -188,9 +188,17 @@ class ESTranslationSerializerField(TranslationSerializerField):
         if target_name is None:
             target_name = source_name
         target_key = '%s%s' % (target_name, cls.suffix)
+        setattr(obj, target_key, cls.get_translations(data, source_name))
+
+    @classmethod
+    def get_translations(cls, data, source_name):
+        """
+        Return a dict with all translations of `source_name` found in `data`,
+        like {'en-US': 'mytranslation'}.
+        """
         source_key = '%s%s' % (source_name, cls.suffix)
-        setattr(obj, target_key, dict((v.get('lang', ''), v.get('string', ''))
-                                      for v in data.get(source_key, {}) or {}))
+        return dict((v.get('lang', ''), v.get('string', ''))
+                    for v in data.get(source_key, {}) or {})
 
     def fetch_all_translations(self, obj, source, field):
         return field or None
@@ -9,9 +9,11 @@ from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
 from django.middleware.gzip import GZipMiddleware as BaseGZipMiddleware
 from django.middleware.transaction import TransactionMiddleware
+from django.http import HttpResponse
 from django.utils.cache import patch_vary_headers
 
 import commonware.log
+import waffle
 from django_statsd.clients import statsd
 from django_statsd.middleware import (GraphiteRequestTimingMiddleware,
                                       TastyPieRequestTimingMiddleware)
@@ -19,7 +21,9 @@ from multidb.pinning import (pin_this_thread, this_thread_is_pinned,
                              unpin_this_thread)
 from multidb.middleware import PinningRouterMiddleware
 
-from mkt.api.models import Access, ACCESS_TOKEN, Token
+from mkt.api.models import (ACCESS_TOKEN, api_responses_cache_key,
+                            api_responses_namespace, get_access_credentials,
+                            get_token_credentials, has_denied_group)
 from mkt.api.oauth import OAuthServer
 from mkt.carriers import get_carrier
 from users.models import UserProfile
@@ -74,10 +78,8 @@ class RestOAuthMiddleware(object):
                 log.error(u'Cannot find APIAccess token with that key: %s'
                           % oauth.attempted_key)
                 return
-            uid = Token.objects.filter(
-                token_type=ACCESS_TOKEN,
-                key=oauth_request.resource_owner_key).values_list(
-                    'user_id', flat=True)[0]
+            uid = get_token_credentials(
+                ACCESS_TOKEN, oauth_request.resource_owner_key)['user_id']
             request.amo_user = UserProfile.objects.select_related(
                 'user').get(pk=uid)
             request.user = request.amo_user
@@ -96,17 +98,14 @@ class RestOAuthMiddleware(object):
                 log.error(u'Cannot find APIAccess token with that key: %s'
                           % oauth.attempted_key)
                 return
-            uid = Access.objects.filter(
-                key=oauth_request.client_key).values_list(
-                    'user_id', flat=True)[0]
+            uid = get_access_credentials(
+                oauth_request.client_key)['user_id']
             request.amo_user = UserProfile.objects.select_related(
                 'user').get(pk=uid)
             request.user = request.amo_user
 
         # But you cannot have one of these roles.
-        denied_groups = set(['Admins'])
-        roles = set(request.amo_user.groups.values_list('name', flat=True))
-        if roles and roles.intersection(denied_groups):
+        if has_denied_group(uid):
             log.info(u'Attempt to use API with denied role, user: %s'
                      % request.amo_user.pk)
             # Set request attributes back to None.
@@ -315,6 +314,96 @@ class APIFilterMiddleware(object):
         return response
 
 
+class APIResponseCacheMiddleware(object):
+    """
+    Caches the responses of the anonymous GET API requests matching
+    settings.API_RESPONSE_CACHE, for everything the response can vary on:
+    the query string, region, carrier, language, devices and Accept header.
+
+    They are thrown away when apps, collections or categories change, see
+    invalidate_api_responses(), and the app detail ones only when their app
+    changes, see invalidate_app_api_responses(). Once a response is older
+    than its timeout or was invalidated, a single request rebuilds it while
+    the others keep getting the stale one.
+    """
+    lock_timeout = 30
+    app_detail = re.compile(r'^/api/(?:v\d+/)?(?:apps|fireplace)/app/'
+                            r'([^/]+)/$')
+
+    def _get_timeout(self, request):
+        for regexp, timeout in settings.API_RESPONSE_CACHE:
+            if re.match(regexp, request.path):
+                return timeout
+
+    def _is_cacheable(self, request):
+        user = getattr(request, 'user', None)
+        return (getattr(request, 'API', False) and
+                request.method == 'GET' and
+                not (user and user.is_authenticated()) and
+                not request.META.get('HTTP_AUTHORIZATION') and
+                '_user' not in request.GET and
+                'oauth_token' not in request.GET and
+                waffle.switch_is_active('api-response-cache'))
+
+    def get_cache_key(self, request):
+        devices = [d for d in ('GAIA', 'MOBILE', 'TABLET')
+                   if getattr(request, d, False)]
+        query = sorted((k.encode('utf8'), v.encode('utf8'))
+                       for k, values in request.GET.lists() for v in values)
+        key = u'\n'.join([request.path, urlencode(query),
+                           request.REGION.slug, get_carrier() or '',
+                           request.LANG, ','.join(devices),
+                           request.META.get('HTTP_ACCEPT', '')])
+        return api_responses_cache_key(
+            hashlib.md5(key.encode('utf8')).hexdigest())
+
+    def get_namespace(self, request):
+        match = self.app_detail.match(request.path)
+        return api_responses_namespace(match.group(1) if match else None)
+
+    def process_request(self, request):
+        if not self._is_cacheable(request):
+            return
+        timeout = self._get_timeout(request)
+        if not timeout:
+            return
+
+        key = self.get_cache_key(request)
+        namespace = self.get_namespace(request)
+        cached = cache.get(key)
+        if cached is not None:
+            cached_namespace, expires, cors, status, headers, content = cached
+            fresh = cached_namespace == namespace and expires > time.time()
+            if fresh or not cache.add(key + ':lock', 1, self.lock_timeout):
+                statsd.incr('api.cache.hit')
+                response = HttpResponse(content, status=status)
+                for header, value in headers:
+                    response[header] = value
+                if cors:
+                    request.CORS = cors
+                return response
+            statsd.incr('api.cache.stale')
+        else:
+            statsd.incr('api.cache.miss')
+        request._api_response_cache = (key, namespace, timeout)
+
+    def process_response(self, request, response):
+        key, namespace, timeout = getattr(request, '_api_response_cache',
+                                          (None, None, None))
+        if not key:
+            return response
+        if (response.status_code == 200 and
+                not response.streaming and not response.cookies):
+            # Stale responses are kept around for as long again, so that they
+            # can be served while they are rebuilt.
+            cache.set(key, (namespace, time.time() + timeout,
+                            getattr(request, 'CORS', None),
+                            response.status_code, response.items(),
+                            response.content), timeout * 2)
+        cache.delete(key + ':lock')
+        return response
+
+
 class TimingMiddleware(GraphiteRequestTimingMiddleware):
     """
     A wrapper around django_statsd timing middleware that sends different
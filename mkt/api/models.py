@@ -1,11 +1,17 @@
+import hashlib
 import os
 import time
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.dispatch import receiver
 
 from aesfield.field import AESField
 
+from access.models import GroupUser
 from amo.models import ModelBase
+from amo.utils import cache_ns_key
 from users.models import UserProfile
 
 
@@ -13,6 +19,9 @@ REQUEST_TOKEN = 0
 ACCESS_TOKEN = 1
 TOKEN_TYPES = ((REQUEST_TOKEN, u'Request'), (ACCESS_TOKEN, u'Access'))
 
+# Users in these groups can't use the API with OAuth.
+DENIED_GROUPS = set(['Admins'])
+
 
 class Access(ModelBase):
     key = models.CharField(max_length=255, unique=True)
@@ -64,3 +73,153 @@ class Nonce(ModelBase):
 
 def generate():
     return os.urandom(64).encode('hex')
+
+
+def _credentials_cache_key(*args):
+    key = u':'.join(map(unicode, args)).encode('utf8')
+    return 'api:oauth:%s' % hashlib.md5(key).hexdigest()
+
+
+# Cached for keys that don't match any credentials, so that looking up an
+# unknown key costs the same as looking up a known one.
+MISSING_CREDENTIALS = {'missing': True}
+
+
+def _cached_credentials(cache_key, lookup):
+    """
+    Returns the credentials cached under `cache_key`, calling `lookup()` to
+    fetch them on a miss. `lookup()` returns None if there aren't any, which
+    is cached as well.
+    """
+    creds = cache.get(cache_key)
+    if creds is None:
+        creds = lookup() or MISSING_CREDENTIALS
+        cache.set(cache_key, creds, settings.OAUTH_CREDENTIALS_CACHE_TIMEOUT)
+    if creds.get('missing'):
+        return None
+    return creds
+
+
+def get_access_credentials(key):
+    """
+    Returns a dict with the `id` and `user_id` of the Access with that key,
+    or None if there isn't any.
+
+    Credentials, or their absence, are cached until the Access changes. The
+    secret is left out since it's encrypted at rest.
+    """
+    def lookup():
+        try:
+            access = Access.objects.no_cache().get(key=key)
+        except Access.DoesNotExist:
+            return None
+        return {'id': access.id, 'user_id': access.user_id}
+
+    return _cached_credentials(_credentials_cache_key('access', key), lookup)
+
+
+def get_token_credentials(token_type, key):
+    """
+    Returns a dict with the `user_id` and `client_key` of the Token of that
+    type with that key, or None if there isn't any.
+
+    Credentials, or their absence, are cached until the Token changes. The
+    secret is left out, like the one of the Access.
+    """
+    def lookup():
+        try:
+            token = (Token.objects.no_cache().select_related('creds')
+                     .get(token_type=token_type, key=key))
+        except (Token.DoesNotExist, Token.MultipleObjectsReturned):
+            return None
+        return {'user_id': token.user_id, 'client_key': token.creds.key}
+
+    return _cached_credentials(
+        _credentials_cache_key('token', token_type, key), lookup)
+
+
+def has_denied_group(user_id):
+    """
+    Returns whether the user is in one of the DENIED_GROUPS.
+
+    Cached until the groups of the user change.
+    """
+    cache_key = _credentials_cache_key('denied', user_id)
+    denied = cache.get(cache_key)
+    if denied is None:
+        denied = (GroupUser.objects.filter(user=user_id,
+                                           group__name__in=DENIED_GROUPS)
+                  .exists())
+        cache.set(cache_key, denied, settings.OAUTH_CREDENTIALS_CACHE_TIMEOUT)
+    return denied
+
+
+@receiver(models.signals.post_save, sender=Access,
+          dispatch_uid='access_clear_credentials')
+@receiver(models.signals.post_delete, sender=Access,
+          dispatch_uid='access_delete_clear_credentials')
+def clear_access_credentials(sender, instance, **kw):
+    cache.delete(_credentials_cache_key('access', instance.key))
+
+
+@receiver(models.signals.post_save, sender=Token,
+          dispatch_uid='token_clear_credentials')
+@receiver(models.signals.post_delete, sender=Token,
+          dispatch_uid='token_delete_clear_credentials')
+def clear_token_credentials(sender, instance, **kw):
+    cache.delete(_credentials_cache_key('token', instance.token_type,
+                                        instance.key))
+
+
+@receiver(models.signals.post_save, sender=GroupUser,
+          dispatch_uid='groupuser_clear_credentials')
+@receiver(models.signals.post_delete, sender=GroupUser,
+          dispatch_uid='groupuser_delete_clear_credentials')
+def clear_denied_group(sender, instance, **kw):
+    cache.delete(_credentials_cache_key('denied', instance.user_id))
+
+
+# Namespace of the anonymous API responses cached by
+# APIResponseCacheMiddleware.
+API_RESPONSES_NAMESPACE = 'api:responses'
+
+
+def api_responses_cache_key(key):
+    """
+    Returns the cache key of an anonymous API response. It doesn't change when
+    the responses are invalidated, the namespace is stored with the response
+    instead so that it can be served stale while it's rebuilt.
+    """
+    return 'api:response:%s' % key
+
+
+def _app_namespace(app):
+    return '%s:app:%s' % (API_RESPONSES_NAMESPACE,
+                          hashlib.md5(unicode(app).encode('utf8')).hexdigest())
+
+
+def api_responses_namespace(app=None):
+    """
+    Returns the current namespace of the cached anonymous API responses, or of
+    the ones about a single app when `app` is its id or slug.
+    """
+    if app is None:
+        return cache_ns_key(API_RESPONSES_NAMESPACE)
+    return cache_ns_key(_app_namespace(app))
+
+
+def invalidate_api_responses(*args, **kw):
+    """
+    Throws away the cached anonymous API responses, except the ones about a
+    single app. Can be connected to signals directly.
+    """
+    cache_ns_key(API_RESPONSES_NAMESPACE, increment=True)
+
+
+def invalidate_app_api_responses(apps):
+    """
+    Throws away the cached anonymous API responses about the `apps`, given by
+    id or slug.
+    """
+    for app in apps:
+        cache_ns_key(_app_namespace(app), increment=True)
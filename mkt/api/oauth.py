@@ -1,6 +1,8 @@
+import hashlib
 import string
 from urllib import urlencode
 
+from django.core.cache import cache
 from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
@@ -11,7 +13,9 @@ from oauthlib.common import safe_string_equals
 
 from amo.decorators import login_required
 from amo.utils import urlparams
-from mkt.api.models import Access, Nonce, Token, REQUEST_TOKEN, ACCESS_TOKEN
+from mkt.api.models import (Access, get_access_credentials,
+                            get_token_credentials, Token, REQUEST_TOKEN,
+                            ACCESS_TOKEN)
 
 DUMMY_CLIENT_KEY = u'DummyOAuthClientKeyString'
 DUMMY_TOKEN = u'DummyOAuthToken'
@@ -31,15 +35,18 @@ class OAuthServer(oauth1.Server):
 
     def validate_client_key(self, key):
         self.attempted_key = key
-        return Access.objects.filter(key=key).exists()
+        return get_access_credentials(key) is not None
 
     def get_client_secret(self, key):
         # This method returns a dummy secret on failure so that auth
         # success and failure take a codepath with the same run time,
         # to prevent timing attacks.
+        # The secret is encrypted at rest, so it isn't cached with the rest of
+        # the credentials.
         try:
             # OAuthlib needs unicode objects, django-aesfield returns a string.
-            return Access.objects.get(key=key).secret.decode('utf8')
+            return (Access.objects.no_cache().get(key=key).secret
+                    .decode('utf8'))
         except Access.DoesNotExist:
             return DUMMY_SECRET
 
@@ -57,12 +64,14 @@ class OAuthServer(oauth1.Server):
 
     def validate_timestamp_and_nonce(self, client_key, timestamp, nonce,
                                      request_token=None, access_token=None):
-        n, created = Nonce.objects.safer_get_or_create(
-            defaults={'client_key': client_key},
-            nonce=nonce, timestamp=timestamp,
-            request_token=request_token,
-            access_token=access_token)
-        return created
+        # Requests older than `timestamp_lifetime` are rejected anyway, so
+        # nonces only need to be remembered for that long. `cache.add` fails
+        # if the nonce has already been seen.
+        key = u':'.join(map(unicode, (client_key, timestamp, nonce,
+                                      request_token, access_token)))
+        return cache.add(
+            'api:oauth:nonce:%s' % hashlib.md5(key.encode('utf8')).hexdigest(),
+            1, self.timestamp_lifetime + 60)
 
     def validate_requested_realm(self, client_key, realm):
         return True
@@ -84,9 +93,8 @@ class OAuthServer(oauth1.Server):
     def validate_access_token(self, client_key, access_token):
         # This method must take the same amount of time/db lookups for
         # success and failure to prevent timing attacks.
-        return Token.objects.filter(token_type=ACCESS_TOKEN,
-                                    creds__key=client_key,
-                                    key=access_token).exists()
+        creds = get_token_credentials(ACCESS_TOKEN, access_token)
+        return creds is not None and creds['client_key'] == client_key
 
     def validate_verifier(self, client_key, request_token, verifier):
         # This method must take the same amount of time/db lookups for
@@ -111,14 +119,14 @@ class OAuthServer(oauth1.Server):
     def get_access_token_secret(self, client_key, request_token):
         # This method must take the same amount of time/db lookups for
         # success and failure to prevent timing attacks.
+        # The secret isn't cached with the rest of the credentials.
         try:
-            t = Token.objects.get(key=request_token, creds__key=client_key,
-                                  token_type=ACCESS_TOKEN)
-        except Token.DoesNotExist:
+            return Token.objects.no_cache().get(
+                key=request_token, creds__key=client_key,
+                token_type=ACCESS_TOKEN).secret
+        except (Token.DoesNotExist, Token.MultipleObjectsReturned):
             return DUMMY_SECRET
 
-        return t.secret
-
 
 @csrf_exempt
 def access_request(request):
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from mock import Mock, patch
 from multidb.pinning import this_thread_is_pinned, unpin_this_thread
@@ -16,7 +18,7 @@ from users.models import UserProfile
 
 from mkt.api import authentication
 from mkt.api.middleware import RestOAuthMiddleware, RestSharedSecretMiddleware
-from mkt.api.models import Access, generate
+from mkt.api.models import Access, generate, get_access_credentials
 from mkt.api.tests.test_oauth import OAuthClient
 from mkt.site.fixtures import fixture
 from mkt.site.middleware import RedirectPrefixedURIMiddleware
@@ -73,6 +75,53 @@ class TestRestOAuthAuthentication(TestCase):
         self.add_group_user(self.profile, 'App Reviewers')
         ok_(self.auth.authenticate(Request(self.call())))
 
+    def test_credentials_cached(self):
+        self.call()
+        with CaptureQueriesContext(connection) as queries:
+            req = self.call()
+        eq_(self.auth.authenticate(Request(req)), (self.profile, None))
+        # Only the user and the secret, which isn't cached, can be fetched.
+        for query in queries.captured_queries:
+            ok_('users' in query['sql'] or 'api_access' in query['sql'],
+                query['sql'])
+            ok_('groups_users' not in query['sql'], query['sql'])
+
+    def test_secret_not_cached(self):
+        ok_(self.auth.authenticate(Request(self.call())))
+        eq_(get_access_credentials(self.access.key),
+            {'id': self.access.id, 'user_id': self.profile.id})
+
+    def test_missing_credentials_cached(self):
+        ok_(get_access_credentials('unknown_oauth_key') is None)
+        with self.assertNumQueries(0):
+            ok_(get_access_credentials('unknown_oauth_key') is None)
+        access = Access.objects.create(key='unknown_oauth_key',
+                                       secret=generate(), user=self.profile)
+        eq_(get_access_credentials('unknown_oauth_key'),
+            {'id': access.id, 'user_id': self.profile.id})
+
+    def test_request_admin_cached(self):
+        ok_(self.auth.authenticate(Request(self.call())))
+        self.add_group_user(self.profile, 'Admins')
+        ok_(not self.auth.authenticate(Request(self.call())))
+
+    def test_access_deleted(self):
+        ok_(self.auth.authenticate(Request(self.call())))
+        client = OAuthClient(self.access)
+        self.access.delete()
+        ok_(not self.auth.authenticate(Request(self.call(client=client))))
+
+    def test_nonce_replay(self):
+        client = OAuthClient(self.access)
+        url = absolutify('/api/whatever')
+        header = client.sign('POST', url)[1]['Authorization']
+        for valid in (True, False):
+            req = RequestFactory().post(url, HTTP_HOST='testserver',
+                                        HTTP_AUTHORIZATION=header)
+            for m in self.middlewares:
+                m().process_request(req)
+            eq_(bool(self.auth.authenticate(Request(req))), valid)
+
 
 class TestRestAnonymousAuthentication(TestCase):
 
@@ -1,6 +1,7 @@
 from urlparse import parse_qs
 
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
 from django.http import HttpResponse, HttpResponseServerError
 from django.test.utils import override_settings
@@ -12,8 +13,11 @@ from test_utils import RequestFactory
 
 import amo.tests
 from mkt.api.middleware import (APIFilterMiddleware, APIPinningMiddleware,
+                                APIResponseCacheMiddleware,
                                 APITransactionMiddleware, APIVersionMiddleware,
                                 CORSMiddleware, GZipMiddleware)
+from mkt.api.models import (invalidate_api_responses,
+                            invalidate_app_api_responses)
 import mkt.regions
 from mkt.site.middleware import RedirectPrefixedURIMiddleware
 
@@ -285,6 +289,123 @@ class TestFilterMiddleware(amo.tests.TestCase):
         self._header(response_cls=HttpResponseServerError)
 
 
+class TestAPIResponseCacheMiddleware(amo.tests.TestCase):
+
+    def setUp(self):
+        self.create_switch('api-response-cache')
+        self.middleware = APIResponseCacheMiddleware()
+        self.url = '/api/v1/apps/search/featured/'
+
+    def request(self, url=None, data=None, **kw):
+        request = RequestFactory().get(url or self.url, data or {}, **kw)
+        request.API = True
+        request.REGION = mkt.regions.US
+        request.LANG = 'en-US'
+        request.user = AnonymousUser()
+        return request
+
+    def cache_response(self, request, content='{"objects": []}', **kw):
+        ok_(self.middleware.process_request(request) is None)
+        return self.middleware.process_response(
+            request, HttpResponse(content, content_type='application/json',
+                                  **kw))
+
+    def test_hit(self):
+        req = self.request()
+        req.CORS = ['get']
+        self.cache_response(req)
+        req = self.request()
+        res = self.middleware.process_request(req)
+        eq_(res.content, '{"objects": []}')
+        eq_(res['Content-Type'], 'application/json')
+        eq_(req.CORS, ['get'])
+
+    def test_query_string_order(self):
+        self.cache_response(self.request(data={'q': 'foo', 'cat': 'games'}))
+        ok_(self.middleware.process_request(
+            self.request(self.url + '?cat=games&q=foo')))
+        eq_(self.middleware.process_request(
+            self.request(data={'q': 'bar', 'cat': 'games'})), None)
+
+    def test_varies(self):
+        self.cache_response(self.request())
+        req = self.request()
+        req.REGION = mkt.regions.BR
+        eq_(self.middleware.process_request(req), None)
+        req = self.request()
+        req.LANG = 'fr'
+        eq_(self.middleware.process_request(req), None)
+        req = self.request()
+        req.GAIA = True
+        eq_(self.middleware.process_request(req), None)
+
+    def test_switch(self):
+        self.create_switch('api-response-cache', active=False)
+        self.cache_response(self.request())
+        eq_(self.middleware.process_request(self.request()), None)
+
+    def test_not_cached(self):
+        self.cache_response(self.request(HTTP_AUTHORIZATION='mkt-shared'))
+        self.cache_response(self.request(data={'_user': 'foo'}))
+        eq_(self.middleware.process_request(self.request()), None)
+
+    def test_authenticated(self):
+        req = self.request()
+        req.user = mock.Mock()
+        req.user.is_authenticated.return_value = True
+        self.cache_response(req)
+        eq_(self.middleware.process_request(self.request()), None)
+
+    def test_not_200(self):
+        self.cache_response(self.request(), status=404)
+        eq_(self.middleware.process_request(self.request()), None)
+
+    def test_not_listed(self):
+        req = self.request('/api/v1/apps/app/')
+        self.cache_response(req)
+        eq_(getattr(req, '_api_response_cache', None), None)
+
+    def test_invalidate(self):
+        self.cache_response(self.request())
+        invalidate_api_responses()
+        # The first request rebuilds it, the others get the stale one.
+        eq_(self.middleware.process_request(self.request()), None)
+        ok_(self.middleware.process_request(self.request()))
+
+    def test_invalidate_rebuilt(self):
+        self.cache_response(self.request())
+        invalidate_api_responses()
+        self.cache_response(self.request(), content='{"objects": [1]}')
+        eq_(self.middleware.process_request(self.request()).content,
+            '{"objects": [1]}')
+
+    def test_invalidate_app(self):
+        detail = '/api/v1/apps/app/foo/'
+        self.cache_response(self.request())
+        self.cache_response(self.request(detail))
+        invalidate_app_api_responses(['bar'])
+        ok_(self.middleware.process_request(self.request(detail)))
+        invalidate_app_api_responses(['foo'])
+        eq_(self.middleware.process_request(self.request(detail)), None)
+        # The other responses aren't about a single app.
+        ok_(self.middleware.process_request(self.request()))
+
+    def test_invalidate_all_keeps_app(self):
+        detail = '/api/v1/apps/app/foo/'
+        self.cache_response(self.request(detail))
+        invalidate_api_responses()
+        ok_(self.middleware.process_request(self.request(detail)))
+
+    @mock.patch('mkt.api.middleware.time')
+    def test_stale(self, time):
+        time.time.return_value = 0
+        self.cache_response(self.request())
+        time.time.return_value = settings.CACHE_SEARCH_FEATURED_API_TIMEOUT + 1
+        # The first request rebuilds it, the others get the stale one.
+        eq_(self.middleware.process_request(self.request()), None)
+        ok_(self.middleware.process_request(self.request()))
+
+
 class TestGzipMiddleware(amo.tests.TestCase):
     @mock.patch('django.middleware.gzip.GZipMiddleware.process_response')
     def test_enabled_for_api(self, django_gzip_middleware):
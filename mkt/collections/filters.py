@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.core.cache import cache
 from django.core.validators import EMPTY_VALUES
 
 from django_filters.filters import ChoiceFilter, ModelChoiceFilter
@@ -8,7 +10,7 @@ import amo
 import mkt
 from addons.models import Category
 from mkt.api.forms import SluggableModelChoiceField
-from mkt.collections.models import Collection
+from mkt.collections.models import Collection, LOOKUP_CACHE_KEY
 
 
 class SlugChoiceFilter(ChoiceFilter):
@@ -185,3 +187,94 @@ class CollectionFilterSetWithFallback(CollectionFilterSet):
         self._qs = qs
         self._qs.filter_fallback = self.fields_to_null
         return self._qs
+
+
+def get_lookup():
+    """
+    Return a table of the public collections and of the app categories, used
+    by `filter_lookup()` to pick collections without querying the db. It's
+    cached, and cleared whenever a collection or a category changes.
+    """
+    lookup = cache.get(LOOKUP_CACHE_KEY)
+    if lookup is None:
+        lookup = {
+            'collections': list(Collection.public.values_list(
+                'id', 'collection_type', 'region', 'carrier', 'category')),
+            'categories': dict(Category.objects.filter(
+                type=amo.ADDON_WEBAPP).values_list('slug', 'id')),
+        }
+        cache.set(LOOKUP_CACHE_KEY, lookup,
+                  settings.COLLECTIONS_LOOKUP_CACHE_TIMEOUT)
+    return lookup
+
+
+class InvalidLookupFilter(Exception):
+    pass
+
+
+def _clean_lookup_filter(value, slugs, ids):
+    """
+    Return the id to filter on for `value`, a slug or an id, None to filter on
+    empty values, or raise InvalidLookupFilter.
+    """
+    if value in EMPTY_VALUES:
+        return None
+    elif value in slugs:
+        return slugs[value]
+    elif value in ids:
+        return ids[value]
+    raise InvalidLookupFilter(value)
+
+
+def filter_lookup(filters, collection_type=None, limit=1):
+    """
+    Pick collections from the table returned by `get_lookup()` the same way
+    CollectionFilterSetWithFallback filters them, including its fallbacks.
+
+    Return the ids of the collections and the fields that were set to NULL
+    to find them, or raise InvalidLookupFilter if one of the filters is
+    invalid, in which case the FilterSet should be used to report it.
+    """
+    lookup = get_lookup()
+    choices = {
+        'carrier': (dict((slug, c.id)
+                         for slug, c in mkt.carriers.CARRIER_MAP.items()),
+                    dict((unicode(c.id), c.id)
+                         for c in mkt.carriers.CARRIER_MAP.values())),
+        'region': (dict((slug, r.id)
+                        for slug, r in mkt.regions.REGION_LOOKUP.items()),
+                   dict((unicode(r.id), r.id)
+                        for r in mkt.regions.REGION_LOOKUP.values())),
+        'category': (lookup['categories'],
+                     dict((unicode(pk), pk)
+                          for pk in lookup['categories'].values())),
+    }
+    # The `cat` filter is named after the `category` field.
+    filters = dict(('category' if name == 'cat' else name, value)
+                   for name, value in filters.items()
+                   if name in ('carrier', 'region', 'cat'))
+    cleaned = dict((name, _clean_lookup_filter(value, *choices[name]))
+                   for name, value in filters.items())
+
+    fields = ('id', 'collection_type', 'region', 'carrier', 'category')
+    collections = [dict(zip(fields, row)) for row in lookup['collections']]
+    if collection_type is not None:
+        collections = [c for c in collections
+                       if c['collection_type'] == collection_type]
+
+    fallback = None
+    fallbacks = iter(CollectionFilterSetWithFallback.fields_fallback_order)
+    while True:
+        values = dict(cleaned)
+        for name in fallback or ():
+            if name in values:
+                values[name] = None
+        ids = [c['id'] for c in collections
+               if all(c[name] == value for name, value in values.items())]
+        if ids:
+            break
+        try:
+            fallback = next(fallbacks)
+        except StopIteration:
+            break
+    return ids[:limit], fallback
@@ -1,6 +1,7 @@
 import os
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 
 import amo.models
@@ -10,6 +11,7 @@ from addons.models import Addon, Category, clean_slug
 from amo.decorators import use_master
 from amo.models import SlugField
 from amo.utils import to_language
+from mkt.api.models import invalidate_api_responses
 from mkt.webapps.models import Webapp
 from mkt.webapps.tasks import index_webapps
 from translations.fields import PurifiedField, save_signal
@@ -19,6 +21,10 @@ from .fields import ColorField
 from .managers import PublicCollectionsManager
 
 
+# Cache key of the table built by `mkt.collections.filters.get_lookup()`.
+LOOKUP_CACHE_KEY = 'collections:lookup'
+
+
 class Collection(amo.models.ModelBase):
     # `collection_type` for rocketfuel, not transonic.
     collection_type = models.IntegerField(choices=COLLECTION_TYPES)
@@ -191,3 +197,25 @@ models.signals.pre_save.connect(save_signal, sender=Collection,
 # not Webapp, because that's the real model underneath).
 models.signals.post_delete.connect(remove_deleted_apps, sender=Addon,
                                    dispatch_uid='apps_collections_cleanup')
+
+
+def invalidate_lookup(*args, **kwargs):
+    cache.delete(LOOKUP_CACHE_KEY)
+
+
+# The table of public collections used to pick featured collections needs to
+# be rebuilt when collections or categories change.
+for sender in (Collection, Category):
+    models.signals.post_save.connect(invalidate_lookup, sender=sender,
+        dispatch_uid='collections_lookup_%s' % sender.__name__)
+    models.signals.post_delete.connect(invalidate_lookup, sender=sender,
+        dispatch_uid='collections_lookup_delete_%s' % sender.__name__)
+
+
+# The cached anonymous API responses list collections and categories.
+for sender in (Collection, CollectionMembership, Category):
+    models.signals.post_save.connect(invalidate_api_responses, sender=sender,
+        dispatch_uid='collections_api_responses_%s' % sender.__name__)
+    models.signals.post_delete.connect(invalidate_api_responses,
+        sender=sender,
+        dispatch_uid='collections_api_responses_delete_%s' % sender.__name__)
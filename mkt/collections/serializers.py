@@ -18,7 +18,8 @@ import mkt
 from addons.models import Category
 from mkt.api.fields import (SlugChoiceField, SlugModelChoiceField,
                             TranslationSerializerField)
-from mkt.features.utils import get_feature_profile
+from mkt.features.utils import (filter_apps_by_profile,
+                                filter_search_by_profile, get_feature_profile)
 from mkt.search.serializers import SimpleESAppSerializer
 from mkt.webapps.api import SimpleAppSerializer
 from mkt.webapps.models import Webapp
@@ -41,15 +42,17 @@ class CollectionMembershipField(serializers.RelatedField):
         'es': SimpleESAppSerializer,
         'normal': SimpleAppSerializer,
     }
+    # To work around elasticsearch default limit of 10, hardcode a higher
+    # limit.
+    apps_limit = 100
 
     def to_native(self, qs, use_es=False):
         if use_es:
             serializer_class = self.app_serializer_classes['es']
         else:
             serializer_class = self.app_serializer_classes['normal']
-        # To work around elasticsearch default limit of 10, hardcode a higher
-        # limit.
-        return serializer_class(qs[:100], context=self.context, many=True).data
+        return serializer_class(qs[:self.apps_limit], context=self.context,
+                                many=True).data
 
     def _get_device(self, request):
         # Fireplace sends `dev` and `device`. See the API docs. When
@@ -86,8 +89,7 @@ class CollectionMembershipField(serializers.RelatedField):
         if device and device != amo.DEVICE_DESKTOP:
             qs = qs.filter(addondevicetype__device_type=device.id)
         if profile:
-            qs = qs.filter(**profile.to_kwargs(
-                prefix='_current_version__features__has_'))
+            qs = filter_apps_by_profile(qs, profile)
 
         return self.to_native(qs)
 
@@ -99,6 +101,12 @@ class CollectionMembershipField(serializers.RelatedField):
         Relies on a FeaturedSearchView instance in self.context['view']
         to properly rehydrate results returned by ES.
         """
+        return self.to_native(self.get_es_queryset(obj, request), use_es=True)
+
+    def get_es_queryset(self, obj, request):
+        """
+        Return the ES query fetching the apps belonging to the collection.
+        """
         profile = get_feature_profile(request)
         region = self.context['view'].get_region_from_request(request)
         device = self._get_device(request)
@@ -109,9 +117,10 @@ class CollectionMembershipField(serializers.RelatedField):
         filters = {'collection.id': obj.pk}
         if device and device != amo.DEVICE_DESKTOP:
             filters['device'] = device.id
+        qs = qs.filter(**filters)
         if profile:
-            filters.update(**profile.to_kwargs(prefix='features.has_'))
-        qs = qs.filter(**filters).order_by({
+            qs = filter_search_by_profile(qs, profile)
+        return qs.order_by({
             'collection.order': {
                 'order': 'asc',
                 'nested_filter': {
@@ -120,8 +129,6 @@ class CollectionMembershipField(serializers.RelatedField):
             }
         })
 
-        return self.to_native(qs, use_es=True)
-
 
 class CollectionImageField(serializers.HyperlinkedRelatedField):
     read_only = True
@@ -9,7 +9,7 @@ from celeryutils import task
 from rest_framework import serializers
 from test_utils import RequestFactory
 
-from amo.utils import chunked, JSONEncoder
+from amo.utils import JSONEncoder
 from mkt.collections.models import Collection
 from mkt.collections.serializers import CollectionSerializer
 from mkt.constants.regions import RESTOFWORLD
@@ -74,8 +74,3 @@ def dump_collection(collection):
 def dump_collections(pks):
     return [dump_collection(collection)
             for collection in Collection.public.filter(pk__in=pks).iterator()]
-
-
-def dump_all_collections_tasks():
-    all_pks = Collection.public.values_list('pk', flat=True).order_by('pk')
-    return [dump_collections.si(pks) for pks in chunked(all_pks, 100)]
@@ -1,7 +1,9 @@
+import operator
 import os
+from collections import defaultdict
 
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
 
 import waffle
@@ -35,8 +37,9 @@ from mkt.api.authentication import (RestOAuthAuthentication,
 from mkt.api.base import CORSMixin, MarketplaceView, SilentListModelMixin
 from mkt.comm.models import (CommAttachment, CommunicationNote,
                              CommunicationNoteRead, CommunicationThread,
-                             CommunicationThreadCC, user_has_perm_app,
-                             user_has_perm_note, user_has_perm_thread)
+                             CommunicationThreadCC, NotePermissions,
+                             user_has_perm_app, user_has_perm_note,
+                             user_has_perm_thread)
 from mkt.comm.tasks import consume_email, mark_thread_read
 from mkt.comm.utils import (create_attachments, create_comm_note,
                             filter_notes_by_read_status)
@@ -70,6 +73,9 @@ class NoteSerializer(ModelSerializer):
     attachments = AttachmentSerializer(source='attachments', read_only=True)
 
     def is_read_by_user(self, obj):
+        if hasattr(obj, '_is_read'):
+            # Set by prefetch_threads().
+            return obj._is_read
         return obj.read_by_users.filter(
             pk=self.context['request'].amo_user.id).exists()
 
@@ -112,25 +118,127 @@ class ThreadSerializer(ModelSerializer):
         view_name = 'comm-thread-detail'
 
     def get_recent_notes(self, obj):
-        notes = (obj.notes.with_perms(self.get_request().amo_user, obj)
-                          .order_by('-created')[:5])
+        notes = getattr(obj, '_recent_notes', None)
+        if notes is None:
+            notes = (obj.notes.with_perms(self.get_request().amo_user, obj)
+                              .order_by('-created')[:5])
         return NoteSerializer(
             notes, many=True, context={'request': self.get_request()}).data
 
     def get_notes_count(self, obj):
+        if hasattr(obj, '_notes_count'):
+            return obj._notes_count
         return obj.notes.count()
 
-    def get_version_number(self, obj):
+    def _get_version(self, obj):
+        if hasattr(obj, '_version'):
+            return obj._version
         try:
-            return Version.with_deleted.get(id=obj.version_id).version
+            return Version.with_deleted.get(id=obj.version_id)
         except Version.DoesNotExist:
-            return ''
+            return None
+
+    def get_version_number(self, obj):
+        version = self._get_version(obj)
+        return version.version if version else ''
 
     def get_version_is_obsolete(self, obj):
-        try:
-            return Version.with_deleted.get(id=obj.version_id).deleted
-        except Version.DoesNotExist:
-            return True
+        version = self._get_version(obj)
+        return version.deleted if version else True
+
+
+# The `created` date of the note at a given offset, newest first, of the
+# thread: the notes at least that recent make up the window looked at.
+NOTES_CUTOFF_SQL = """
+    SELECT created FROM comm_thread_notes
+    WHERE comm_thread_notes.thread_id = comm_threads.id
+    ORDER BY created DESC LIMIT 1 OFFSET %s"""
+
+
+def prefetch_threads(threads, profile, notes_count=5):
+    """
+    Fetch what ThreadSerializer needs for all the `threads` at once: their
+    add-ons, versions, notes count and the `notes_count` most recent notes
+    `profile` can read, with their authors, attachments and read status.
+
+    Runs a constant number of queries, whatever the number of threads, unless
+    `profile` can't read most of the recent notes of some of them.
+    """
+    if not threads:
+        return
+    ids = [thread.id for thread in threads]
+
+    addons = dict((addon.id, addon) for addon in
+                  Addon.with_deleted.filter(
+                      id__in=set(thread.addon_id for thread in threads)))
+    versions = dict((version.id, version) for version in
+                    Version.with_deleted.filter(
+                        id__in=[thread.version_id for thread in threads
+                                if thread.version_id]))
+    counts = dict(CommunicationNote.objects.filter(thread__in=ids)
+                  .order_by().values_list('thread').annotate(Count('id')))
+
+    by_id = {}
+    for thread in threads:
+        if thread.addon_id in addons:
+            thread.addon = addons[thread.addon_id]
+        thread._version = versions.get(thread.version_id)
+        thread._notes_count = counts.get(thread.id, 0)
+        by_id[thread.id] = thread
+
+    # Only look at a window of the most recent notes of each thread, and
+    # widen it for the threads where `profile` can't read enough of them.
+    perms = NotePermissions(profile)
+    recent = defaultdict(list)
+    seen = set()
+    upper = {}
+    pending = ids
+    window = notes_count * 2
+    while pending:
+        cutoffs = list(
+            CommunicationThread.objects.filter(id__in=pending)
+            .extra(select={'cutoff': NOTES_CUTOFF_SQL},
+                   select_params=[window - 1])
+            .values_list('id', 'cutoff'))
+        conditions = []
+        for thread_id, cutoff in cutoffs:
+            condition = Q(thread=thread_id)
+            if cutoff is not None:
+                condition &= Q(created__gte=cutoff)
+            if thread_id in upper:
+                condition &= Q(created__lte=upper[thread_id])
+            upper[thread_id] = cutoff
+            conditions.append(condition)
+
+        for note in (CommunicationNote.objects
+                     .filter(reduce(operator.or_, conditions))
+                     .order_by('-created').iterator()):
+            if (note.id in seen or
+                    len(recent[note.thread_id]) >= notes_count):
+                continue
+            seen.add(note.id)
+            note.thread = by_id[note.thread_id]
+            if perms.has_perm(note):
+                recent[note.thread_id].append(note.id)
+
+        pending = [thread_id for thread_id, cutoff in cutoffs
+                   if cutoff is not None and
+                   len(recent[thread_id]) < notes_count]
+        window *= 2
+
+    note_ids = sum(recent.values(), [])
+    notes = dict((note.id, note) for note in
+                 CommunicationNote.objects.filter(id__in=note_ids)
+                 .select_related('author').prefetch_related('attachments'))
+    read = set(CommunicationNoteRead.objects
+               .filter(user=profile, note__in=note_ids)
+               .values_list('note', flat=True))
+    for note in notes.values():
+        note._is_read = note.id in read
+    for thread in threads:
+        thread._recent_notes = [notes[note_id]
+                                for note_id in recent[thread.id]
+                                if note_id in notes]
 
 
 class ThreadPermission(BasePermission):
@@ -265,7 +373,7 @@ class ThreadViewSet(SilentListModelMixin, RetrieveModelMixin,
         self.serializer_class = ThreadSerializer
         profile = request.amo_user
         # We list all the threads where the user has been CC'd.
-        cc = list(profile.comm_thread_cc.values_list('thread', flat=True))
+        cc = profile.comm_thread_cc.values('thread')
 
         # This gives 404 when an app with given slug/id is not found.
         data = {}
@@ -287,7 +395,7 @@ class ThreadViewSet(SilentListModelMixin, RetrieveModelMixin,
         else:
             # We list all the threads that user is developer of or
             # is subscribed/CC'ed to.
-            addons = list(profile.addons.values_list('pk', flat=True))
+            addons = profile.addons.values('pk')
             q_dev = Q(addon__in=addons, read_permission_developer=True)
             queryset = CommunicationThread.objects.filter(
                 Q(pk__in=cc) | q_dev)
@@ -299,6 +407,12 @@ class ThreadViewSet(SilentListModelMixin, RetrieveModelMixin,
 
         return res
 
+    def get_pagination_serializer(self, page):
+        # Serialize the whole page of threads in a few queries.
+        page.object_list = list(page.object_list)
+        prefetch_threads(page.object_list, self.request.amo_user)
+        return super(ThreadViewSet, self).get_pagination_serializer(page)
+
     def retrieve(self, *args, **kwargs):
         res = super(ThreadViewSet, self).retrieve(*args, **kwargs)
 
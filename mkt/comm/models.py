@@ -30,35 +30,44 @@ class CommunicationPermissionModel(amo.models.ModelBase):
         abstract = True
 
 
-def check_acls(user, obj, acl_type):
-    """Check ACLs."""
+# The group rules behind each ACL type, see check_acls().
+ACL_RULES = {
+    'admin': ('Admin', '%'),
+    'reviewer': ('Apps', 'Review'),
+    'senior_reviewer': ('Apps', 'ReviewEscalated'),
+}
+
+
+def check_acls(user, obj, acl_type, groups=None):
+    """
+    Check ACLs.
+
+    `groups` can be the groups of the user, to avoid looking them up again.
+    """
     if acl_type == 'moz_contact':
         try:
             return user.email in obj.addon.get_mozilla_contacts()
         except AttributeError:
             return user.email in obj.thread.addon.get_mozilla_contacts()
-    if acl_type == 'admin':
-        return acl.action_allowed_user(user, 'Admin', '%')
-    elif acl_type == 'reviewer':
-        return acl.action_allowed_user(user, 'Apps', 'Review')
-    elif acl_type == 'senior_reviewer':
-        return acl.action_allowed_user(user, 'Apps', 'ReviewEscalated')
-    else:
+    if acl_type not in ACL_RULES:
         raise Exception('Invalid ACL lookup.')
-    return False
+    app, action = ACL_RULES[acl_type]
+    if groups is None:
+        return acl.action_allowed_user(user, app, action)
+    return any(acl.match_rules(group.rules, app, action) for group in groups)
 
 
-def check_acls_comm_obj(obj, profile):
+def check_acls_comm_obj(obj, profile, groups=None):
     """Cross-reference ACLs and Note/Thread permissions."""
     if obj.read_permission_public:
         return True
 
     if (obj.read_permission_reviewer and
-        check_acls(profile, obj, 'reviewer')):
+        check_acls(profile, obj, 'reviewer', groups)):
         return True
 
     if (obj.read_permission_senior_reviewer and
-        check_acls(profile, obj, 'senior_reviewer')):
+        check_acls(profile, obj, 'senior_reviewer', groups)):
         return True
 
     if (obj.read_permission_mozilla_contact and
@@ -66,7 +75,7 @@ def check_acls_comm_obj(obj, profile):
         return True
 
     if (obj.read_permission_staff and
-        check_acls(profile, obj, 'admin')):
+        check_acls(profile, obj, 'admin', groups)):
         return True
 
     return False
@@ -122,16 +131,39 @@ def user_has_perm_note(note, profile):
     Moreover, other object permissions are also checked agaisnt the ACLs
     of the user.
     """
-    if note.author.id == profile.id:
-        # Let the dude access his own note.
-        return True
+    return NotePermissions(profile, lazy=True).has_perm(note)
 
-    # User is a developer of the add-on and has the permission to read.
-    user_is_author = profile.addons.filter(pk=note.thread.addon_id)
-    if note.read_permission_developer and user_is_author.exists():
-        return True
 
-    return check_acls_comm_obj(note, profile)
+class NotePermissions(object):
+    """
+    Checks user_has_perm_note() for many notes of the same user, looking up
+    the groups and the add-ons of the user only once.
+    """
+
+    def __init__(self, profile, lazy=False):
+        self.profile = profile
+        self.lazy = lazy
+        if not lazy:
+            self.addon_ids = set(profile.addons.values_list('pk', flat=True))
+            self.groups = list(profile.groups.all())
+
+    def is_developer(self, addon_id):
+        if self.lazy:
+            return self.profile.addons.filter(pk=addon_id).exists()
+        return addon_id in self.addon_ids
+
+    def has_perm(self, note):
+        if note.author_id == self.profile.id:
+            # Let the dude access his own note.
+            return True
+
+        # User is a developer of the add-on and has the permission to read.
+        if (note.read_permission_developer and
+            self.is_developer(note.thread.addon_id)):
+            return True
+
+        return check_acls_comm_obj(note, self.profile,
+                                   None if self.lazy else self.groups)
 
 
 class CommunicationThread(CommunicationPermissionModel):
@@ -175,8 +207,9 @@ models.signals.post_save.connect(
 class CommunicationNoteManager(models.Manager):
 
     def with_perms(self, profile, thread):
-        ids = [note.id for note in self.filter(thread=thread) if
-               user_has_perm_note(note, profile)]
+        perms = NotePermissions(profile)
+        notes = self.filter(thread=thread).select_related('thread__addon')
+        ids = [note.id for note in notes if perms.has_perm(note)]
         return self.filter(id__in=ids)
 
 
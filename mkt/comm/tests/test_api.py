@@ -1,11 +1,13 @@
 import json
 import os
+from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core import mail
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test.client import MULTIPART_CONTENT
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 
 import mock
 from nose.exc import SkipTest
@@ -237,7 +239,7 @@ class TestThreadDetail(RestOAuth, CommTestMixin):
 
 
 class TestThreadList(RestOAuth, CommTestMixin):
-    fixtures = fixture('webapp_337141', 'user_2519')
+    fixtures = fixture('webapp_337141', 'user_2519', 'user_support_staff')
 
     def setUp(self):
         super(TestThreadList, self).setUp()
@@ -294,6 +296,55 @@ class TestThreadList(RestOAuth, CommTestMixin):
             [{'id': thread2.id, 'version__version': version2.version},
              {'id': thread1.id, 'version__version': version1.version}])
 
+    def test_thread_data(self):
+        version = version_factory(addon=self.addon, version='7.12')
+        thread = self._thread_factory(note=True, version=version)
+        note = self._note_factory(thread, body='newest')
+        note.mark_read(self.profile)
+        version.delete()
+
+        res = self.client.get(self.list_url)
+        eq_(res.status_code, 200)
+        data = res.json['objects'][0]
+        eq_(data['notes_count'], 2)
+        eq_(data['version_number'], '7.12')
+        eq_(data['version_is_obsolete'], True)
+        eq_(data['addon_meta']['app_slug'], self.addon.app_slug)
+        eq_(dict((n['body'], n['is_read']) for n in data['recent_notes']),
+            {'newest': True, 'something': False})
+
+    def test_recent_notes_past_window(self):
+        thread = self._thread_factory(note=True)
+        now = datetime.now()
+        thread.notes.update(created=now - timedelta(days=30))
+        staff = UserProfile.objects.get(username='support_staff')
+        for day in range(20):
+            note = self._note_factory(
+                thread, no_perms=['developer'], author=staff)
+            note.update(created=now - timedelta(days=day))
+
+        res = self.client.get(self.list_url)
+        eq_(res.status_code, 200)
+        data = res.json['objects'][0]
+        eq_(data['notes_count'], 21)
+        eq_([note['author'] for note in data['recent_notes']],
+            [self.profile.id])
+
+    def test_queries_per_page(self):
+        self._thread_factory(note=True)
+        self.client.get(self.list_url)
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(self.list_url)
+
+        for version in ('1.1', '1.2', '1.3'):
+            self._thread_factory(
+                note=True, version=version_factory(addon=self.addon,
+                                                   version=version))
+        with CaptureQueriesContext(connection) as more:
+            res = self.client.get(self.list_url)
+        eq_(len(res.json['objects']), 4)
+        ok_(len(more) <= len(one))
+
     def test_create(self):
         self.create_switch('comm-dashboard')
         version_factory(addon=self.addon, version='1.1')
@@ -13,8 +13,7 @@ from email_reply_parser import EmailReplyParser
 from access.models import Group
 from users.models import UserProfile
 
-from mkt.comm.models import (CommunicationNoteRead, CommunicationThreadToken,
-                             user_has_perm_thread)
+from mkt.comm.models import CommunicationThreadToken, user_has_perm_thread
 from mkt.constants import comm
 
 
@@ -96,16 +95,12 @@ def filter_notes_by_read_status(queryset, profile, read_status=True):
 
     `read_status` = `True` for read notes, `False` for unread notes.
     """
-    # Get some read notes from db.
-    notes = list(CommunicationNoteRead.objects.filter(
-        user=profile).values_list('note', flat=True))
-
     if read_status:
-        # Filter and return read notes if they exist.
-        return queryset.filter(pk__in=notes) if notes else queryset.none()
+        # Join on the reads of the user.
+        return queryset.filter(reads_set__user=profile).distinct()
     else:
-        # Exclude read notes if they exist.
-        return queryset.exclude(pk__in=notes) if notes else queryset.all()
+        # Leave out the notes the user read, in the database.
+        return queryset.exclude(reads_set__user=profile)
 
 
 def get_reply_token(thread, user_id):
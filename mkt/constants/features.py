@@ -374,6 +374,26 @@ class FeatureProfile(OrderedDict):
             features |= bool(v) << i
         return features
 
+    def to_bits(self):
+        """
+        Returns the positions of the true values of this profile in its
+        integer bitfield.
+
+        >>> FeatureProfile.from_int(0x42).to_bits()
+        [1, 6]
+        """
+        features = self.to_int()
+        return [i for i in range(len(self)) if features & 1 << i]
+
+    def unsupported(self):
+        """
+        Returns a FeatureProfile with the features this profile is lacking.
+
+        Apps requiring any of them can't be used by this profile, so the
+        bitfield and bits of this FeatureProfile are what we filter apps on.
+        """
+        return self.from_int(~self.to_int() & ((1 << len(self)) - 1))
+
     def to_signature(self):
         """
         Convert a FeatureProfile object to its decimal signature.
@@ -61,3 +61,15 @@ class TestFeatureProfile(amo.tests.TestCase):
     def test_to_kwargs(self):
         self._test_kwargs('')
         self._test_kwargs('prefix_')
+
+    def test_to_bits(self):
+        profile = FeatureProfile.from_int(self.features)
+        eq_(profile.to_bits(), [25, 29, 40, 44])
+        eq_(sum(1 << bit for bit in profile.to_bits()), self.features)
+
+    def test_unsupported(self):
+        profile = FeatureProfile.from_int(self.features).unsupported()
+        eq_(profile.to_int(), ~self.features & (1 << 45) - 1)
+        eq_(len(profile.to_bits()), len(APP_FEATURES) - len(self.truths))
+        for k, v in profile.iteritems():
+            eq_(v, k not in self.truths)
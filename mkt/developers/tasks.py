@@ -11,6 +11,7 @@ import traceback
 import urlparse
 import uuid
 import zipfile
+from cStringIO import StringIO
 from datetime import date
 
 from django import forms
@@ -30,7 +31,8 @@ import amo
 from addons.models import Addon
 from amo.decorators import set_modified_on, write
 from amo.helpers import absolutify
-from amo.utils import remove_icons, resize_image, send_mail_jinja, strip_bom
+from amo.utils import (open_image, remove_icons, save_resized_images,
+                       send_mail_jinja, strip_bom)
 from files.models import FileUpload, File, FileValidation
 from files.utils import SafeUnzip
 
@@ -137,19 +139,20 @@ def resize_icon(src, dst, sizes, locally=False, **kw):
     """Resizes addon icons."""
     log.info('[1@None] Resizing icon: %s' % dst)
     try:
-        for s in sizes:
-            size_dst = '%s-%s.png' % (dst, s)
-            resize_image(src, size_dst, (s, s),
-                         remove_src=False, locally=locally)
-            pngcrush_image.delay(size_dst, **kw)
+        # Read the source once to both hash it and decode it.
+        open_ = open if locally else storage.open
+        with open_(src, 'rb') as fd:
+            data = fd.read()
+        icon_hash = _hash_file(StringIO(data))
+        im = Image.open(StringIO(data)).convert('RGBA')
+
+        dsts = [('%s-%s.png' % (dst, s), (s, s)) for s in sizes]
+        save_resized_images(im, dsts, locally=locally)
+        pngcrush_images.delay([size_dst for size_dst, size in dsts], **kw)
 
         if locally:
-            with open(src) as fd:
-                icon_hash = _hash_file(fd)
             os.remove(src)
         else:
-            with storage.open(src) as fd:
-                icon_hash = _hash_file(fd)
             storage.delete(src)
 
         log.info('Icon resizing completed for: %s' % dst)
@@ -158,35 +161,62 @@ def resize_icon(src, dst, sizes, locally=False, **kw):
         log.error("Error saving addon icon: %s; %s" % (e, dst))
 
 
+def _pngcrush(srcs):
+    """
+    Optimizes PNG images by running them through a single Pngcrush process.
+    Returns whether it succeeded.
+    """
+    # pngcrush -ow has some issues, use temporary files and do the final
+    # renaming ourselves.
+    suffix = '.opti.png'
+    cmd = [settings.PNGCRUSH_BIN, '-q', '-rem', 'alla', '-reduce']
+    if settings.PNGCRUSH_BRUTE:
+        cmd.append('-brute')
+    cmd.extend(['-e', suffix] + list(srcs))
+    sp = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = sp.communicate()
+
+    if sp.returncode != 0:
+        log.error('Error optimizing images: %s; %s' % (', '.join(srcs),
+                                                        stderr.strip()))
+        return False
+
+    for src in srcs:
+        shutil.move('%s%s' % (os.path.splitext(src)[0], suffix), src)
+    return True
+
+
 @task
 @set_modified_on
 def pngcrush_image(src, **kw):
     """Optimizes a PNG image by running it through Pngcrush."""
     log.info('[1@None] Optimizing image: %s' % src)
     try:
-        # pngcrush -ow has some issues, use a temporary file and do the final
-        # renaming ourselves.
-        suffix = '.opti.png'
-        tmp_path = '%s%s' % (os.path.splitext(src)[0], suffix)
-        cmd = [settings.PNGCRUSH_BIN, '-q', '-rem', 'alla', '-brute',
-               '-reduce', '-e', suffix, src]
-        sp = subprocess.Popen(cmd, stdin=subprocess.PIPE,
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = sp.communicate()
-
-        if sp.returncode != 0:
-            log.error('Error optimizing image: %s; %s' % (src,
-                                                               stderr.strip()))
+        if not _pngcrush([src]):
             pngcrush_image.retry(args=[src], kwargs=kw, max_retries=3)
             return False
-
-        shutil.move(tmp_path, src)
         log.info('Image optimization completed for: %s' % src)
         return True
     except Exception, e:
         log.error('Error optimizing image: %s; %s' % (src, e))
 
 
+@task
+@set_modified_on
+def pngcrush_images(srcs, **kw):
+    """Optimizes PNG images in a single job, see `pngcrush_image`."""
+    log.info('[%s@None] Optimizing images: %s' % (len(srcs), srcs[0]))
+    try:
+        if not _pngcrush(srcs):
+            pngcrush_images.retry(args=[srcs], kwargs=kw, max_retries=3)
+            return False
+        log.info('Images optimization completed for: %s' % ', '.join(srcs))
+        return True
+    except Exception, e:
+        log.error('Error optimizing images: %s; %s' % (', '.join(srcs), e))
+
+
 @task
 @set_modified_on
 def resize_preview(src, instance, **kw):
@@ -197,23 +227,24 @@ def resize_preview(src, instance, **kw):
     try:
         thumbnail_size = APP_PREVIEW_SIZES[0][:2]
         image_size = APP_PREVIEW_SIZES[1][:2]
-        with storage.open(src, 'rb') as fp:
-            size = Image.open(fp).size
-        if size[0] > size[1]:
+        im = open_image(src)
+        if im.size[0] > im.size[1]:
             # If the image is wider than tall, then reverse the wanted size
             # to keep the original aspect ratio while still resizing to
             # the correct dimensions.
             thumbnail_size = thumbnail_size[::-1]
             image_size = image_size[::-1]
 
+        # Both sizes are derived from the image we decoded.
+        dsts = []
         if kw.get('generate_thumbnail', True):
-            sizes['thumbnail'] = resize_image(src, thumb_dst,
-                                              thumbnail_size,
-                                              remove_src=False)
+            dsts.append(('thumbnail', thumb_dst, thumbnail_size))
         if kw.get('generate_image', True):
-            sizes['image'] = resize_image(src, full_dst,
-                                          image_size,
-                                          remove_src=False)
+            dsts.append(('image', full_dst, image_size))
+        resized = save_resized_images(im, [(dst, size) for name, dst, size
+                                           in dsts])
+        for (name, dst, size), resized_size in zip(dsts, resized):
+            sizes[name] = resized_size
         instance.sizes = sizes
         instance.save()
         log.info('Preview resized to: %s' % thumb_dst)
@@ -245,10 +276,15 @@ def get_preview_sizes(ids, **kw):
                           % (addon.pk, err))
 
 
-def _fetch_content(url):
+def _fetch_content(url, headers=None):
     with statsd.timer('developers.tasks.fetch_content'):
         try:
-            res = requests.get(url, timeout=30, stream=True)
+            res = requests.get(url, timeout=30, stream=True, headers=headers)
+
+            if res.status_code == 304 and headers:
+                # Only conditional requests can get a "Not Modified".
+                statsd.incr('developers.tasks.fetch_content.not_modified')
+                return res
 
             if not 200 <= res.status_code < 300:
                 statsd.incr('developers.tasks.fetch_content.error')
@@ -270,6 +306,10 @@ class ResponseTooLargeException(Exception):
     pass
 
 
+class ManifestNotModified(Exception):
+    pass
+
+
 def get_content_and_check_size(response, max_size):
     # Read one extra byte. Reject if it's too big so we don't have issues
     # downloading huge files.
@@ -375,7 +415,15 @@ def failed_validation(*messages, **kwargs):
                        'prelim': True})
 
 
-def _fetch_manifest(url, upload=None):
+def _fetch_manifest(url, upload=None, validators=None):
+    """
+    Fetch the manifest at `url` and return its content.
+
+    If a `validators` dict is given, its 'etag' and 'last-modified' values are
+    sent as a conditional request and replaced by the ones of the response.
+    ManifestNotModified is raised if the server answers that the manifest
+    did not change.
+    """
     def fail(message, upload=None):
         if upload is None:
             # If `upload` is None, that means we're using one of @washort's old
@@ -383,14 +431,29 @@ def _fetch_manifest(url, upload=None):
             raise Exception(message)
         upload.update(validation=failed_validation(message, upload=upload))
 
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last-modified'):
+            headers['If-Modified-Since'] = validators['last-modified']
+
     try:
-        response = _fetch_content(url)
+        response = _fetch_content(url, headers=headers or None)
     except Exception, e:
         log.error('Failed to fetch manifest from %r: %s' % (url, e))
         fail(_('No manifest was found at that URL. Check the address and try '
                'again.'), upload=upload)
         return
 
+    if response.status_code == 304:
+        raise ManifestNotModified()
+    if validators is not None:
+        validators.clear()
+        for header in ('etag', 'last-modified'):
+            if response.headers.get(header):
+                validators[header] = response.headers[header]
+
     ct = response.headers.get('content-type', '')
     if not ct.startswith('application/x-web-app-manifest+json'):
         fail(_('Manifests must be served with the HTTP header '
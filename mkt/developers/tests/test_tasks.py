@@ -134,6 +134,37 @@ class TestPngcrushImage(amo.tests.TestCase):
         eq_(ImageChops.difference(crushed_image, orig_image).getbbox(), None)
         os.remove(src_crushed.name)
 
+    @mock.patch('mkt.developers.tasks.subprocess.Popen')
+    def test_pngcrush_images_single_process(self, popen):
+        popen.return_value.communicate.return_value = ('', '')
+        popen.return_value.returncode = 0
+        dsts = []
+        for i in range(2):
+            dst = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
+            shutil.copyfile(self.src.name, '%s.opti.png'
+                                           % os.path.splitext(dst.name)[0])
+            dsts.append(dst.name)
+
+        eq_(tasks.pngcrush_images(dsts), True)
+        eq_(popen.call_count, 1)
+        cmd = popen.call_args[0][0]
+        eq_(cmd[-2:], dsts)
+        assert '-brute' not in cmd
+        for dst in dsts:
+            eq_(os.path.getsize(dst), os.path.getsize(self.src.name))
+            os.remove(dst)
+
+    @mock.patch('mkt.developers.tasks.pngcrush_images.delay')
+    def test_resize_icon_crushes_once(self, pngcrush_images):
+        src = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
+        shutil.copyfile(self.src.name, src.name)
+        dst = os.path.join(settings.ADDON_ICONS_PATH, '1234')
+        tasks.resize_icon(src.name, dst, [32, 64], locally=True)
+        pngcrush_images.assert_called_once_with(['%s-32.png' % dst,
+                                                 '%s-64.png' % dst])
+        for size in (32, 64):
+            os.remove('%s-%s.png' % (dst, size))
+
 
 class TestValidator(amo.tests.TestCase):
 
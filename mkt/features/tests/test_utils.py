@@ -0,0 +1,34 @@
+from nose.tools import eq_, ok_
+
+import amo.tests
+
+from mkt.constants.features import APP_FEATURES, FeatureProfile
+from mkt.features.utils import filter_apps_by_profile
+from mkt.webapps.models import AppFeatures, Webapp
+
+
+class TestFilterAppsByProfile(amo.tests.TestCase):
+
+    def setUp(self):
+        self.app = amo.tests.app_factory()
+        self.app.current_version.features.update(has_sms=True)
+        self.no_features = amo.tests.app_factory()
+        AppFeatures.objects.filter(
+            version=self.no_features.current_version).delete()
+
+    def filter(self, profile):
+        qs = Webapp.objects.filter(pk__in=[self.app.pk, self.no_features.pk])
+        return sorted(filter_apps_by_profile(qs, profile)
+                      .values_list('pk', flat=True))
+
+    def test_supported(self):
+        eq_(self.filter(FeatureProfile(sms=True)),
+            sorted([self.app.pk, self.no_features.pk]))
+
+    def test_unsupported(self):
+        eq_(self.filter(FeatureProfile()), [self.no_features.pk])
+
+    def test_everything_supported(self):
+        profile = FeatureProfile.from_int((1 << len(APP_FEATURES)) - 1)
+        qs = Webapp.objects.all()
+        ok_(filter_apps_by_profile(qs, profile) is qs)
@@ -1,3 +1,5 @@
+from elasticutils.contrib.django import F
+
 from mkt.constants.features import FeatureProfile
 
 
@@ -11,3 +13,33 @@ def get_feature_profile(request):
             except ValueError:
                 pass
     return profile
+
+
+def filter_apps_by_profile(qs, profile):
+    """
+    Exclude the apps of the Webapp queryset `qs` whose current version
+    requires features `profile` doesn't support. This is a single bitwise
+    check on the features mask, instead of one condition per feature.
+
+    Apps without features, or without a current version, require nothing.
+    """
+    unsupported = profile.unsupported().to_int()
+    if not unsupported:
+        return qs
+    return qs.extra(
+        where=['COALESCE((SELECT features_mask FROM addons_features '
+               'WHERE addons_features.version_id = addons.current_version), '
+               '0) & %s = 0'],
+        params=[unsupported])
+
+
+def filter_search_by_profile(qs, profile):
+    """
+    Exclude the apps of the WebappIndexer search `qs` that require features
+    `profile` doesn't support. This is a single terms filter on the required
+    features, which ES caches for every search made with that profile.
+    """
+    unsupported = profile.unsupported().to_bits()
+    if not unsupported:
+        return qs
+    return qs.filter(~F(required_features__in=unsupported))
@@ -3,6 +3,7 @@ from access.acl import check_ownership
 
 from lib.metrics import record_action
 from mkt.constants.apps import INSTALL_TYPE_DEVELOPER, INSTALL_TYPE_USER
+from mkt.monolith.buffer import events
 
 
 def install_type(request, app):
@@ -13,7 +14,7 @@ def install_type(request, app):
 
 
 def record(request, app):
-    amo.log(amo.LOG.INSTALL_ADDON, app)
+    events.add_log(amo.LOG.INSTALL_ADDON, app, user=amo.get_user())
     domain = app.domain_from_url(app.origin, allow_none=True)
     record_action('install', request, {
         'app-domain': domain,
@@ -0,0 +1,157 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections
+
+import commonware.log
+from django_statsd.clients import statsd
+
+import amo
+
+
+log = commonware.log.getLogger('z.monolith')
+
+
+class EventBuffer(object):
+    """
+    Events held in memory and written to the database by a background thread,
+    at most MONOLITH_BUFFER_INTERVAL seconds after they were added, or as soon
+    as MONOLITH_BUFFER_SIZE events are waiting.
+
+    Events are either unsaved model instances, inserted with one multi-row
+    INSERT per model, or calls for writes that can't be done that way.
+
+    Delivery is at least once: the events of a flush that failed are put back
+    in the buffer for the next one, up to MONOLITH_BUFFER_MAX_SIZE events, and
+    the buffer is flushed when the process exits. With a 0 interval, events
+    are written right away.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        # Only one flush at a time, so that events are written in order.
+        self.flush_lock = threading.Lock()
+        self.timer = None
+        self.last_flush = time.time()
+
+    @property
+    def interval(self):
+        return getattr(settings, 'MONOLITH_BUFFER_INTERVAL', 0)
+
+    @property
+    def size(self):
+        return getattr(settings, 'MONOLITH_BUFFER_SIZE', 100)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'MONOLITH_BUFFER_MAX_SIZE', 10000)
+
+    def add_record(self, record):
+        """Add an unsaved model instance."""
+        if not self.interval:
+            record.save()
+        else:
+            self._append(('record', record))
+
+    def add_call(self, func, *args, **kw):
+        """Add a call to `func(*args, **kw)`."""
+        if not self.interval:
+            func(*args, **kw)
+        else:
+            self._append(('call', (func, args, kw)))
+
+    def add_log(self, action, *args, **kw):
+        """
+        Add an `amo.log(action, *args, **kw)` call. Buffered calls run later,
+        so they keep the time they were added as `created`. That costs
+        amo.log() a second save, which calls run right away don't need.
+        """
+        if self.interval:
+            kw.setdefault('created', datetime.now())
+        self.add_call(amo.log, action, *args, **kw)
+
+    def _append(self, event):
+        with self.lock:
+            self.events.append(event)
+            statsd.gauge('monolith.buffer.size', len(self.events))
+            if len(self.events) >= self.size:
+                self._start(0)
+            elif self.timer is None:
+                self._start(self.interval)
+
+    def _start(self, delay):
+        # The lock is held by the caller.
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = threading.Timer(delay, self._flush_thread)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self):
+        """Write all the events waiting in the buffer."""
+        with self.flush_lock:
+            with self.lock:
+                events, self.events = self.events, []
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+            if not events:
+                return
+            count = len(events)
+            now = time.time()
+            statsd.timing('monolith.buffer.interval',
+                          int((now - self.last_flush) * 1000))
+            self.last_flush = now
+            try:
+                with statsd.timer('monolith.buffer.flush'):
+                    self._write(events)
+            except Exception:
+                log.exception('Failed to write %s of %s buffered events, '
+                              'retrying later.' % (len(events), count))
+                statsd.incr('monolith.buffer.flush.error')
+                with self.lock:
+                    self.events[:0] = events
+                    # Don't let an outage grow the buffer without bound, the
+                    # oldest events are dropped first.
+                    dropped = len(self.events) - self.max_size
+                    if dropped > 0:
+                        del self.events[:dropped]
+                        log.error('Dropped %s buffered events.' % dropped)
+                        statsd.incr('monolith.buffer.dropped', dropped)
+                    if self.timer is None:
+                        self._start(self.interval)
+                return
+            statsd.incr('monolith.buffer.flushed', count)
+
+    def _write(self, events):
+        """Write the events, removing them from `events` once written."""
+        records = defaultdict(list)
+        for type_, event in events:
+            if type_ == 'record':
+                records[event.__class__].append(event)
+        for model, instances in records.items():
+            model.objects.bulk_create(instances)
+            written = set(map(id, instances))
+            events[:] = [e for e in events if id(e[1]) not in written]
+        # Only the calls are left.
+        while events:
+            func, args, kw = events[0][1]
+            func(*args, **kw)
+            events.pop(0)
+
+    def _flush_thread(self):
+        try:
+            self.flush()
+        finally:
+            # The connections of this thread won't be used again.
+            for connection in connections.all():
+                connection.close()
+
+
+events = EventBuffer()
+atexit.register(events.flush)
@@ -4,6 +4,8 @@ import json
 
 from django.db import models
 
+from mkt.monolith.buffer import events
+
 
 class MonolithRecord(models.Model):
     """Data stored temporarily for monolith.
@@ -57,5 +59,6 @@ def record_stat(key, request, **data):
 
     record = MonolithRecord(key=key, user_hash=get_user_hash(request),
                             recorded=recorded, value=json.dumps(data))
-    record.save()
+    # The record is inserted along with others when buffering is enabled.
+    events.add_record(record)
     return record
@@ -1,8 +1,9 @@
 import datetime
 import json
 import logging
+from collections import defaultdict
 
-from django.db.models import Avg, Count
+from django.db.models import Count, Sum
 from rest_framework import serializers, status
 from rest_framework.exceptions import ParseError
 from rest_framework.generics import ListAPIView
@@ -25,35 +26,32 @@ log = logging.getLogger('z.monolith')
 
 # TODO: Move the stats that can be calculated on the fly from
 # apps/stats/tasks.py here.
+#
+# Objects of 'qs' are counted by day and by app. 'slice' stats return the
+# count of each day, 'total' stats the count from the beginning of time to the
+# end of each day. If 'average' is set, the average of this field is returned
+# instead of the count.
 STATS = {
     'apps_ratings': {
         'qs': Review.objects
-            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP)
-            .values('addon')
-            .annotate(count=Count('addon')),
+            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP),
         'type': 'slice',
         'field_map': {
-            'count': 'count',
             'app-id': 'addon'},
     },
     'apps_average_rating': {
         'qs': Review.objects
-            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP)
-            .values('addon')
-            .annotate(avg=Avg('rating')),
+            .filter(editorreview=0, addon__type=amo.ADDON_WEBAPP),
         'type': 'total',
+        'average': 'rating',
         'field_map': {
-            'count': 'avg',
             'app-id': 'addon'},
     },
     'apps_abuse_reports': {
         'qs': AbuseReport.objects
-            .filter(addon__type=amo.ADDON_WEBAPP)
-            .values('addon')
-            .annotate(count=Count('addon')),
+            .filter(addon__type=amo.ADDON_WEBAPP),
         'type': 'slice',
         'field_map': {
-            'count': 'count',
             'app-id': 'addon'},
     }
 }
@@ -75,12 +73,60 @@ class MonolithSerializer(serializers.ModelSerializer):
         return json.loads(value)
 
 
+def _aggregate(stat, qs, *fields):
+    """Returns the count, and the sum of the averaged field, grouped by
+    `fields`."""
+    annotations = {'count': Count('pk')}
+    if 'average' in stat:
+        annotations['total'] = Sum(stat['average'])
+    return qs.values(*fields).annotate(**annotations).order_by()
+
+
+def _iter_query_result(key, stat, start, end):
+    app_field = stat['field_map']['app-id']
+    qs = stat['qs']
+
+    # The counts of each app, up to the day being yielded.
+    totals = defaultdict(lambda: [0, 0])
+    if stat['type'] == 'total':
+        for row in _aggregate(stat, qs.filter(created__lt=start), app_field):
+            totals[row[app_field]] = [row['count'], row.get('total') or 0]
+
+    days = defaultdict(list)
+    day_select = 'DATE(%s.created)' % qs.model._meta.db_table
+    daily = (qs.filter(created__gte=start, created__lt=end)
+               .extra(select={'day': day_select}))
+    for row in _aggregate(stat, daily, 'day', app_field):
+        days[row['day']].append(row)
+
+    for day in daterange(start, end):
+        if stat['type'] == 'total':
+            for row in days.get(day, []):
+                app_total = totals[row[app_field]]
+                app_total[0] += row['count']
+                app_total[1] += row.get('total') or 0
+            counts = sorted((app_id, count, total)
+                            for app_id, (count, total) in totals.items())
+        else:
+            counts = sorted((row[app_field], row['count'],
+                             row.get('total') or 0)
+                            for row in days.get(day, []))
+
+        for app_id, count, total in counts:
+            if 'average' in stat:
+                count = float(total) / count
+            yield {
+                'key': key,
+                'recorded': day,
+                'user_hash': None,
+                'value': {'count': count, 'app-id': app_id}}
+
+
 def _get_query_result(key, start, end):
     # To do on-the-fly queries we have to produce results as if they
-    # were calculated daily, which means we need to iterate over each
-    # day in the range and perform an aggregation on this date.
-
-    data = []
+    # were calculated daily. The objects of the whole range are grouped by day
+    # in a single query, and totals are kept running from one day to the next
+    # instead of being counted again from the beginning of time each day.
     today = datetime.date.today()
     stat = STATS[key]
 
@@ -90,29 +136,8 @@ def _get_query_result(key, start, end):
     if not end:
         end = today
 
-    for day in daterange(start, end):
-        if stat['type'] == 'total':
-            # If it's a totalling queryset, we want to filter by the
-            # end date until the beginning of time to get the total
-            # objects up until this point in time.
-            date_filtered = stat['qs'].filter(
-                created__lt=(day + datetime.timedelta(days=1)))
-        else:
-            # Otherwise, we want to filter by both start/end to get
-            # counts on a specific day.
-            date_filtered = stat['qs'].filter(
-                created__gte=day,
-                created__lt=(day + datetime.timedelta(days=1)))
-
-        data.extend([{
-            'key': key,
-            'recorded': day,
-            'user_hash': None,
-            'value': {'count': d.get(stat['field_map']['count']),
-                      'app-id': d.get(stat['field_map']['app-id'])}}
-            for d in date_filtered])
-
-    return data
+    # The view paginates the results, so they need to be in a list.
+    return list(_iter_query_result(key, stat, start, end))
 
 
 class MonolithView(CORSMixin, MarketplaceView, ListAPIView):
@@ -9,12 +9,17 @@ from nose.tools import eq_, ok_
 from django.core.urlresolvers import reverse
 from django.test import client
 
+import amo.tests
 from amo.tests import TestCase
+from reviews.models import Review
+from users.models import UserProfile
+
 from mkt.api.tests.test_oauth import RestOAuth
 from mkt.site.fixtures import fixture
 
+from .buffer import EventBuffer
 from .models import MonolithRecord, record_stat
-from .resources import daterange
+from .resources import _get_query_result, daterange
 
 
 class RequestFactory(client.RequestFactory):
@@ -66,6 +71,88 @@ class TestModels(TestCase):
             record_stat('app.install', self.request)
 
 
+class TestEventBuffer(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.buffer = EventBuffer()
+
+    def test_no_interval(self):
+        self.buffer.add_record(MonolithRecord(key='app.install', value='{}'))
+        eq_(MonolithRecord.objects.count(), 1)
+        eq_(self.buffer.events, [])
+
+    @mock.patch.object(MonolithRecord.objects, 'bulk_create')
+    def test_flush(self, bulk_create):
+        call = mock.Mock()
+        with self.settings(MONOLITH_BUFFER_INTERVAL=60):
+            for i in range(3):
+                self.buffer.add_record(MonolithRecord(key='app.install',
+                                                      value='{}'))
+            self.buffer.add_call(call, 1, foo='bar')
+        eq_(len(self.buffer.events), 4)
+        eq_(MonolithRecord.objects.count(), 0)
+
+        self.buffer.flush()
+        eq_(bulk_create.call_count, 1)
+        eq_(len(bulk_create.call_args[0][0]), 3)
+        call.assert_called_with(1, foo='bar')
+        eq_(self.buffer.events, [])
+
+    def test_flush_failed(self):
+        call = mock.Mock(side_effect=[Exception, None])
+        with self.settings(MONOLITH_BUFFER_INTERVAL=60):
+            self.buffer.add_record(MonolithRecord(key='app.install',
+                                                  value='{}'))
+            self.buffer.add_call(call)
+            self.buffer.flush()
+            # The record was written, the call will be retried.
+            eq_(MonolithRecord.objects.count(), 1)
+            eq_(len(self.buffer.events), 1)
+            self.buffer.flush()
+        eq_(call.call_count, 2)
+        eq_(self.buffer.events, [])
+
+    @mock.patch('mkt.monolith.buffer.EventBuffer._start')
+    def test_flush_failed_max_size(self, _start):
+        call = mock.Mock(side_effect=Exception)
+        with self.settings(MONOLITH_BUFFER_INTERVAL=60,
+                           MONOLITH_BUFFER_SIZE=10,
+                           MONOLITH_BUFFER_MAX_SIZE=2):
+            for i in range(3):
+                self.buffer.add_call(call, i)
+            self.buffer.flush()
+        # The oldest event was dropped.
+        eq_([event[1][1] for event in self.buffer.events], [(1,), (2,)])
+
+    @mock.patch('mkt.monolith.buffer.amo.log')
+    def test_add_log_no_interval(self, log):
+        self.buffer.add_log(amo.LOG.INSTALL_ADDON, 1, user=2)
+        # Logged right away, there's no need to pass on the time.
+        log.assert_called_with(amo.LOG.INSTALL_ADDON, 1, user=2)
+
+    @mock.patch('mkt.monolith.buffer.EventBuffer._start')
+    @mock.patch('mkt.monolith.buffer.amo.log')
+    def test_add_log(self, log, _start):
+        with self.settings(MONOLITH_BUFFER_INTERVAL=60):
+            self.buffer.add_log(amo.LOG.INSTALL_ADDON, 1, user=2)
+        ok_(not log.called)
+        created = self.buffer.events[0][1][2]['created']
+        self.buffer.flush()
+        log.assert_called_with(amo.LOG.INSTALL_ADDON, 1, user=2,
+                               created=created)
+
+    @mock.patch('mkt.monolith.buffer.EventBuffer._start')
+    def test_size(self, _start):
+        with self.settings(MONOLITH_BUFFER_INTERVAL=60,
+                           MONOLITH_BUFFER_SIZE=2):
+            self.buffer.add_call(mock.Mock())
+            _start.assert_called_with(60)
+            self.buffer.timer = mock.Mock()
+            self.buffer.add_call(mock.Mock())
+            _start.assert_called_with(0)
+
+
 class TestMonolithResource(RestOAuth):
     fixtures = fixture('user_2519')
 
@@ -215,6 +302,42 @@ class TestMonolithResource(RestOAuth):
         eq_(data['meta']['limit'], 2)
 
 
+class TestQueryResult(TestCase):
+    fixtures = fixture('user_2519', 'user_999')
+
+    def setUp(self):
+        self.app = amo.tests.app_factory()
+        self.day = datetime.date(2013, 2, 10)
+        self.users = UserProfile.objects.all()
+
+    def review(self, user, rating, days):
+        review = Review.objects.create(addon=self.app, user=user, body='b',
+                                       rating=rating)
+        created = datetime.datetime.combine(
+            self.day + datetime.timedelta(days=days), datetime.time(12))
+        Review.objects.filter(pk=review.pk).update(created=created)
+
+    def values(self, key, start, end, queries):
+        with self.assertNumQueries(queries):
+            return [(d['recorded'], d['value']['app-id'], d['value']['count'])
+                    for d in _get_query_result(key, start, end)]
+
+    def test_slice(self):
+        self.review(self.users[0], 4, -1)
+        self.review(self.users[1], 2, 1)
+        eq_(self.values('apps_ratings', self.day,
+                        self.day + datetime.timedelta(days=3), 1),
+            [(self.day + datetime.timedelta(days=1), self.app.pk, 1)])
+
+    def test_total(self):
+        self.review(self.users[0], 4, -1)
+        self.review(self.users[1], 2, 1)
+        next_day = self.day + datetime.timedelta(days=1)
+        eq_(self.values('apps_average_rating', self.day,
+                        self.day + datetime.timedelta(days=2), 2),
+            [(self.day, self.app.pk, 4.0), (next_day, self.app.pk, 3.0)])
+
+
 class TestDateRange(TestCase):
 
     def setUp(self):
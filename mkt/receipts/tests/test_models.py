@@ -141,3 +141,14 @@ class TestReceipt(amo.tests.TestCase):
 class TestBrokenReceipt(amo.tests.TestCase):
     def test_get_key(self):
         self.assertRaises(IOError, get_key)
+
+
+@mock.patch.object(settings, 'WEBAPPS_RECEIPT_KEY',
+                   amo.tests.AMOPaths.sample_key())
+class TestGetKey(amo.tests.TestCase):
+
+    @mock.patch('mkt.receipts.utils.jwt.rsa_load')
+    def test_key_loaded_once(self, rsa_load):
+        with mock.patch('mkt.receipts.utils._keys', {}):
+            eq_(get_key(), get_key())
+        eq_(rsa_load.call_count, 1)
@@ -250,6 +250,19 @@ class TestVerify(amo.tests.TestCase):
             eq_(res['status'], 'refunded')
         eq_(log.call_count, 2)
 
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_PURCHASE_TIMEOUT',
+                       60, create=True)
+    def test_purchase_cached(self):
+        self.addon.update(premium_type=amo.ADDON_PREMIUM)
+        eq_(self.get(self.user_data)['reason'], 'NO_PURCHASE')
+        # Making the purchase clears what we kept.
+        purchase = self.make_purchase()
+        eq_(self.get(self.user_data)['status'], 'ok')
+        with self.assertNumQueries(0):
+            eq_(self.get(self.user_data)['status'], 'ok')
+        purchase.update(type=amo.CONTRIB_REFUND)
+        eq_(self.get(self.user_data)['status'], 'refunded')
+
     def test_premium_no_charge(self):
         self.addon.update(premium_type=amo.ADDON_PREMIUM)
         purchase = self.make_purchase()
@@ -303,6 +316,19 @@ class TestVerify(amo.tests.TestCase):
         verify.decode_receipt('.~' + sample)
         assert trunion_verify.called
 
+    @mock.patch.object(utils.settings, 'WEBAPPS_RECEIPT_DECODE_TIMEOUT', 60,
+                       create=True)
+    def test_crack_receipt_reused(self):
+        self.addon.update(type=amo.ADDON_WEBAPP, manifest_url='http://a.com')
+        purchase = self.make_purchase()
+        receipt = create_receipt(purchase.addon, purchase.user, purchase.uuid)
+        result = verify.decode_receipt(receipt)
+        result['exp'] = 0
+        with mock.patch.object(verify, '_decode_receipt') as decode:
+            eq_(verify.decode_receipt(receipt)['typ'], u'purchase-receipt')
+            ok_(verify.decode_receipt(receipt)['exp'])
+        assert not decode.called
+
     def test_crack_borked_receipt(self):
         self.addon.update(type=amo.ADDON_WEBAPP, manifest_url='http://a.com')
         purchase = self.make_purchase()
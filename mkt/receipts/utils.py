@@ -136,6 +136,16 @@ def create_test_receipt(root, status):
     return sign(receipt)
 
 
+# Parsed keys by path, see `get_key`.
+_keys = {}
+
+
 def get_key():
-    """Return a key for using with encode."""
-    return jwt.rsa_load(settings.WEBAPPS_RECEIPT_KEY)
+    """Return a key for using with encode.
+
+    The key is only read and parsed the first time it is used.
+    """
+    path = settings.WEBAPPS_RECEIPT_KEY
+    if path not in _keys:
+        _keys[path] = jwt.rsa_load(path)
+    return _keys[path]
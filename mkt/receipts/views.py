@@ -23,6 +23,7 @@ from lib.crypto.receipt import SigningError
 from lib.cef_loggers import receipt_cef
 import mkt
 from mkt.constants import apps
+from mkt.monolith.buffer import events
 from mkt.receipts import forms
 from mkt.receipts.utils import create_receipt, create_test_receipt, get_uuid
 from mkt.webapps.models import Installed, Webapp
@@ -103,7 +104,7 @@ def _record(request, addon):
         if not addon.is_public() or not addon.is_webapp():
             raise http.Http404
 
-    amo.log(amo.LOG.INSTALL_ADDON, addon)
+    events.add_log(amo.LOG.INSTALL_ADDON, addon, user=amo.get_user())
     record_action('install', request, {
         'app-domain': addon.domain_from_url(addon.origin, allow_none=True),
         'app-id': addon.pk,
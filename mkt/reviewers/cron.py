@@ -0,0 +1,16 @@
+import commonware.log
+import cronjobs
+
+from mkt.reviewers.utils import refresh_queue_stats
+
+cron_log = commonware.log.getLogger('mkt.reviewers.cron')
+
+
+@cronjobs.register
+def update_queue_stats():
+    """
+    Recomputes the review queue stats, in case some changes to the queues
+    didn't trigger the update.
+    """
+    cron_log.info('Reconciling the review queue stats.')
+    refresh_queue_stats()
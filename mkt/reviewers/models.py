@@ -1,8 +1,15 @@
 from django.db import models
 
+import waffle
+
 import amo
 from apps.addons.models import Addon
 from apps.editors.models import CannedResponse, EscalationQueue, RereviewQueue
+from files.models import File
+from reviews.models import Review, ReviewFlag
+from versions.models import Version
+
+from mkt.webapps.models import Webapp
 
 
 class AppCannedResponseManager(amo.models.ManagerBase):
@@ -25,3 +32,70 @@ def cleanup_queues(sender, instance, **kwargs):
 
 models.signals.post_delete.connect(cleanup_queues, sender=Addon,
                                    dispatch_uid='queue-addon-cleanup')
+
+
+def queue_stats_changed(sender, **kwargs):
+    """Have the review queue stats recomputed after the request."""
+    if kwargs.get('raw'):
+        return
+    if waffle.switch_is_active('reviewer-queue-stats'):
+        from mkt.reviewers import tasks
+        tasks.update_queue_stats.delay()
+
+
+# Only the changes that can move an app in or out of a queue refresh the
+# stats straight away. The rest is picked up by the `update_queue_stats` cron.
+@Addon.on_change
+@Webapp.on_change
+def watch_queue_status(old_attr={}, new_attr={}, instance=None, sender=None,
+                       **kw):
+    if any(old_attr.get(attr) != new_attr.get(attr)
+           for attr in ('status', 'disabled_by_user')):
+        queue_stats_changed(sender)
+
+
+@File.on_change
+def watch_queue_file_status(old_attr={}, new_attr={}, instance=None,
+                            sender=None, **kw):
+    if old_attr.get('status') != new_attr.get('status'):
+        queue_stats_changed(sender)
+
+
+def queue_stats_created(sender, **kwargs):
+    if kwargs.get('created'):
+        queue_stats_changed(sender, **kwargs)
+
+
+# Reviews and versions don't track their changes like apps and files do, so
+# the field that puts them in the queues is remembered when they're loaded:
+# flagged reviews make the moderation queue and nominations the age buckets.
+QUEUE_FIELDS = {Review: 'editorreview', Version: 'nomination'}
+
+
+def remember_queue_field(sender, instance, **kwargs):
+    instance._queue_field = instance.__dict__.get(QUEUE_FIELDS[sender])
+
+
+def watch_queue_field(sender, instance, **kwargs):
+    value = instance.__dict__.get(QUEUE_FIELDS[sender])
+    if kwargs.get('created'):
+        changed = bool(value)
+    else:
+        changed = value != getattr(instance, '_queue_field', value)
+    instance._queue_field = value
+    if changed:
+        queue_stats_changed(sender, **kwargs)
+
+
+for model in (RereviewQueue, EscalationQueue, ReviewFlag, File):
+    models.signals.post_save.connect(queue_stats_created, sender=model,
+        dispatch_uid='queue-stats-%s' % model.__name__)
+for model in QUEUE_FIELDS:
+    models.signals.post_init.connect(remember_queue_field, sender=model,
+        dispatch_uid='queue-stats-init-%s' % model.__name__)
+    models.signals.post_save.connect(watch_queue_field, sender=model,
+        dispatch_uid='queue-stats-%s' % model.__name__)
+for model in (Addon, Webapp, RereviewQueue, EscalationQueue, Review,
+              ReviewFlag, File, Version):
+    models.signals.post_delete.connect(queue_stats_changed, sender=model,
+        dispatch_uid='queue-stats-delete-%s' % model.__name__)
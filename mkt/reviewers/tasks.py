@@ -0,0 +1,14 @@
+import logging
+
+from lib.post_request_task.task import task as post_request_task
+from mkt.reviewers.utils import refresh_queue_stats
+
+
+log = logging.getLogger('z.task')
+
+
+@post_request_task
+def update_queue_stats(**kw):
+    """Recomputes the cached review queue stats."""
+    log.info('Updating the review queue stats.')
+    refresh_queue_stats()
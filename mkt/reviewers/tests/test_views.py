@@ -49,8 +49,9 @@ import mkt
 from mkt.comm.utils import create_comm_note
 from mkt.constants import comm
 from mkt.constants.features import FeatureProfile
+from mkt.reviewers.utils import refresh_queue_stats
 from mkt.reviewers.views import (_do_sort, _progress, app_review, queue_apps,
-                                 route_reviewer)
+                                 queue_counts, route_reviewer)
 from mkt.site.fixtures import fixture
 from mkt.submit.tests.test_views import BasePackagedAppTest
 from mkt.webapps.models import Webapp
@@ -241,6 +242,69 @@ class TestReviewersHome(AppReviewerTest, AccessMixin):
         self.assertAlmostEqual(percentages['updates']['old'], 33.333333333333)
         self.assertAlmostEqual(percentages['updates']['med'], 33.333333333333)
 
+    def test_progress_queue_stats(self):
+        self.create_switch('reviewer-queue-stats')
+        self.apps[0].latest_version.update(nomination=self.days_ago(1))
+        self.apps[1].latest_version.update(nomination=self.days_ago(8))
+        self.apps[2].latest_version.update(nomination=self.days_ago(15))
+        counts, percentages = _progress()
+        eq_(counts['pending'], {'week': 1, 'new': 1, 'med': 1, 'old': 1})
+
+        # Changes made without signals are only seen once reconciled.
+        Version.objects.filter(pk=self.apps[0].latest_version.pk).update(
+            nomination=self.days_ago(20))
+        eq_(_progress()[0]['pending']['old'], 1)
+        refresh_queue_stats()
+        eq_(_progress()[0]['pending']['old'], 2)
+
+    def test_queue_counts_queue_stats(self):
+        self.create_switch('reviewer-queue-stats')
+        req = amo.tests.req_factory_factory(
+            self.url, user=UserProfile.objects.get(username='editor'))
+        counts = queue_counts(req)
+        eq_(counts['pending'], 3)
+        eq_(counts['rereview'], 1)
+        with self.assertNumQueries(0):
+            eq_(queue_counts(req), counts)
+
+    @mock.patch('mkt.reviewers.tasks.update_queue_stats.delay')
+    def test_queue_stats_updated_on_change(self, update_queue_stats):
+        RereviewQueue.objects.create(addon=self.apps[0])
+        assert not update_queue_stats.called
+        self.create_switch('reviewer-queue-stats')
+        RereviewQueue.objects.create(addon=self.apps[1])
+        assert update_queue_stats.called
+
+    @mock.patch('mkt.reviewers.tasks.update_queue_stats.delay')
+    def test_queue_stats_updated_on_status_change(self, update_queue_stats):
+        self.create_switch('reviewer-queue-stats')
+        self.apps[0].update(weekly_downloads=10)
+        assert not update_queue_stats.called
+        self.apps[0].update(status=amo.STATUS_PUBLIC)
+        assert update_queue_stats.called
+
+    @mock.patch('mkt.reviewers.tasks.update_queue_stats.delay')
+    def test_queue_stats_updated_on_nomination(self, update_queue_stats):
+        self.create_switch('reviewer-queue-stats')
+        version = Version.objects.get(pk=self.apps[0].latest_version.pk)
+        version.update(version='1.1')
+        assert not update_queue_stats.called
+        version.update(nomination=self.days_ago(3))
+        assert update_queue_stats.called
+
+    @mock.patch('mkt.reviewers.tasks.update_queue_stats.delay')
+    def test_queue_stats_updated_on_moderation(self, update_queue_stats):
+        self.create_switch('reviewer-queue-stats')
+        review = Review.objects.create(
+            addon=self.apps[0], body='body', rating=3, editorreview=True,
+            user=UserProfile.objects.get(email='regular@mozilla.com'))
+        assert update_queue_stats.called
+        update_queue_stats.reset_mock()
+        review = Review.objects.get(pk=review.pk)
+        review.editorreview = False
+        review.save()
+        assert update_queue_stats.called
+
     def test_stats_waiting(self):
         self.apps[0].latest_version.update(nomination=self.days_ago(1))
         self.apps[1].latest_version.update(nomination=self.days_ago(5))
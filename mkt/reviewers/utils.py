@@ -1,6 +1,8 @@
+import bisect
 import json
+import time
 import urllib
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core.cache import cache
@@ -18,16 +20,23 @@ from amo.urlresolvers import reverse
 from amo.utils import JSONEncoder, send_mail_jinja, to_language
 from editors.models import EscalationQueue, RereviewQueue, ReviewerScore
 from files.models import File
+from reviews.models import Review
 
+import mkt
 from mkt.comm.utils import create_comm_note
 from mkt.constants import comm
 from mkt.constants.features import FeatureProfile
+from mkt.features.utils import filter_apps_by_profile
 from mkt.site.helpers import product_as_dict
 from mkt.webapps.models import Webapp
 
 
 log = commonware.log.getLogger('z.mailer')
 
+# Counts and ages of the apps in the review queues, see `get_queue_stats()`.
+QUEUE_STATS_KEY = 'reviewers:queue-stats'
+QUEUE_STATS_TIMEOUT = 60 * 60
+
 
 def send_mail(subject, template, context, emails, perm_setting=None, cc=None,
               attachments=None, reply_to=None):
@@ -642,11 +651,140 @@ def device_queue_search(request):
         'status': amo.STATUS_PENDING,
         'disabled_by_user': False,
     }
+    qs = Webapp.objects.filter(**filters)
     sig = request.GET.get('pro')
     if sig:
         profile = FeatureProfile.from_signature(sig)
-        filters.update(dict(
-            **profile.to_kwargs(prefix='_current_version__features__has_')
-        ))
-    return Webapp.version_and_file_transformer(
-        Webapp.objects.filter(**filters))
+        qs = filter_apps_by_profile(qs, profile)
+    return Webapp.version_and_file_transformer(qs)
+
+
+def compute_queue_counts():
+    """Returns the number of apps in each queue."""
+    excluded_ids = EscalationQueue.objects.no_cache().values_list('addon',
+                                                                  flat=True)
+    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
+
+    return {
+        'pending': Webapp.objects.no_cache()
+                         .exclude(id__in=excluded_ids)
+                         .filter(type=amo.ADDON_WEBAPP,
+                                 disabled_by_user=False,
+                                 status=amo.STATUS_PENDING)
+                         .count(),
+        'rereview': RereviewQueue.objects.no_cache()
+                                 .exclude(addon__in=excluded_ids)
+                                 .filter(addon__disabled_by_user=False)
+                                 .count(),
+        # This will work as long as we disable files of existing unreviewed
+        # versions when a new version is uploaded.
+        'updates': File.objects.no_cache()
+                       .exclude(version__addon__id__in=excluded_ids)
+                       .filter(version__addon__type=amo.ADDON_WEBAPP,
+                               version__addon__disabled_by_user=False,
+                               version__addon__is_packaged=True,
+                               version__addon__status__in=public_statuses,
+                               version__deleted=False,
+                               status=amo.STATUS_PENDING)
+                       .count(),
+        'escalated': EscalationQueue.objects.no_cache()
+                                    .filter(addon__disabled_by_user=False)
+                                    .count(),
+        'moderated': Review.objects.no_cache().filter(
+                                            addon__type=amo.ADDON_WEBAPP,
+                                            reviewflag__isnull=False,
+                                            editorreview=True)
+                                    .count(),
+
+        'region_cn': Webapp.objects.pending_in_region(mkt.regions.CN).count(),
+    }
+
+
+def compute_queue_dates():
+    """
+    Returns the sorted timestamps of when the apps of each queue were
+    nominated or added to it, from which the progress is computed.
+    """
+    excluded_ids = EscalationQueue.objects.no_cache().values_list('addon',
+                                                                  flat=True)
+    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
+
+    base_filters = {
+        'pending': (Webapp.objects.rated()
+                          .exclude(id__in=excluded_ids)
+                          .filter(status=amo.STATUS_PENDING,
+                                  disabled_by_user=False,
+                                  _latest_version__deleted=False),
+                    '_latest_version__nomination'),
+        'rereview': (RereviewQueue.objects
+                                  .exclude(addon__in=excluded_ids)
+                                  .filter(addon__disabled_by_user=False),
+                     'created'),
+        'escalated': (EscalationQueue.objects
+                                     .filter(addon__disabled_by_user=False),
+                      'created'),
+        'updates': (File.objects
+                        .exclude(version__addon__id__in=excluded_ids)
+                        .filter(version__addon__type=amo.ADDON_WEBAPP,
+                                version__addon__disabled_by_user=False,
+                                version__addon__is_packaged=True,
+                                version__addon__status__in=public_statuses,
+                                version__deleted=False,
+                                status=amo.STATUS_PENDING),
+                    'version__nomination')
+    }
+
+    dates = {}
+    for queue, (qs, field) in base_filters.items():
+        dates[queue] = sorted(
+            time.mktime(date.timetuple()) for date in
+            qs.no_cache().values_list(field, flat=True) if date)
+    return dates
+
+
+def refresh_queue_stats():
+    """Computes the queue stats from the database and caches them."""
+    stats = {'counts': compute_queue_counts(),
+             'dates': compute_queue_dates()}
+    cache.set(QUEUE_STATS_KEY, stats, QUEUE_STATS_TIMEOUT)
+    return stats
+
+
+def get_queue_stats():
+    """
+    Returns the queue stats as a dict with:
+
+    * `counts`: the number of apps in each queue.
+    * `dates`: for the queues we show the progress of, the sorted timestamps
+      of their apps.
+
+    They are kept up to date by the `update_queue_stats` task, triggered when
+    apps move between queues, and reconciled by a cron job.
+    """
+    stats = cache.get(QUEUE_STATS_KEY)
+    if stats is None:
+        stats = refresh_queue_stats()
+    return stats
+
+
+def queue_progress(dates):
+    """
+    Returns the number of apps of each queue added in the last week and
+    before 5 ('new'), 10 ('med') or more ('old') days ago, from their
+    `dates` as returned by `get_queue_stats()`.
+    """
+    now = datetime.now()
+    days_ago = lambda n: time.mktime((now - timedelta(days=n)).timetuple())
+    five, seven, ten = days_ago(5), days_ago(7), days_ago(10)
+
+    progress = {}
+    for queue, timestamps in dates.items():
+        total = len(timestamps)
+        progress[queue] = {
+            'new': total - bisect.bisect_right(timestamps, five),
+            'med': (bisect.bisect_right(timestamps, five) -
+                    bisect.bisect_left(timestamps, ten)),
+            'old': bisect.bisect_left(timestamps, ten),
+            'week': total - bisect.bisect_left(timestamps, seven),
+        }
+    return progress
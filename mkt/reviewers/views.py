@@ -18,6 +18,7 @@ from django.shortcuts import get_object_or_404, redirect, render
 import commonware.log
 import jinja2
 import requests
+import waffle
 from cache_nuggets.lib import Token
 from tower import ugettext as _
 from waffle.decorators import waffle_switch
@@ -50,12 +51,13 @@ from translations.query import order_by_translation
 from users.models import UserProfile
 from zadmin.models import set_config, unmemoized_get_config
 
-import mkt
 from mkt.comm.forms import CommAttachmentFormSet
 from mkt.regions.utils import parse_region
 from mkt.reviewers.forms import ApiReviewersSearchForm
 from mkt.reviewers.utils import (AppsReviewing, clean_sort_param,
-                                 device_queue_search)
+                                 compute_queue_counts, compute_queue_dates,
+                                 device_queue_search, get_queue_stats,
+                                 queue_progress)
 from mkt.site import messages
 from mkt.site.helpers import product_as_dict
 from mkt.submit.forms import AppFeaturesForm
@@ -99,43 +101,10 @@ def home(request):
 
 
 def queue_counts(request):
-    excluded_ids = EscalationQueue.objects.no_cache().values_list('addon',
-                                                                  flat=True)
-    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
-
-    counts = {
-        'pending': Webapp.objects.no_cache()
-                         .exclude(id__in=excluded_ids)
-                         .filter(type=amo.ADDON_WEBAPP,
-                                 disabled_by_user=False,
-                                 status=amo.STATUS_PENDING)
-                         .count(),
-        'rereview': RereviewQueue.objects.no_cache()
-                                 .exclude(addon__in=excluded_ids)
-                                 .filter(addon__disabled_by_user=False)
-                                 .count(),
-        # This will work as long as we disable files of existing unreviewed
-        # versions when a new version is uploaded.
-        'updates': File.objects.no_cache()
-                       .exclude(version__addon__id__in=excluded_ids)
-                       .filter(version__addon__type=amo.ADDON_WEBAPP,
-                               version__addon__disabled_by_user=False,
-                               version__addon__is_packaged=True,
-                               version__addon__status__in=public_statuses,
-                               version__deleted=False,
-                               status=amo.STATUS_PENDING)
-                       .count(),
-        'escalated': EscalationQueue.objects.no_cache()
-                                    .filter(addon__disabled_by_user=False)
-                                    .count(),
-        'moderated': Review.objects.no_cache().filter(
-                                            addon__type=amo.ADDON_WEBAPP,
-                                            reviewflag__isnull=False,
-                                            editorreview=True)
-                                    .count(),
-
-        'region_cn': Webapp.objects.pending_in_region(mkt.regions.CN).count(),
-    }
+    if waffle.switch_is_active('reviewer-queue-stats'):
+        counts = dict(get_queue_stats()['counts'])
+    else:
+        counts = compute_queue_counts()
 
     if 'pro' in request.GET:
         counts.update({'device': device_queue_search(request).count()})
@@ -155,55 +124,12 @@ def _progress():
     Return the number of apps still unreviewed for a given period of time and
     the percentage.
     """
-
-    days_ago = lambda n: datetime.datetime.now() - datetime.timedelta(days=n)
-    excluded_ids = EscalationQueue.objects.values_list('addon', flat=True)
-    public_statuses = amo.WEBAPPS_APPROVED_STATUSES
-
-    base_filters = {
-        'pending': (Webapp.objects.rated()
-                          .exclude(id__in=excluded_ids)
-                          .filter(status=amo.STATUS_PENDING,
-                                  disabled_by_user=False,
-                                  _latest_version__deleted=False),
-                    '_latest_version__nomination'),
-        'rereview': (RereviewQueue.objects
-                                  .exclude(addon__in=excluded_ids)
-                                  .filter(addon__disabled_by_user=False),
-                     'created'),
-        'escalated': (EscalationQueue.objects
-                                     .filter(addon__disabled_by_user=False),
-                      'created'),
-        'updates': (File.objects
-                        .exclude(version__addon__id__in=excluded_ids)
-                        .filter(version__addon__type=amo.ADDON_WEBAPP,
-                                version__addon__disabled_by_user=False,
-                                version__addon__is_packaged=True,
-                                version__addon__status__in=public_statuses,
-                                version__deleted=False,
-                                status=amo.STATUS_PENDING),
-                    'version__nomination')
-    }
-
-    operators_and_values = {
-        'new': ('gt', days_ago(5)),
-        'med': ('range', (days_ago(10), days_ago(5))),
-        'old': ('lt', days_ago(10)),
-        'week': ('gte', days_ago(7))
-    }
-
-    types = base_filters.keys()
-    progress = {}
-
-    for t in types:
-        tmp = {}
-        base_query, field = base_filters[t]
-        for k in operators_and_values.keys():
-            operator, value = operators_and_values[k]
-            filter_ = {}
-            filter_['%s__%s' % (field, operator)] = value
-            tmp[k] = base_query.filter(**filter_).count()
-        progress[t] = tmp
+    if waffle.switch_is_active('reviewer-queue-stats'):
+        dates = get_queue_stats()['dates']
+    else:
+        dates = compute_queue_dates()
+    progress = queue_progress(dates)
+    types = progress.keys()
 
     # Return the percent of (p)rogress out of (t)otal.
     pct = lambda p, t: (p / float(t)) * 100 if p > 0 else 0
@@ -2,6 +2,7 @@ import json
 
 from django.http import HttpResponse
 
+import waffle
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView
@@ -15,7 +16,8 @@ from mkt.api.paginator import ESPaginator
 from mkt.collections.constants import (COLLECTIONS_TYPE_BASIC,
                                        COLLECTIONS_TYPE_FEATURED,
                                        COLLECTIONS_TYPE_OPERATOR)
-from mkt.collections.filters import CollectionFilterSetWithFallback
+from mkt.collections.filters import (CollectionFilterSetWithFallback,
+                                     filter_lookup, InvalidLookupFilter)
 from mkt.collections.models import Collection
 from mkt.collections.serializers import CollectionSerializer
 from mkt.features.utils import get_feature_profile
@@ -23,7 +25,7 @@ from mkt.search.views import _filter_search
 from mkt.search.forms import ApiSearchForm, TARAKO_CATEGORIES_MAPPING
 from mkt.search.serializers import (ESAppSerializer, RocketbarESAppSerializer,
                                     SuggestionsESAppSerializer)
-from mkt.search.utils import S
+from mkt.search.utils import multi_search, S
 from mkt.webapps.models import Webapp, WebappIndexer
 
 
@@ -73,48 +75,107 @@ class SearchView(CORSMixin, MarketplaceView, GenericAPIView):
 
 class FeaturedSearchView(SearchView):
     collections_serializer_class = CollectionSerializer
+    collection_types = (
+        ('collections', COLLECTIONS_TYPE_BASIC),
+        ('featured', COLLECTIONS_TYPE_FEATURED),
+        ('operator', COLLECTIONS_TYPE_OPERATOR),
+    )
 
-    def collections(self, request, collection_type=None, limit=1):
+    def get_collections_filters(self, request):
         filters = request.GET.dict()
         region = self.get_region_from_request(request)
         if region:
             filters.setdefault('region', region.slug)
-        if collection_type is not None:
-            qs = Collection.public.filter(collection_type=collection_type)
-        else:
-            qs = Collection.public.all()
-        qs = CollectionFilterSetWithFallback(filters, queryset=qs).qs
-        preview_mode = filters.get('preview', False)
-        serializer = self.collections_serializer_class(qs[:limit], many=True,
+        return filters
+
+    def get_collections_serializer(self, request, collections):
+        preview_mode = request.GET.get('preview', False)
+        return self.collections_serializer_class(collections, many=True,
             context={
                 'request': request,
                 'view': self,
                 'use-es-for-apps': not preview_mode
         })
+
+    def collections(self, request, collection_type=None, limit=1):
+        filters = self.get_collections_filters(request)
+        if collection_type is not None:
+            qs = Collection.public.filter(collection_type=collection_type)
+        else:
+            qs = Collection.public.all()
+        qs = CollectionFilterSetWithFallback(filters, queryset=qs).qs
+        serializer = self.get_collections_serializer(request, qs[:limit])
         return serializer.data, getattr(qs, 'filter_fallback', None)
 
     def get(self, request, *args, **kwargs):
-        serializer, _ = self.search(request)
-        data, filter_fallbacks = self.add_featured_etc(request,
-                                                       serializer.data)
+        if waffle.switch_is_active('featured-search-msearch'):
+            with multi_search() as searches:
+                featured = self.prepare_featured(request, searches)
+                serializer, _ = self.search(request)
+                data, filter_fallbacks = self.add_featured_etc(
+                    request, serializer.data, featured=featured)
+        else:
+            serializer, _ = self.search(request)
+            data, filter_fallbacks = self.add_featured_etc(request,
+                                                           serializer.data)
         response = Response(data)
         for name, value in filter_fallbacks.items():
             response['API-Fallback-%s' % name] = ','.join(value)
         return response
 
-    def add_featured_etc(self, request, data):
+    def prepare_featured(self, request, searches, limit=1):
+        """
+        Pick the collections of each type from the cached lookup table, with a
+        single query to fetch them, and register the ES queries of their apps
+        on `searches` so that they are sent along with the main search.
+
+        Return a {name: (serializer, fallback)} dict for `add_featured_etc()`,
+        or None if the collections can't be picked that way.
+        """
+        if request.GET.get('cat') in TARAKO_CATEGORIES_MAPPING:
+            return None
+        filters = self.get_collections_filters(request)
+        try:
+            picked = dict(
+                (name, filter_lookup(filters, collection_type=col_type,
+                                     limit=limit))
+                for name, col_type in self.collection_types)
+        except InvalidLookupFilter:
+            return None
+
+        ids = set(pk for pks, _ in picked.values() for pk in pks)
+        collections = (dict((c.pk, c) for c in
+                            Collection.public.filter(pk__in=ids))
+                       if ids else {})
+        featured = {}
+        for name, (pks, fallback) in picked.items():
+            serializer = self.get_collections_serializer(request,
+                [collections[pk] for pk in pks if pk in collections])
+            if serializer.context['use-es-for-apps']:
+                field = serializer.fields['apps']
+                field.initialize(parent=serializer, field_name='apps')
+                for collection in serializer.object:
+                    searches.add(field.get_es_queryset(
+                        collection, request)[:field.apps_limit])
+            featured[name] = serializer, fallback
+        return featured
+
+    def add_featured_etc(self, request, data, featured=None):
+        """
+        Add the collections to the data. `featured` is what
+        `prepare_featured()` returned, if it was called.
+        """
         # Tarako categories don't have collections.
         if request.GET.get('cat') in TARAKO_CATEGORIES_MAPPING:
             return data, {}
-        types = (
-            ('collections', COLLECTIONS_TYPE_BASIC),
-            ('featured', COLLECTIONS_TYPE_FEATURED),
-            ('operator', COLLECTIONS_TYPE_OPERATOR),
-        )
         filter_fallbacks = {}
-        for name, col_type in types:
-            data[name], fallback = self.collections(request,
-                                                    collection_type=col_type)
+        for name, col_type in self.collection_types:
+            if featured:
+                serializer, fallback = featured[name]
+                data[name] = serializer.data
+            else:
+                data[name], fallback = self.collections(
+                    request, collection_type=col_type)
             if fallback:
                 filter_fallbacks[name] = fallback
 
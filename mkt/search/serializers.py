@@ -1,11 +1,12 @@
 from datetime import datetime
 
 from django.conf import settings
+from django.utils.functional import cached_property
 
 from rest_framework import serializers
 
 import amo
-from addons.models import Category, Preview
+from addons.models import AddonUser, Category, Preview
 from amo.helpers import absolutify
 from amo.urlresolvers import reverse
 from constants.applications import DEVICE_TYPES
@@ -14,13 +15,109 @@ from versions.models import Version
 import mkt
 from mkt.api.fields import ESTranslationSerializerField
 from mkt.submit.serializers import SimplePreviewSerializer
-from mkt.webapps.models import Geodata, Webapp
+from mkt.webapps.models import Geodata, Installed, Webapp
 from mkt.webapps.utils import (dehydrate_content_rating,
                                dehydrate_descriptors,
                                dehydrate_interactives)
 from mkt.webapps.api import AppSerializer, SimpleAppSerializer
 
 
+# Attributes of the apps that are stored as is in ES.
+ES_ATTRIBUTES = ('created', 'modified', 'default_locale', 'icon_hash',
+                 'is_escalated', 'is_offline', 'manifest_url', 'premium_type',
+                 'regions', 'reviewed', 'status', 'weekly_downloads')
+
+# Sources of the plain serializer fields that can be read straight from the ES
+# data, and how to read them.
+ES_SOURCES = {
+    'app_slug': lambda data: data['app_slug'],
+    'current_version.version': lambda data: data['current_version'],
+    'developer_name': lambda data: data['author'],
+    'geodata.banner_regions_slugs': (
+        lambda data: data.get('banner_regions') or []),
+    'pk': lambda data: data['id'],
+}
+
+# Fields using those implementations of field_to_native() only read their
+# source and pass it to to_native().
+PLAIN_FIELD_TO_NATIVE = (serializers.Field.field_to_native.__func__,
+                         serializers.WritableField.field_to_native.__func__)
+
+# Translated sources whose name is different in ES.
+ES_TRANSLATIONS = {
+    'current_version.releasenotes': 'release_notes',
+    'geodata.banner_message': 'banner_message',
+}
+
+
+class ESPreview(object):
+    """A stand-in for a Preview, built from the ES data of an app."""
+    _image_url = Preview._image_url.__func__
+    file_extension = Preview.file_extension
+    image_url = Preview.image_url
+    thumbnail_url = Preview.thumbnail_url
+
+    def __init__(self, data):
+        self.id = self.pk = data['id']
+        self.filetype = data['filetype']
+        self.modified = data['modified']
+
+
+class ESApp(object):
+    """
+    A stand-in for a Webapp, built from the ES data of a search hit.
+
+    It only knows what the serializers commonly need. Anything else (e.g. the
+    price of a premium app) is looked up on a fake Webapp, built on first use
+    by `ESAppSerializer.create_fake_app()`.
+    """
+    type = amo.ADDON_WEBAPP
+    icon_type = 'image/png'
+
+    get_icon_url = Webapp.get_icon_url.__func__
+    is_premium = Webapp.is_premium.__func__
+
+    def __init__(self, data, serializer):
+        self.es_data = data
+        self.id = self.pk = data['id']
+        self.app_slug = data['app_slug']
+        self.app_type = amo.ADDON_WEBAPP_TYPES[data['app_type']]
+        self.is_packaged = data['app_type'] != amo.ADDON_WEBAPP_HOSTED
+        self.public_stats = data['has_public_stats']
+        for field_name in ES_ATTRIBUTES:
+            setattr(self, field_name, data.get(field_name))
+        self._serializer = serializer
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.fake_app, name)
+
+    @cached_property
+    def fake_app(self):
+        return self._serializer.create_fake_app(self.es_data)
+
+    @cached_property
+    def all_previews(self):
+        return [ESPreview(p) for p in self.es_data['previews']]
+
+    @cached_property
+    def device_types(self):
+        return [DEVICE_TYPES[d] for d in self.es_data['device']]
+
+    @cached_property
+    def get_regions(self):
+        return self._serializer.get_regions_from_exclusions(
+            self.es_data['region_exclusions'])
+
+    def get_absolute_url(self):
+        return reverse('detail', args=[self.app_slug])
+
+    def has_premium(self):
+        # Free apps don't need the fake app.
+        return self.is_premium() and self.fake_app.has_premium()
+
+
 class ESAppSerializer(AppSerializer):
     # Fields specific to search.
     absolute_url = serializers.SerializerMethodField('get_absolute_url')
@@ -61,6 +158,11 @@ class ESAppSerializer(AppSerializer):
         for field_name in self.fields:
             self.fields[field_name].read_only = True
 
+        self._accessors = None
+        self._page_ids = []
+        self._user_info = {}
+        self._regions = {}
+
     @property
     def data(self):
         """
@@ -68,20 +170,82 @@ class ESAppSerializer(AppSerializer):
         """
         if self._data is None:
             if self.many:
-                self._data = [self.to_native(item) for item in self.object]
+                self._data = self.page_to_native(self.object)
             else:
-                self._data = self.to_native(self.object)
+                self._data = self.page_to_native([self.object])[0]
         return self._data
 
     def field_to_native(self, obj, field_name):
         # DRF's field_to_native calls .all(), which we want to avoid, so we
         # provide a simplified version that doesn't and just iterates on the
         # object list.
-        return [self.to_native(item) for item in obj.object_list]
+        return self.page_to_native(obj.object_list)
+
+    def page_to_native(self, objects):
+        """
+        Serialize a page of ES hits.
+
+        Everything that only depends on the request (the fields, the region,
+        the user...) is figured out once for the whole page here instead of
+        once per hit.
+        """
+        objects = list(objects)
+        self._page_ids = [obj._source['id'] for obj in objects]
+        self._user_info = {}
+        self._region_id = self._get_region_id()
+        self._ratings_body = mkt.regions.REGION_TO_RATINGS_BODY().get(
+            self._get_region_slug(), 'generic')
+        self._accessors = [self.get_accessor(field_name, field)
+                           for field_name, field in self.fields.items()]
+        return [self.to_native(obj) for obj in objects]
+
+    def get_accessor(self, field_name, field):
+        """
+        Return a (key, function, transform method) tuple for `field`, the
+        function taking an ESApp and returning the value of the field.
+        """
+        field.initialize(parent=self, field_name=field_name)
+        key = self.get_field_key(field_name)
+        transform = getattr(self, 'transform_%s' % field_name, None)
+        if not callable(transform):
+            transform = None
+
+        source = field.source or field_name
+        if isinstance(field, ESTranslationSerializerField):
+            source = source[:-len(field.suffix)] if field.source else source
+            es_source = ES_TRANSLATIONS.get(source, source)
+            if '.' not in es_source:
+                def get_value(app):
+                    translations = field.get_translations(app.es_data,
+                                                          es_source)
+                    if field.requested_language:
+                        return field.fetch_single_translation(app, source,
+                                                              translations)
+                    return field.fetch_all_translations(app, source,
+                                                        translations)
+                return key, get_value, transform
+        elif (isinstance(field, serializers.SlugRelatedField) and
+              source == 'all_categories' and field.slug_field == 'slug'):
+            return key, lambda app: list(app.es_data['category']), transform
+        elif (source in ES_SOURCES and
+              type(field).field_to_native.__func__ in PLAIN_FIELD_TO_NATIVE):
+            read = ES_SOURCES[source]
+            return (key, lambda app: field.to_native(read(app.es_data)),
+                    transform)
+
+        return key, lambda app: field.field_to_native(app, field_name), transform
 
     def to_native(self, obj):
-        app = self.create_fake_app(obj._source)
-        return super(ESAppSerializer, self).to_native(app)
+        if self._accessors is None:
+            return self.page_to_native([obj])[0]
+        app = ESApp(obj._source, self)
+        ret = self._dict_class()
+        for key, get_value, transform in self._accessors:
+            value = get_value(app)
+            if transform is not None:
+                value = transform(app, value)
+            ret[key] = value
+        return ret
 
     def create_fake_app(self, data):
         """Create a fake instance of Webapp and related models from ES data."""
@@ -114,10 +278,7 @@ class ESAppSerializer(AppSerializer):
         # Set base attributes on the "fake" app using the data from ES.
         # It doesn't mean they'll get exposed in the serializer output, that
         # depends on what the fields/exclude attributes in Meta.
-        for field_name in ('created', 'modified', 'default_locale',
-                           'icon_hash', 'is_escalated', 'is_offline',
-                           'manifest_url', 'premium_type', 'regions',
-                           'reviewed', 'status', 'weekly_downloads'):
+        for field_name in ES_ATTRIBUTES:
             setattr(obj, field_name, data.get(field_name))
 
         # Attach translations for all translated attributes.
@@ -135,17 +296,30 @@ class ESAppSerializer(AppSerializer):
 
         # Override obj.get_region() with a static list of regions generated
         # from the region_exclusions stored in ES.
-        obj.get_regions = obj.get_regions(obj.get_region_ids(restofworld=True,
-            excluded=data['region_exclusions']))
+        obj.get_regions = self.get_regions_from_exclusions(
+            data['region_exclusions'])
 
         # Some methods below will need the raw data from ES, put it on obj.
         obj.es_data = data
 
         return obj
 
+    def get_regions_from_exclusions(self, exclusions):
+        """
+        Return the list of regions an app with those region exclusions is
+        available in. Most apps share the same exclusions, so it's memoized.
+        """
+        exclusions = tuple(sorted(exclusions or []))
+        if exclusions not in self._regions:
+            region_ids = sorted(set(mkt.regions.ALL_REGION_IDS) -
+                                set(exclusions))
+            self._regions[exclusions] = sorted(
+                map(mkt.regions.REGIONS_CHOICES_ID_DICT.get, region_ids),
+                key=lambda x: x.slug)
+        return self._regions[exclusions]
+
     def get_content_ratings(self, obj):
-        body = (mkt.regions.REGION_TO_RATINGS_BODY().get(
-            self.context['request'].REGION.slug, 'generic'))
+        body = self._ratings_body
         return {
             'body': body,
             'rating': dehydrate_content_rating(
@@ -158,6 +332,33 @@ class ESAppSerializer(AppSerializer):
                 obj.es_data.get('interactive_elements', [])),
         }
 
+    def get_supported_locales(self, obj):
+        locs = obj.es_data.get('supported_locales')
+        if locs:
+            return locs.split(',') if isinstance(locs, basestring) else locs
+        return []
+
+    def get_user_info(self, obj):
+        user = getattr(self.context.get('request'), 'amo_user', None)
+        if user:
+            if obj.pk not in self._user_info:
+                # Look up the whole page at once.
+                ids = set(self._page_ids)
+                ids.add(obj.pk)
+                developed = set(AddonUser.objects.filter(
+                    user=user, role=amo.AUTHOR_ROLE_OWNER, addon__in=ids)
+                    .values_list('addon', flat=True))
+                installed = set(Installed.objects.filter(
+                    user=user, addon__in=ids).values_list('addon', flat=True))
+                purchased = set(user.purchase_ids())
+                for pk in ids:
+                    self._user_info[pk] = {
+                        'developed': pk in developed,
+                        'installed': pk in installed,
+                        'purchased': pk in purchased,
+                    }
+            return self._user_info[obj.pk]
+
     def get_versions(self, obj):
         return dict((v['version'], v['resource_uri'])
                     for v in obj.es_data['versions'])
@@ -168,9 +369,8 @@ class ESAppSerializer(AppSerializer):
     def get_upsell(self, obj):
         upsell = obj.es_data.get('upsell', False)
         if upsell:
-            region_id = self.context['request'].REGION.id
             exclusions = upsell.get('region_exclusions')
-            if exclusions is not None and region_id not in exclusions:
+            if exclusions is not None and self._region_id not in exclusions:
                 upsell['resource_uri'] = reverse('app-detail',
                     kwargs={'pk': upsell['id']})
             else:
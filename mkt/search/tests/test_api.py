@@ -7,6 +7,7 @@ from django.db.models.query import QuerySet
 from django.http import QueryDict
 from django.test.client import RequestFactory
 
+from elasticutils.contrib.django import S as eu_S
 from mock import MagicMock, patch
 from nose.tools import eq_, ok_
 
@@ -1021,6 +1022,50 @@ class TestFeaturedApps(TestFeaturedCollections):
     prop_name = 'featured'
 
 
+class TestFeaturedCollectionsMultiSearch(TestFeaturedCollections):
+    """
+    Same tests, picking the collections from the cached lookup table and
+    fetching their apps in the same ES request as the search.
+    """
+
+    def setUp(self):
+        super(TestFeaturedCollectionsMultiSearch, self).setUp()
+        self.create_switch('featured-search-msearch')
+
+    @patch('mkt.search.api.CollectionFilterSetWithFallback')
+    def test_collection_filterset_called(self, mock_fallback):
+        self.make_request()
+        eq_(mock_fallback.call_count, 0)
+
+    @patch('mkt.search.api.CollectionFilterSetWithFallback')
+    def test_collection_filterset_invalid_filter(self, mock_fallback):
+        self.qs['carrier'] = 'unknown-carrier'
+        self.make_request()
+        eq_(mock_fallback.call_count, 3)
+
+    def test_single_es_request(self):
+        self.col.add_app(self.app)
+        self.refresh('webapp')
+        with patch.object(eu_S, 'raw', side_effect=AssertionError):
+            self.test_apps_included()
+
+    def test_lookup_invalidated(self):
+        self.make_request()
+        self.col.update(is_public=False)
+        res, json = self.make_request()
+        eq_(json[self.prop_name], [])
+
+
+class TestFeaturedOperatorMultiSearch(TestFeaturedCollectionsMultiSearch):
+    col_type = COLLECTIONS_TYPE_OPERATOR
+    prop_name = 'operator'
+
+
+class TestFeaturedAppsMultiSearch(TestFeaturedCollectionsMultiSearch):
+    col_type = COLLECTIONS_TYPE_FEATURED
+    prop_name = 'featured'
+
+
 @patch.object(settings, 'SITE_URL', 'http://testserver')
 class TestSuggestionsApi(ESTestCase):
     fixtures = fixture('webapp_337141')
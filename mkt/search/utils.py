@@ -1,11 +1,85 @@
+import threading
+from contextlib import contextmanager
+
 from elasticutils.contrib.django import S as eu_S
 from statsd import statsd
 
 
+_local = threading.local()
+
+
+class MultiSearch(object):
+    """
+    Searches sent together to ES in a single `_msearch` request.
+
+    Searches are registered with `add()` and sent when the first search is
+    executed while the MultiSearch is active (see `multi_search()`). That
+    search is sent along with them if it wasn't registered, and the searches
+    executed afterwards use the responses we got.
+    """
+
+    def __init__(self):
+        self.pending = []
+        self.responses = {}
+
+    def get_key(self, s):
+        return s.get_es()._encode_json([s.get_indexes(), s.get_doctypes(),
+                                        s._build_query()])
+
+    def add(self, s):
+        key = self.get_key(s)
+        if key not in self.responses and key not in dict(self.pending):
+            self.pending.append((key, s))
+
+    def send(self):
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        es = pending[0][1].get_es()
+        lines = []
+        for key, s in pending:
+            lines.append(es._encode_json({'index': s.get_indexes(),
+                                          'type': s.get_doctypes()}))
+            lines.append(es._encode_json(s._build_query()))
+        with statsd.timer('search.msearch'):
+            res = es.send_request('GET', ['_msearch'],
+                                  body='\n'.join(lines) + '\n',
+                                  encode_body=False)
+        for (key, s), response in zip(pending, res['responses']):
+            # Failed searches will be retried on their own.
+            if 'error' not in response:
+                self.responses[key] = response
+
+    def get_response(self, s):
+        """Return the response to the search, or None if it failed."""
+        key = self.get_key(s)
+        if key not in self.responses:
+            self.add(s)
+            self.send()
+        return self.responses.get(key)
+
+
+@contextmanager
+def multi_search():
+    """
+    Send the searches registered on the MultiSearch we yield, and the first
+    search executed in the block, in a single request.
+    """
+    searches = MultiSearch()
+    _local.multi_search = searches
+    try:
+        yield searches
+    finally:
+        _local.multi_search = None
+
+
 class S(eu_S):
 
     def raw(self):
+        searches = getattr(_local, 'multi_search', None)
         with statsd.timer('search.raw'):
-            hits = super(S, self).raw()
+            hits = searches and searches.get_response(self)
+            if not hits:
+                hits = super(S, self).raw()
             statsd.timing('search.took', hits['took'])
             return hits
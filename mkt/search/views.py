@@ -1,6 +1,8 @@
 import amo
 from apps.search.views import _get_locale_analyzer
 
+from mkt.features.utils import filter_search_by_profile
+
 from . import forms
 
 
@@ -158,6 +160,6 @@ def _filter_search(request, qs, query, filters=None, sorting=None,
 
     if profile:
         # Exclude apps that require any features we don't support.
-        qs = qs.filter(**profile.to_kwargs(prefix='features.has_'))
+        qs = filter_search_by_profile(qs, profile)
 
     return qs
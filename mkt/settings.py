@@ -107,6 +107,7 @@ MIDDLEWARE_CLASSES += [
     'mkt.api.middleware.APIPinningMiddleware',
     'mkt.api.middleware.APITransactionMiddleware',
     'mkt.api.middleware.APIFilterMiddleware',
+    'mkt.api.middleware.APIResponseCacheMiddleware',
 ]
 
 TEMPLATE_DIRS += (path('mkt/templates'), path('mkt/zadmin/templates'))
@@ -148,6 +149,7 @@ CELERY_ROUTES.update({
     # Images.
     'mkt.developers.tasks.resize_icon': {'queue': 'images'},
     'mkt.developers.tasks.resize_preview': {'queue': 'images'},
+    'mkt.developers.tasks.pngcrush_images': {'queue': 'images'},
 })
 
 # Paths.
@@ -209,6 +211,11 @@ MINIFY_MOZMARKET = True
 GEOIP_URL = ''
 GEOIP_DEFAULT_VAL = 'restofworld'
 GEOIP_DEFAULT_TIMEOUT = .2
+# Path to a CSV of `start,end,country_code` IP ranges used to resolve IPs
+# locally. The GeoIP server, if any, is only called for unknown IPs.
+GEOIP_DB_PATH = ''
+# Number of recently resolved IPs kept in memory by each process.
+GEOIP_CACHE_SIZE = 10000
 
 SENTRY_DSN = None
 
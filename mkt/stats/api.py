@@ -7,7 +7,7 @@ from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from lib.metrics import get_monolith_client
+from lib.metrics import get_monolith_client, get_monolith_data
 
 import amo
 from stats.models import Contribution
@@ -134,9 +134,8 @@ APP_STATS_TOTAL = {
 
 
 def _get_monolith_data(stat, start, end, interval, dimensions):
-    # If stat has a 'lines' attribute, it's a multi-line graph. Do a
-    # request for each item in 'lines' and compose them in a single
-    # response.
+    # If stat has a 'lines' attribute, it's a multi-line graph. All the lines
+    # are fetched in a single request and composed in a single response.
     try:
         client = get_monolith_client()
     except requests.ConnectionError as e:
@@ -150,20 +149,20 @@ def _get_monolith_data(stat, start, end, interval, dimensions):
 
         return data
 
-    try:
-        data = {}
-        if 'lines' in stat:
-            for line_name, line_dimension in stat['lines'].items():
-                dimensions.update(line_dimension)
-                data[line_name] = map(_coerce,
-                                      client(stat['metric'], start, end,
-                                             interval, **dimensions))
-
-        else:
-            data['objects'] = map(_coerce,
-                                  client(stat['metric'], start, end, interval,
-                                         **dimensions))
+    if 'lines' in stat:
+        names = stat['lines'].keys()
+        queries = [(stat['metric'], start, end, interval,
+                    dict(dimensions, **stat['lines'][name]))
+                   for name in names]
+    else:
+        names = ['objects']
+        queries = [(stat['metric'], start, end, interval, dimensions)]
 
+    try:
+        results = get_monolith_data(client, queries)
+    except requests.ConnectionError as e:
+        log.info('Monolith connection error: {0}'.format(e))
+        raise ServiceUnavailable
     except ValueError as e:
         # This occurs if monolith doesn't have our metric and we get an
         # elasticsearch SearchPhaseExecutionException error.
@@ -171,7 +170,8 @@ def _get_monolith_data(stat, start, end, interval, dimensions):
             stat['metric'], e))
         raise ParseError('Invalid metric at this time. Try again later.')
 
-    return data
+    return dict((name, map(_coerce, [dict(row) for row in result]))
+                for name, result in zip(names, results))
 
 
 class GlobalStats(CORSMixin, APIView):
@@ -10,6 +10,7 @@ from django.conf import settings
 import amo
 from stats.models import Contribution
 
+from lib.metrics import reset_monolith_client
 from mkt.api.tests.test_oauth import RestOAuth
 from mkt.site.fixtures import fixture
 from mkt.stats.api import APP_STATS, STATS, _get_monolith_data
@@ -19,6 +20,8 @@ class StatsAPITestMixin(object):
 
     def setUp(self):
         super(StatsAPITestMixin, self).setUp()
+        reset_monolith_client()
+        self.addCleanup(reset_monolith_client)
         patches = [
             mock.patch('monolith.client.Client'),
             mock.patch.object(settings, 'MONOLITH_SERVER', 'http://0.0.0.0:0'),
@@ -74,28 +77,44 @@ class TestGlobalStatsResource(StatsAPITestMixin, RestOAuth):
         eq_(res.status_code, 200)
         eq_(json.loads(res.content)['objects'], [])
 
-    @mock.patch('monolith.client.Client')
-    def test_dimensions(self, mocked):
-        client = mock.MagicMock()
-        mocked.return_value = client
+    @mock.patch('mkt.stats.api.get_monolith_data')
+    def test_dimensions(self, get_monolith_data):
+        get_monolith_data.return_value = [[]] * 3
 
         data = self.data.copy()
-        data.update({'region': 'br', 'package_type': 'hosted'})
+        data.update({'region': 'br'})
         res = self.client.get(self.url('apps_added_by_package'), data=data)
         eq_(res.status_code, 200)
-        ok_(client.called)
-        eq_(client.call_args[1], {'region': 'br', 'package_type': 'hosted'})
+        # All the lines are fetched at once.
+        eq_(get_monolith_data.call_count, 1)
+        queries = get_monolith_data.call_args[0][1]
+        eq_(sorted(query[4]['package_type'] for query in queries),
+            sorted(amo.ADDON_WEBAPP_TYPES.values()))
+        for query in queries:
+            eq_(query[4]['region'], 'br')
+
+    @mock.patch('mkt.stats.api.get_monolith_data')
+    def test_dimensions_default(self, get_monolith_data):
+        get_monolith_data.return_value = [[]] * 3
 
-    @mock.patch('monolith.client.Client')
-    def test_dimensions_default(self, mocked):
-        client = mock.MagicMock()
-        mocked.return_value = client
+        res = self.client.get(self.url('apps_added_by_package'),
+                              data=self.data)
+        eq_(res.status_code, 200)
+        for query in get_monolith_data.call_args[0][1]:
+            eq_(query[4]['region'], 'us')
+
+    @mock.patch('mkt.stats.api.get_monolith_data')
+    def test_lines(self, get_monolith_data):
+        get_monolith_data.return_value = [
+            [{'count': i, 'date': '2013-04-01'}] for i in range(3)]
 
         res = self.client.get(self.url('apps_added_by_package'),
                               data=self.data)
         eq_(res.status_code, 200)
-        ok_(client.called)
-        eq_(client.call_args[1], {'region': 'us', 'package_type': 'hosted'})
+        data = json.loads(res.content)
+        queries = get_monolith_data.call_args[0][1]
+        for i, query in enumerate(queries):
+            eq_(data[query[4]['package_type']][0]['count'], i)
 
     @mock.patch('monolith.client.Client')
     def test_dimensions_default_is_none(self, mocked):
@@ -7,14 +7,12 @@ from django.conf import settings
 
 import commonware.log
 import cronjobs
-from celery import chord
 
 import amo
 from amo.utils import chunked
 
-from .models import Installed, Webapp
-from .tasks import (dump_user_installs, update_downloads, update_trending,
-                    zip_users)
+from .models import Webapp
+from .tasks import dump_user_installs, update_downloads, update_trending
 
 
 log = commonware.log.getLogger('z.cron')
@@ -57,25 +55,14 @@ def update_app_trending():
 @cronjobs.register
 def dump_user_installs_cron():
     """
-    Sets up tasks to do user install dumps.
+    Sets up a task to dump user installs.
     """
-    chunk_size = 100
-    # Get valid users to dump.
-    user_ids = set(Installed.objects.filter(addon__type=amo.ADDON_WEBAPP)
-                   .values_list('user', flat=True))
-
-    # Remove old dump data before running.
+    # Remove the dump data left by previous versions of the dump.
     user_dir = os.path.join(settings.DUMPED_USERS_PATH, 'users')
     if os.path.exists(user_dir):
         shutil.rmtree(user_dir)
 
-    grouping = []
-    for chunk in chunked(user_ids, chunk_size):
-        grouping.append(dump_user_installs.subtask(args=[chunk]))
-
-    post = zip_users.subtask(immutable=True)
-    ts = chord(grouping, post)
-    ts.apply_async()
+    dump_user_installs.delay()
 
 
 @cronjobs.register
@@ -4,10 +4,13 @@ import hashlib
 import json
 import math
 import os
+import random
+import threading
+import time
 import urlparse
 import uuid
 from collections import defaultdict
-from operator import attrgetter
+from operator import attrgetter, itemgetter
 
 from django.conf import settings
 from django.core.cache import cache
@@ -21,7 +24,6 @@ from django.dispatch import receiver
 import commonware.log
 import json_field
 import waffle
-from cache_nuggets.lib import memoize, memoize_key
 from elasticutils.contrib.django import F, Indexable, MappingType
 from tower import ugettext as _
 
@@ -29,9 +31,10 @@ import amo
 import amo.models
 from access.acl import action_allowed, check_reviewer
 from addons import query
-from addons.models import (Addon, AddonDeviceType, AddonUpsell,
+from addons.models import (Addon, AddonDeviceType, AddonUpsell, AddonUser,
                            attach_categories, attach_devices, attach_prices,
-                           attach_tags, attach_translations, Category)
+                           attach_tags, attach_translations, Category,
+                           Preview)
 from addons.signals import version_changed
 from amo.decorators import skip_cache, write
 from amo.helpers import absolutify
@@ -54,6 +57,7 @@ from lib.iarc.utils import (get_iarc_app_title, render_xml,
 
 import mkt
 from mkt.constants import APP_FEATURES, apps
+from mkt.constants.features import FeatureProfile
 from mkt.developers.models import AddonPaymentAccount
 from mkt.regions.utils import parse_region
 from mkt.search.utils import S
@@ -757,12 +761,12 @@ class Webapp(Addon):
         else:
             all_ids = mkt.regions.REGION_IDS
         if excluded is None:
-            excluded = list(self.addonexcludedregion
-                                .values_list('region', flat=True))
+            excluded = region_exclusions.get_excluded_regions(self.id,
+                                                              geodata=False)
 
         return sorted(set(all_ids) - set(excluded or []))
 
-    def get_excluded_region_ids(self):
+    def get_excluded_region_ids(self, excluded=None):
         """
         Return IDs of regions for which this app is excluded.
 
@@ -770,10 +774,21 @@ class Webapp(Addon):
         this will also exclude any region that does not have the price tier
         set.
 
+        If `excluded` is provided we'll use that as the addon excluded regions
+        instead of doing our own lookup.
+
         Note: free and in-app are not included in this.
         """
-        excluded = set(self.addonexcludedregion
-                           .values_list('region', flat=True))
+        if excluded is None:
+            # This includes the Geodata exclusions.
+            excluded = set(region_exclusions.get_excluded_regions(self.id))
+        else:
+            excluded = set(excluded)
+            geo = self.geodata
+            if geo.region_de_iarc_exclude or geo.region_de_usk_exclude:
+                excluded.add(mkt.regions.DE.id)
+            if geo.region_br_iarc_exclude:
+                excluded.add(mkt.regions.BR.id)
 
         if self.is_premium():
             all_regions = set(mkt.regions.ALL_REGION_IDS)
@@ -782,12 +797,6 @@ class Webapp(Addon):
             excluded = excluded.union(
                 all_regions.difference(self.get_price_region_ids()))
 
-        geo = self.geodata
-        if geo.region_de_iarc_exclude or geo.region_de_usk_exclude:
-            excluded.add(mkt.regions.DE.id)
-        if geo.region_br_iarc_exclude:
-            excluded.add(mkt.regions.BR.id)
-
         return sorted(list(excluded))
 
     def get_price_region_ids(self):
@@ -1642,6 +1651,7 @@ class WebappIndexer(MappingType, Indexable):
                         }
                     },
                     'region_exclusions': {'type': 'short'},
+                    'required_features': {'type': 'byte'},
                     'reviewed': {'format': 'dateOptionalTime', 'type': 'date'},
                     'status': {'type': 'byte'},
                     'supported_locales': {'type': 'string',
@@ -1719,21 +1729,145 @@ class WebappIndexer(MappingType, Indexable):
         """Extracts the ElasticSearch index document for this instance."""
         if obj is None:
             obj = cls.get_model().objects.no_cache().get(pk=pk)
+        return cls.extract_documents([obj.pk], objs=[obj])[0]
+
+    @classmethod
+    def extract_documents(cls, ids, objs=None):
+        """
+        Extracts the ElasticSearch index documents for a batch of apps.
+
+        Everything related to the apps is fetched for the whole batch at once,
+        so the number of queries doesn't grow with the number of apps. If
+        `objs` is provided we'll use those instead of fetching the apps
+        ourselves, in which case they should have been through
+        `Webapp.indexing_transformer`.
+
+        The documents are returned in the same order as the apps.
+        """
+        if objs is None:
+            objs = Webapp.indexing_transformer(
+                Webapp.with_deleted.no_cache().filter(id__in=ids))
+        objs = list(objs)
+        if not objs:
+            return []
+
+        related = cls._prefetch_related(objs)
+        return [cls._extract_document(obj, related) for obj in objs]
+
+    @classmethod
+    def _prefetch_related(cls, objs):
+        """
+        Fetches everything `_extract_document` needs for `objs` in a fixed
+        number of queries.
+
+        One-to-one relations are attached to the apps directly, everything
+        else is returned in a dict of {app id: value} dicts.
+        """
+        # To avoid circular imports.
+        from editors.models import EscalationQueue
+        from mkt.collections.models import CollectionMembership
+
+        ids = [obj.id for obj in objs]
+
+        def rollup(qs, key='addon_id'):
+            if not callable(key):
+                key = attrgetter(key)
+            return dict((k, list(vs)) for k, vs in
+                        amo.utils.sorted_groupby(qs, key))
+
+        # Fill the reverse one-to-one caches, including with None for the
+        # missing ones, so that accessing them later doesn't hit the database.
+        for accessor, model in (('_geodata', Geodata),
+                                ('rating_descriptors', RatingDescriptors),
+                                ('rating_interactives', RatingInteractives)):
+            rel_objs = dict((rel.addon_id, rel) for rel in
+                            model.objects.no_cache().filter(addon__in=ids))
+            cache_name = getattr(Webapp, accessor).cache_name
+            for obj in objs:
+                setattr(obj, cache_name, rel_objs.get(obj.id))
+
+        # Apps without Geodata get one created when accessed, like before.
+        amo.utils.attach_trans_dict(Geodata, [obj.geodata for obj in objs])
+
+        current_versions = filter(None, [obj.current_version for obj in objs])
+        amo.utils.attach_trans_dict(Version, current_versions)
+        features = dict(
+            (f.version_id, f) for f in AppFeatures.objects.no_cache()
+            .filter(version__in=[v.id for v in current_versions]))
+
+        upsells = dict(AddonUpsell.objects.no_cache().filter(free__in=ids)
+                       .values_list('free', 'premium'))
+        premiums = dict((app.id, app) for app in Webapp.objects.no_cache()
+                        .filter(id__in=upsells.values()))
+
+        # Regional installs, counted once per (app, region).
+        install_regions = (ClientData.objects
+                           .filter(installed__addon__in=ids)
+                           .values_list('installed__addon', 'region')
+                           .annotate(models.Count('installed')))
+
+        return {
+            'categories': rollup(
+                Category.objects.filter(addoncategory__addon__in=ids)
+                .values_list('addoncategory__addon', 'slug'),
+                key=itemgetter(0)),
+            'collections': rollup(
+                CollectionMembership.objects.no_cache().filter(app__in=ids),
+                key='app_id'),
+            'content_ratings': rollup(
+                ContentRating.objects.no_cache().filter(addon__in=ids)),
+            'escalated': set(EscalationQueue.objects.no_cache()
+                             .filter(addon__in=ids)
+                             .values_list('addon', flat=True)),
+            'features': features,
+            'installs': dict(Installed.objects.no_cache()
+                             .filter(addon__in=ids).values_list('addon')
+                             .annotate(models.Count('id'))),
+            'install_regions': dict(
+                ((addon, region), count)
+                for addon, region, count in install_regions),
+            'max_downloads': float(Webapp.objects.aggregate(
+                Max('weekly_downloads')).values()[0] or 0),
+            'owners': rollup(
+                AddonUser.objects.filter(addon__in=ids,
+                                         role=amo.AUTHOR_ROLE_OWNER)
+                .values_list('addon', 'user'), key=itemgetter(0)),
+            'previews': rollup(
+                Preview.objects.no_cache().filter(addon__in=ids)
+                .values_list('addon', 'filetype', 'modified', 'id'),
+                key=itemgetter(0)),
+            'price_tiers': dict(AddonPremium.objects.no_cache()
+                                .filter(addon__in=ids)
+                                .values_list('addon', 'price__name')),
+            'upsells': dict((free, premiums[premium])
+                            for free, premium in upsells.items()
+                            if premium in premiums),
+            'versions': rollup(
+                Version.objects.no_cache().filter(addon__in=ids)),
+        }
 
+    @classmethod
+    def _extract_document(cls, obj, related):
+        """
+        Extracts the ElasticSearch index document for `obj`, using the
+        `related` data fetched by `_prefetch_related`.
+        """
         latest_version = obj.latest_version
         version = obj.current_version
         geodata = obj.geodata
-        features = (version.features.to_dict()
-                    if version else AppFeatures().to_dict())
-        is_escalated = obj.escalationqueue_set.exists()
+        if version and version.id in related['features']:
+            app_features = related['features'][version.id]
+        else:
+            app_features = AppFeatures()
+        features = app_features.to_dict()
+        versions = related['versions'].get(obj.id, [])
 
         try:
             status = latest_version.statuses[0][1] if latest_version else None
         except IndexError:
             status = None
 
-        installed_ids = list(Installed.objects.filter(addon=obj)
-                             .values_list('id', flat=True))
+        installs = related['installs'].get(obj.id, 0)
 
         attrs = ('app_slug', 'average_daily_users', 'bayesian_rating',
                  'created', 'id', 'is_disabled', 'last_updated', 'modified',
@@ -1744,14 +1878,21 @@ class WebappIndexer(MappingType, Indexable):
         d['app_type'] = obj.app_type_id
         d['author'] = obj.developer_name
         d['banner_regions'] = geodata.banner_regions_slugs()
-        d['category'] = list(obj.categories.values_list('slug', flat=True))
+        d['category'] = [slug for _, slug
+                         in related['categories'].get(obj.id, [])]
         if obj.is_public:
             d['collection'] = [{'id': cms.collection_id, 'order': cms.order}
-                               for cms in obj.collectionmembership_set.all()]
+                               for cms in related['collections'].get(obj.id,
+                                                                     [])]
         else:
             d['collection'] = []
-        d['content_ratings'] = (obj.get_content_ratings_by_body(es=True) or
-                                None)
+        content_ratings = {}
+        for cr in related['content_ratings'].get(obj.id, []):
+            content_ratings[cr.get_body().label] = {
+                'body': cr.get_body().id,
+                'rating': cr.get_rating().id,
+            }
+        d['content_ratings'] = content_ratings or None
         d['content_descriptors'] = obj.get_descriptors_slugs()
         d['current_version'] = version.version if version else None
         d['default_locale'] = obj.default_locale
@@ -1759,10 +1900,11 @@ class WebappIndexer(MappingType, Indexable):
             set(string for _, string in obj.translations[obj.description_id]))
         d['device'] = getattr(obj, 'device_ids', [])
         d['features'] = features
+        d['required_features'] = app_features.to_profile().to_bits()
         d['has_public_stats'] = obj.public_stats
         d['icon_hash'] = obj.icon_hash
         d['interactive_elements'] = obj.get_interactives_slugs()
-        d['is_escalated'] = is_escalated
+        d['is_escalated'] = obj.id in related['escalated']
         d['is_offline'] = getattr(obj, 'is_offline', False)
         if latest_version:
             d['latest_version'] = {
@@ -1782,24 +1924,20 @@ class WebappIndexer(MappingType, Indexable):
         d['name'] = list(
             set(string for _, string in obj.translations[obj.name_id]))
         d['name_sort'] = unicode(obj.name).lower()
-        d['owners'] = [au.user.id for au in
-                       obj.addonuser_set.filter(role=amo.AUTHOR_ROLE_OWNER)]
-        d['popularity'] = d['_boost'] = len(installed_ids)
-        d['previews'] = [{'filetype': p.filetype, 'modified': p.modified,
-                          'id': p.id} for p in obj.previews.all()]
-        try:
-            p = obj.addonpremium.price
-            d['price_tier'] = p.name
-        except AddonPremium.DoesNotExist:
-            d['price_tier'] = None
+        d['owners'] = [user for _, user in related['owners'].get(obj.id, [])]
+        d['popularity'] = d['_boost'] = installs
+        d['previews'] = [{'filetype': filetype, 'modified': modified,
+                          'id': id_} for _, filetype, modified, id_
+                         in related['previews'].get(obj.id, [])]
+        d['price_tier'] = related['price_tiers'].get(obj.id)
 
         d['ratings'] = {
             'average': obj.average_rating,
             'count': obj.total_reviews,
         }
         d['region_exclusions'] = obj.get_excluded_region_ids()
-        d['reviewed'] = obj.versions.filter(
-            deleted=False).aggregate(Min('reviewed')).get('reviewed__min')
+        reviewed = filter(None, [v.reviewed for v in versions])
+        d['reviewed'] = min(reviewed) if reviewed else None
         if version:
             d['supported_locales'] = filter(
                 None, version.supported_locales.split(','))
@@ -1807,8 +1945,8 @@ class WebappIndexer(MappingType, Indexable):
             d['supported_locales'] = []
 
         d['tags'] = getattr(obj, 'tag_list', [])
-        if obj.upsell and obj.upsell.premium.is_public():
-            upsell_obj = obj.upsell.premium
+        upsell_obj = related['upsells'].get(obj.id)
+        if upsell_obj and upsell_obj.is_public():
             d['upsell'] = {
                 'id': upsell_obj.id,
                 'app_slug': upsell_obj.app_slug,
@@ -1820,13 +1958,12 @@ class WebappIndexer(MappingType, Indexable):
 
         d['versions'] = [dict(version=v.version,
                               resource_uri=reverse_version(v))
-                         for v in obj.versions.all()]
+                         for v in versions]
 
         # Calculate weight. It's similar to popularity, except that we can
         # expose the number - it's relative to the max weekly downloads for
         # the whole database.
-        max_downloads = float(
-            Webapp.objects.aggregate(Max('weekly_downloads')).values()[0] or 0)
+        max_downloads = related['max_downloads']
         if max_downloads:
             d['weight'] = math.ceil(d['weekly_downloads'] / max_downloads * 5)
         else:
@@ -1841,14 +1978,12 @@ class WebappIndexer(MappingType, Indexable):
                 in obj.translations[getattr(obj, '%s_id' % field)]
                 if string]
         if version:
-            amo.utils.attach_trans_dict(Version, [version])
             d['release_notes_translations'] = [
                 {'lang': to_language(lang), 'string': string}
                 for lang, string
                 in version.translations[version.releasenotes_id]]
         else:
             d['release_notes_translations'] = None
-        amo.utils.attach_trans_dict(Geodata, [geodata])
         d['banner_message_translations'] = [
             {'lang': to_language(lang), 'string': string}
             for lang, string
@@ -1856,16 +1991,13 @@ class WebappIndexer(MappingType, Indexable):
 
         # Calculate regional popularity for "mature regions"
         # (installs + reviews/installs from that region).
-        installs = dict(ClientData.objects.filter(installed__in=installed_ids)
-                        .annotate(region_counts=models.Count('region'))
-                        .values_list('region', 'region_counts').distinct())
         for region in mkt.regions.ALL_REGION_IDS:
-            cnt = installs.get(region, 0)
+            cnt = related['install_regions'].get((obj.id, region), 0)
             if cnt:
                 # Magic number (like all other scores up in this piece).
                 d['popularity_%s' % region] = d['popularity'] + cnt * 10
             else:
-                d['popularity_%s' % region] = len(installed_ids)
+                d['popularity_%s' % region] = installs
             d['_boost'] += cnt * 10
 
         # Bump the boost if the add-on is public.
@@ -2059,38 +2191,219 @@ class AddonExcludedRegion(amo.models.ModelBase):
         return mkt.regions.REGIONS_CHOICES_ID_DICT.get(self.region)
 
 
-@memoize(prefix='get_excluded_in')
+REGION_EXCLUSIONS_KEY = 'webapps:region-exclusions:generation'
+# The app whose exclusions changed at each generation.
+REGION_EXCLUSIONS_CHANGE_KEY = 'webapps:region-exclusions:change:%s'
+# Processes further behind than this reload everything instead of catching
+# up on the changes one app at a time.
+REGION_EXCLUSIONS_MAX_CHANGES = 100
+
+
+def _aer_exclusions(addon):
+    """Return the bitmask of the regions excluded by AddonExcludedRegion."""
+    mask = 0
+    for region in (AddonExcludedRegion.objects.no_cache().filter(addon=addon)
+                   .values_list('region', flat=True)):
+        mask |= 1 << region
+    return mask
+
+
+def _geodata_exclusions(de_iarc, de_usk, br_iarc):
+    """Return the bitmask of the regions excluded by the Geodata flags."""
+    mask = 0
+    # For pre-IARC unrated games in Brazil/Germany, and USK_RATING_REFUSED
+    # apps in Germany.
+    if de_iarc or de_usk:
+        mask |= 1 << mkt.regions.DE.id
+    if br_iarc:
+        mask |= 1 << mkt.regions.BR.id
+    return mask
+
+
+def _mask_regions(mask):
+    return [r for r in mkt.regions.ALL_REGION_IDS if mask & (1 << r)]
+
+
+class RegionExclusions(object):
+    """
+    Regions the apps are excluded from, from AddonExcludedRegion and the
+    Geodata flags, kept in memory as one bitmask of region ids per app.
+
+    It's loaded once per process and updated in place when exclusions change.
+    Each change increments a generation counter in the cache and records the
+    app it was about, so that the other processes only reload the apps that
+    changed since their generation. They reload everything when they are too
+    far behind, and every REGION_EXCLUSIONS_TIMEOUT seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.loaded = 0
+        self.aers = {}
+        self.geodata = {}
+        self.regions = {}
+
+    def _check(self):
+        generation = cache.get(REGION_EXCLUSIONS_KEY)
+        if (generation is None or self.generation is None or
+                time.time() - self.loaded >
+                settings.REGION_EXCLUSIONS_TIMEOUT):
+            self.load(generation)
+        elif generation != self.generation and not self._catch_up(generation):
+            self.load(generation)
+
+    def _current_generation(self):
+        # A random start keeps a counter lost from the cache from being
+        # mistaken for the old one.
+        cache.add(REGION_EXCLUSIONS_KEY, random.randint(0, 2 ** 30),
+                  settings.REGION_EXCLUSIONS_TIMEOUT)
+        return cache.get(REGION_EXCLUSIONS_KEY)
+
+    def _bump(self, addon):
+        try:
+            generation = cache.incr(REGION_EXCLUSIONS_KEY)
+        except ValueError:
+            # Without a counter everyone reloads everything anyway.
+            return self._current_generation()
+        cache.set(REGION_EXCLUSIONS_CHANGE_KEY % generation, addon,
+                  settings.REGION_EXCLUSIONS_TIMEOUT)
+        return generation
+
+    def _catch_up(self, generation):
+        """
+        Reload the apps that changed between our generation and `generation`
+        from the database. Returns False if we can't tell which they are.
+        """
+        if not (isinstance(generation, (int, long)) and
+                isinstance(self.generation, (int, long)) and
+                0 < generation - self.generation <=
+                REGION_EXCLUSIONS_MAX_CHANGES):
+            return False
+        keys = [REGION_EXCLUSIONS_CHANGE_KEY % g
+                for g in xrange(self.generation + 1, generation + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return False
+
+        for addon in set(changes.values()):
+            geodata = 0
+            for flags in (Geodata.objects.no_cache().filter(addon=addon)
+                          .values_list('region_de_iarc_exclude',
+                                       'region_de_usk_exclude',
+                                       'region_br_iarc_exclude')):
+                geodata = _geodata_exclusions(*flags)
+            self._apply(addon, _aer_exclusions(addon), geodata)
+        with self.lock:
+            self.generation = generation
+        return True
+
+    def load(self, generation=None):
+        if generation is None:
+            generation = self._current_generation()
+
+        aers = defaultdict(int)
+        for addon, region in (AddonExcludedRegion.objects.no_cache()
+                              .values_list('addon', 'region')):
+            aers[addon] |= 1 << region
+
+        geodata = {}
+        qs = (Geodata.objects.no_cache()
+              .filter(Q(region_de_iarc_exclude=True) |
+                      Q(region_de_usk_exclude=True) |
+                      Q(region_br_iarc_exclude=True))
+              .values_list('addon', 'region_de_iarc_exclude',
+                           'region_de_usk_exclude', 'region_br_iarc_exclude'))
+        for addon, de_iarc, de_usk, br_iarc in qs:
+            geodata[addon] = _geodata_exclusions(de_iarc, de_usk, br_iarc)
+
+        regions = defaultdict(set)
+        for masks in (aers, geodata):
+            for addon, mask in masks.items():
+                for region in _mask_regions(mask):
+                    regions[region].add(addon)
+
+        with self.lock:
+            self.aers, self.geodata = dict(aers), geodata
+            self.regions = dict(regions)
+            self.generation = generation
+            self.loaded = time.time()
+
+    def _apply(self, addon, aers, geodata):
+        with self.lock:
+            old = self.aers.get(addon, 0) | self.geodata.get(addon, 0)
+            for masks, mask in ((self.aers, aers), (self.geodata, geodata)):
+                if mask:
+                    masks[addon] = mask
+                else:
+                    masks.pop(addon, None)
+            new = aers | geodata
+            for region in _mask_regions(old ^ new):
+                if new & (1 << region):
+                    self.regions.setdefault(region, set()).add(addon)
+                else:
+                    self.regions[region].discard(addon)
+
+    def update(self, addon, aers=None, geodata=None):
+        """
+        Replace the AddonExcludedRegion and/or Geodata exclusions of `addon`,
+        given as region bitmasks.
+
+        Nothing is signalled to the other processes if they didn't change.
+        """
+        self._check()
+        old_aers = self.aers.get(addon, 0)
+        old_geodata = self.geodata.get(addon, 0)
+        aers = old_aers if aers is None else aers
+        geodata = old_geodata if geodata is None else geodata
+        if (aers, geodata) == (old_aers, old_geodata):
+            return
+
+        generation = self._bump(addon)
+        self._apply(addon, aers, geodata)
+        with self.lock:
+            # If someone else changed exclusions in between, we'll catch up
+            # with them on the next lookup.
+            if (isinstance(self.generation, (int, long)) and
+                    generation == self.generation + 1):
+                self.generation = generation
+
+    def get_excluded_in(self, region_id):
+        """Return the IDs of the apps excluded from the region."""
+        self._check()
+        return set(self.regions.get(region_id, ()))
+
+    def get_excluded_regions(self, addon, geodata=True):
+        """
+        Return the IDs of the regions the app is excluded from, leaving out
+        the Geodata exclusions if `geodata` is False.
+        """
+        self._check()
+        mask = self.aers.get(addon, 0)
+        if geodata:
+            mask |= self.geodata.get(addon, 0)
+        return _mask_regions(mask)
+
+
+region_exclusions = RegionExclusions()
+
+
 def get_excluded_in(region_id):
     """
     Return IDs of Webapp objects excluded from a particular region or excluded
     due to Geodata flags.
     """
-    aers = list(AddonExcludedRegion.objects.filter(region=region_id)
-                .values_list('addon', flat=True))
-
-    # For pre-IARC unrated games in Brazil/Germany.
-    geodata_qs = Q()
-    region = parse_region(region_id)
-    if region in (mkt.regions.BR, mkt.regions.DE):
-        geodata_qs |= Q(**{'region_%s_iarc_exclude' % region.slug: True})
-    # For USK_RATING_REFUSED apps in Germany.
-    if region == mkt.regions.DE:
-        geodata_qs |= Q(**{'region_de_usk_exclude': True})
-
-    geodata_exclusions = []
-    if geodata_qs:
-        geodata_exclusions = list(Geodata.objects.filter(geodata_qs)
-                                  .values_list('addon', flat=True))
-    return set(aers + geodata_exclusions)
+    return region_exclusions.get_excluded_in(region_id)
 
 
 @receiver(models.signals.post_save, sender=AddonExcludedRegion,
-          dispatch_uid='clean_memoized_exclusions')
-def clean_memoized_exclusions(sender, **kw):
+          dispatch_uid='update_region_exclusions')
+@receiver(models.signals.post_delete, sender=AddonExcludedRegion,
+          dispatch_uid='update_region_exclusions_delete')
+def update_region_exclusions(sender, instance, **kw):
     if not kw.get('raw'):
-        for k in mkt.regions.ALL_REGION_IDS:
-            cache.delete_many([memoize_key('get_excluded_in', k)
-                               for k in mkt.regions.ALL_REGION_IDS])
+        region_exclusions.update(instance.addon_id,
+                                 aers=_aer_exclusions(instance.addon_id))
 
 
 class IARCInfo(amo.models.ModelBase):
@@ -2260,6 +2573,9 @@ class AppFeatures(amo.models.ModelBase, DynamicBoolFieldsMixin):
     stating if an app requires a particular feature.
     """
     version = models.OneToOneField(Version, related_name='features')
+    # Bitfield of the required features, kept in sync with the flags, to
+    # filter apps by feature profile with a single bitwise check.
+    features_mask = models.BigIntegerField(default=0)
     field_source = APP_FEATURES
 
     class Meta:
@@ -2309,6 +2625,10 @@ class AppFeatures(amo.models.ModelBase, DynamicBoolFieldsMixin):
         return '%x.%s.%s' % (int(profile, 2), len(profile),
                              settings.APP_FEATURES_VERSION)
 
+    def to_profile(self):
+        """Returns a FeatureProfile of the features required by the app."""
+        return FeatureProfile(**dict((f[4:], True) for f in self.to_keys()))
+
 
 # Add a dynamic field to `AppFeatures` model for each buchet feature.
 for k, v in APP_FEATURES.iteritems():
@@ -2316,6 +2636,13 @@ for k, v in APP_FEATURES.iteritems():
     field.contribute_to_class(AppFeatures, 'has_%s' % k.lower())
 
 
+@receiver(models.signals.pre_save, sender=AppFeatures,
+          dispatch_uid='app_features_mask')
+def update_features_mask(sender, instance, **kw):
+    # This also catches .update() calls, which send pre_save.
+    instance.features_mask = instance.to_profile().to_int()
+
+
 class AppManifest(amo.models.ModelBase):
     """
     Storage for manifests.
@@ -2464,3 +2791,14 @@ for region in (mkt.regions.BR, mkt.regions.DE):
 # Save geodata translations when a Geodata instance is saved.
 models.signals.pre_save.connect(save_signal, sender=Geodata,
                                 dispatch_uid='geodata_translations')
+
+
+@receiver(models.signals.post_save, sender=Geodata,
+          dispatch_uid='update_geodata_region_exclusions')
+def update_geodata_region_exclusions(sender, instance, **kw):
+    if not kw.get('raw'):
+        region_exclusions.update(instance.addon_id,
+                                 geodata=_geodata_exclusions(
+                                     instance.region_de_iarc_exclude,
+                                     instance.region_de_usk_exclude,
+                                     instance.region_br_iarc_exclude))
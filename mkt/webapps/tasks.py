@@ -1,14 +1,23 @@
 import datetime
 import hashlib
+import itertools
 import json
 import logging
 import os
 import shutil
 import subprocess
+import tarfile
 import time
+import traceback
+import urlparse
+from collections import defaultdict
+from contextlib import closing
+from cStringIO import StringIO
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.template import Context, loader
 
@@ -17,6 +26,7 @@ import requests
 from celery import chord
 from celery.exceptions import RetryTaskError
 from celeryutils import task
+from django_statsd.clients import statsd
 from pyelasticsearch.exceptions import ElasticHttpNotFoundError
 from requests.exceptions import RequestException
 from test_utils import RequestFactory
@@ -38,15 +48,31 @@ from users.models import UserProfile
 from users.utils import get_task_user
 
 import mkt
+from mkt.api.models import (invalidate_api_responses,
+                            invalidate_app_api_responses)
 from mkt.constants.regions import RESTOFWORLD
-from mkt.developers.tasks import (_fetch_manifest, fetch_icon, pngcrush_image,
+from mkt.developers.tasks import (_fetch_manifest, fetch_icon,
+                                  ManifestNotModified, pngcrush_images,
                                   resize_preview, validator)
-from mkt.webapps.models import AppManifest, Webapp, WebappIndexer
+from mkt.webapps.models import (AppManifest, Geodata, Installed, Trending,
+                                Webapp, WebappIndexer)
 from mkt.webapps.utils import get_locale_properties
 
 
 task_log = logging.getLogger('z.task')
 
+# Combining the shards of the public data export and streaming the user
+# installs export take a while.
+export_time_limits = settings.CELERY_TIME_LIMITS[
+    'mkt.webapps.tasks.combine_export']
+installs_time_limits = settings.CELERY_TIME_LIMITS[
+    'mkt.webapps.tasks.dump_user_installs']
+
+# ETag and Last-Modified of the last manifest we processed for each app, to
+# send conditional requests when updating manifests.
+MANIFEST_VALIDATORS_KEY = 'webapps:manifest-validators:%s'
+MANIFEST_VALIDATORS_TIMEOUT = 60 * 60 * 24 * 7
+
 
 def _get_content_hash(content):
     return 'sha256:%s' % hashlib.sha256(content).hexdigest()
@@ -71,8 +97,9 @@ def update_manifests(ids, **kw):
     # we'll need to log in as user.
     amo.set_user(get_task_user())
 
+    fetched = _fetch_manifests(ids, check_hash)
     for id in ids:
-        _update_manifest(id, check_hash, retries)
+        _update_manifest(id, check_hash, retries, fetched=fetched.get(id))
     if retries:
         try:
             update_manifests.retry(args=(retries.keys(),),
@@ -87,6 +114,96 @@ def update_manifests(ids, **kw):
     return retries
 
 
+def _get_manifest_validators(ids):
+    """Return the validators stored for the apps, as {id: validators}."""
+    keys = dict((MANIFEST_VALIDATORS_KEY % id, id) for id in ids)
+    return dict((keys[key], validators) for key, validators in
+                cache.get_many(keys.keys()).items())
+
+
+def _set_manifest_validators(webapp, validators, hash_):
+    """
+    Store the validators of the manifest we just processed, along with its
+    hash and URL so that they are only used for that same manifest.
+    """
+    if validators:
+        cache.set(MANIFEST_VALIDATORS_KEY % webapp.id,
+                  dict(validators, url=webapp.manifest_url, hash=hash_),
+                  MANIFEST_VALIDATORS_TIMEOUT)
+
+
+def _fetch_app_manifest(url, stored=None):
+    """
+    Fetch the manifest at `url`, conditionally if `stored` holds validators of
+    the manifest at that same URL.
+
+    Returns a (content, validators, error, traceback) tuple. `content` is None
+    if the manifest was not modified or if fetching it failed with `error`.
+    """
+    validators = {}
+    if stored and stored.get('url') == url:
+        validators = dict((header, stored[header]) for header in
+                          ('etag', 'last-modified') if stored.get(header))
+    try:
+        with statsd.timer('webapps.update_manifest.fetch'):
+            content = _fetch_manifest(url, validators=validators)
+    except ManifestNotModified:
+        return None, validators, None, None
+    except Exception, e:
+        # Keep the traceback, the fetch may run in another thread.
+        return None, None, e, traceback.format_exc()
+    return content, validators, None, None
+
+
+def _fetch_manifests(ids, check_hash):
+    """
+    Fetch the manifests of the apps concurrently, over a pool of at most
+    UPDATE_MANIFESTS_POOL_SIZE threads. Returns {id: fetched}, see
+    `_fetch_app_manifest()` for the values.
+    """
+    webapps = list(Webapp.objects.filter(pk__in=ids)
+                                 .exclude(manifest_url=None)
+                                 .values_list('id', 'manifest_url'))
+    if not webapps:
+        return {}
+    stored = _get_manifest_validators(ids) if check_hash else {}
+
+    def fetch(webapp):
+        id, url = webapp
+        start = time.time()
+        fetched = _fetch_app_manifest(url, stored.get(id))
+        return id, url, time.time() - start, fetched
+
+    pool = ThreadPool(min(len(webapps), settings.UPDATE_MANIFESTS_POOL_SIZE))
+    try:
+        results = pool.map(fetch, webapps)
+    finally:
+        pool.close()
+        pool.join()
+
+    _log_fetch_times([(url, elapsed, fetched[2] is not None)
+                      for id, url, elapsed, fetched in results])
+    return dict((id, fetched) for id, url, elapsed, fetched in results)
+
+
+def _log_fetch_times(fetches):
+    """
+    Log how many manifests were fetched from each host, how long it took and
+    how many fetches failed, given (url, seconds, failed) tuples. The statsd
+    timer only has the overall timings, a key per host would be too many.
+    """
+    hosts = defaultdict(list)
+    for url, elapsed, failed in fetches:
+        host = urlparse.urlparse(url).hostname or 'unknown'
+        hosts[host].append((elapsed, failed))
+    for host, times in sorted(hosts.items()):
+        elapsed = sorted(seconds for seconds, failed in times)
+        task_log.info(
+            'Fetched %s manifests from %s: p50 %0.2fs, max %0.2fs, %s failed.'
+            % (len(elapsed), host, elapsed[len(elapsed) // 2], elapsed[-1],
+               sum(1 for seconds, failed in times if failed)))
+
+
 def notify_developers_of_failure(app, error_message, has_link=False):
     if (app.status not in amo.WEBAPPS_APPROVED_STATUSES or
         RereviewQueue.objects.filter(addon=app).exists()):
@@ -115,7 +232,7 @@ def notify_developers_of_failure(app, error_message, has_link=False):
                             context, recipient_list=to)
 
 
-def _update_manifest(id, check_hash, failed_fetches):
+def _update_manifest(id, check_hash, failed_fetches, fetched=None):
     webapp = Webapp.objects.get(pk=id)
     version = webapp.versions.latest()
     file_ = version.files.latest()
@@ -125,12 +242,26 @@ def _update_manifest(id, check_hash, failed_fetches):
         _log(webapp, u'Ignoring, no existing file')
         return
 
-    # Fetch manifest, catching and logging any exception.
-    try:
-        content = _fetch_manifest(webapp.manifest_url)
-    except Exception, e:
+    stored = None
+    if check_hash:
+        stored = _get_manifest_validators([id]).get(id)
+        # The validators are only good for the manifest we have.
+        if stored and stored.get('hash') != file_.hash:
+            stored = None
+    if fetched is None or (fetched[0] is None and fetched[2] is None and
+                           not stored):
+        # Not fetched yet, or "not modified" since a manifest we don't have.
+        fetched = _fetch_app_manifest(webapp.manifest_url, stored)
+    content, validators, error, tb = fetched
+
+    if content is None and error is None:
+        _log(webapp, u'Manifest not modified')
+        return
+
+    # Log any exception we got fetching the manifest.
+    if error is not None:
         msg = u'Failed to get manifest from %s. Error: %s' % (
-            webapp.manifest_url, e)
+            webapp.manifest_url, error)
         failed_fetches[id] = failed_fetches.get(id, 0) + 1
         if failed_fetches[id] == 3:
             # This is our 3rd attempt, let's send the developer(s) an email to
@@ -139,20 +270,21 @@ def _update_manifest(id, check_hash, failed_fetches):
         elif failed_fetches[id] >= 4:
             # This is our 4th attempt, we should already have notified the
             # developer(s). Let's put the app in the re-review queue.
-            _log(webapp, msg, rereview=True, exc_info=True)
+            _log(webapp, u'%s\n%s' % (msg, tb), rereview=True)
             if webapp.status in amo.WEBAPPS_APPROVED_STATUSES:
                 RereviewQueue.flag(webapp, amo.LOG.REREVIEW_MANIFEST_CHANGE,
                                    msg)
             del failed_fetches[id]
         else:
-            _log(webapp, msg, rereview=False, exc_info=True)
+            _log(webapp, u'%s\n%s' % (msg, tb), rereview=False)
         return
 
     # Check hash.
+    hash_ = _get_content_hash(content)
     if check_hash:
-        hash_ = _get_content_hash(content)
         if file_.hash == hash_:
             _log(webapp, u'Manifest the same')
+            _set_manifest_validators(webapp, validators, hash_)
             return
         _log(webapp, u'Manifest different')
 
@@ -193,6 +325,8 @@ def _update_manifest(id, check_hash, failed_fetches):
         webapp.manifest_updated(content, upload)
     except:
         _log(webapp, u'Failed to create version', exc_info=True)
+    else:
+        _set_manifest_validators(webapp, validators, hash_)
 
     # Check for any name changes at root and in locales. If any were added or
     # updated, send to re-review queue.
@@ -295,7 +429,7 @@ def update_supported_locales(ids, **kw):
                 _log(app, u'Updating supported locales failed.', exc_info=True)
 
 
-@post_request_task(acks_late=True)
+@post_request_task(acks_late=True, merge_ids=True)
 @write
 def index_webapps(ids, **kw):
     task_log.info('Indexing apps %s-%s. [%s]' % (ids[0], ids[-1], len(ids)))
@@ -308,13 +442,17 @@ def index_webapps(ids, **kw):
     es = WebappIndexer.get_es(urls=settings.ES_URLS)
     qs = Webapp.indexing_transformer(Webapp.with_deleted.no_cache().filter(
         id__in=ids))
-    for obj in qs:
-        doc = WebappIndexer.extract_document(obj.id, obj)
+    slugs = []
+    for doc in WebappIndexer.extract_documents(ids, objs=qs):
         for idx in indices:
-            WebappIndexer.index(doc, id_=obj.id, es=es, index=idx)
+            WebappIndexer.index(doc, id_=doc['id'], es=es, index=idx)
+        slugs.append(doc['app_slug'])
+    # The cached anonymous API responses may be showing these apps.
+    invalidate_api_responses()
+    invalidate_app_api_responses(list(ids) + slugs)
 
 
-@post_request_task(acks_late=True)
+@post_request_task(acks_late=True, merge_ids=True)
 @write
 def unindex_webapps(ids, **kw):
     if not ids:
@@ -336,6 +474,10 @@ def unindex_webapps(ids, **kw):
                 # Ignore if it's not there.
                 task_log.info(
                     u'[Webapp:%s] Unindexing app but not found in index' % id_)
+    invalidate_api_responses()
+    invalidate_app_api_responses(
+        list(ids) + list(Webapp.with_deleted.no_cache().filter(id__in=ids)
+                         .values_list('app_slug', flat=True)))
 
 
 @task
@@ -393,26 +535,152 @@ def rm_directory(path):
         shutil.rmtree(path)
 
 
-def dump_all_apps_tasks():
-    all_pks = (Webapp.objects.visible()
-                             .values_list('pk', flat=True)
-                             .order_by('pk'))
-    return [dump_apps.si(pks) for pks in chunked(all_pks, 100)]
+def _export_request():
+    req = RequestFactory().get('/')
+    req.user = AnonymousUser()
+    req.REGION = RESTOFWORLD
+    return req
+
+
+def _export_apps(pks, chunk_size=100):
+    """
+    Yield the path and JSON of the apps `pks`, reading them `chunk_size` at a
+    time along with their related objects.
+    """
+    from mkt.webapps.api import AppSerializer
+    req = _export_request()
+    for ids in chunked(pks, chunk_size):
+        apps = list(Webapp.objects.no_cache().filter(pk__in=ids)
+                                             .order_by('pk'))
+        geodata = dict((g.addon_id, g) for g in
+                       Geodata.objects.no_cache().filter(addon__in=ids))
+        for app in apps:
+            if app.pk in geodata:
+                app._geodata = geodata[app.pk]
+            res = AppSerializer(app, context={'request': req}).data
+            yield (os.path.join('apps', str(app.pk / 1000),
+                                '%s.json' % app.pk),
+                   json.dumps(res, cls=JSONEncoder))
+
+
+def _export_collections():
+    """Yield the path and JSON of every public collection."""
+    from mkt.collections.models import Collection
+    from mkt.collections.tasks import collection_data, object_path
+    for collection in Collection.public.order_by('pk').iterator():
+        yield (os.path.join('collections', object_path(collection)),
+               json.dumps(collection_data(collection), cls=JSONEncoder))
+
+
+def _export_extra_files(kind, date):
+    context = Context({'date': date, 'url': settings.SITE_URL})
+    for f in ('license.txt', 'readme.txt'):
+        template = loader.get_template('webapps/dump/%s/%s' % (kind, f))
+        yield f, template.render(context).encode('utf-8')
+
+
+def _add_members(tar, members):
+    """Add the `(path, content)` pairs of `members` to the `tar` file."""
+    for path, content in members:
+        info = tarfile.TarInfo(path)
+        info.size = len(content)
+        info.mtime = time.time()
+        tar.addfile(info, StringIO(content))
+
+
+def _read_members(paths):
+    """Yield the `(path, content)` pairs of the tar files at `paths`."""
+    for path in paths:
+        with closing(tarfile.open(path)) as tar:
+            for info in tar:
+                yield info.name, tar.extractfile(info).read()
+
+
+def _write_export(root, filename, members):
+    """
+    Write the `(path, content)` pairs of `members` to the `filename` tarball
+    of `root` as they come, without writing them to disk first.
+    """
+    # Note: not using storage because all these operations should be local.
+    target_dir = os.path.join(root, 'tarballs')
+    target_file = os.path.join(target_dir, filename + '.tgz')
+    tmp_file = target_file + '.tmp'
+
+    if not os.path.exists(target_dir):
+        os.makedirs(target_dir)
+
+    task_log.info(u'Creating dump {0}'.format(target_file))
+    try:
+        with closing(tarfile.open(tmp_file, 'w:gz')) as tar:
+            _add_members(tar, members)
+    except Exception:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    # Only replace a previous dump once the new one is complete.
+    os.rename(tmp_file, target_file)
+    return target_file
+
+
+def _export_shards_dir(name):
+    return os.path.join(settings.DUMPED_APPS_PATH, 'shards-%s' % name)
+
+
+@task(ignore_result=False)
+def export_apps_shard(pks, name, shard, **kw):
+    """
+    Write the apps `pks` to the `shard`th tar file of the `name` export. The
+    shards are uncompressed, combine_export() compresses the whole export.
+    """
+    target_dir = _export_shards_dir(name)
+    target_file = os.path.join(target_dir, '%05d.tar' % shard)
+    task_log.info(u'Exporting apps {0} to {1}. [{2}]'
+                  .format(pks[0], pks[-1], len(pks)))
+    if not os.path.exists(target_dir):
+        try:
+            os.makedirs(target_dir)
+        except OSError:
+            pass  # Catch race condition if the directory exists now.
+    with closing(tarfile.open(target_file, 'w')) as tar:
+        _add_members(tar, _export_apps(pks))
+    return target_file
+
+
+@task(time_limit=export_time_limits['hard'],
+      soft_time_limit=export_time_limits['soft'])
+def combine_export(shards, name, date, **kw):
+    """
+    Write the `name` export tarball from the app `shards`, in order, followed
+    by the collections and the extra files.
+    """
+    members = itertools.chain(_read_members(shards), _export_collections(),
+                              _export_extra_files('apps', date))
+    try:
+        with statsd.timer('webapps.export_data'):
+            return _write_export(settings.DUMPED_APPS_PATH, name, members)
+    finally:
+        rm_directory(_export_shards_dir(name))
 
 
 @task
 def export_data(name=None):
-    from mkt.collections.tasks import dump_all_collections_tasks
+    """
+    Export the public data: the apps are serialized in parallel, 100 at a
+    time, into shards that combine_export() then writes to a single tarball.
+    """
     today = datetime.datetime.today().strftime('%Y-%m-%d')
     if name is None:
         name = today
-    root = settings.DUMPED_APPS_PATH
-    directories = ['apps', 'collections']
-    for directory in directories:
-        rm_directory(os.path.join(root, directory))
-    files = directories + compile_extra_files(date=today)
-    chord(dump_all_apps_tasks() + dump_all_collections_tasks(),
-          compress_export.si(filename=name, files=files)).apply_async()
+    rm_directory(_export_shards_dir(name))
+    pks = list(Webapp.objects.visible().values_list('pk', flat=True)
+                                       .order_by('pk'))
+    shards = [export_apps_shard.si(ids, name, i)
+              for i, ids in enumerate(chunked(pks, 100))]
+    callback = combine_export.s(name=name, date=today)
+    if shards:
+        chord(shards, callback).apply_async()
+    else:
+        callback.delay([])
 
 
 def compile_extra_files(date):
@@ -447,80 +715,60 @@ def compress_export(filename, files):
     return target_file
 
 
-@task(ignore_result=False)
-def dump_user_installs(ids, **kw):
-    task_log.info(u'Dumping user installs {0} to {1}. [{2}]'
-                  .format(ids[0], ids[-1], len(ids)))
-
-    for user_id in ids:
-        try:
-            user = UserProfile.objects.get(pk=user_id)
-        except UserProfile.DoesNotExist:
-            task_log.info('User profile does not exist: {0}'.format(user_id))
-            continue
-
-        hash = hashlib.sha256('%s%s' % (str(user.id),
-                                        settings.SECRET_KEY)).hexdigest()
-        target_dir = os.path.join(settings.DUMPED_USERS_PATH, 'users', hash[0])
-        target_file = os.path.join(target_dir, '%s.json' % hash)
-
-        if not os.path.exists(target_dir):
-            try:
-                os.makedirs(target_dir)
-            except OSError:
-                pass  # Catch race condition if file exists now.
-
-        # Gather data about user.
-        installed = []
-        zone = pytz.timezone(settings.TIME_ZONE)
-        for install in user.installed_set.filter(addon__type=amo.ADDON_WEBAPP):
-            try:
-                app = install.addon
-            except Addon.DoesNotExist:
+def _export_user_installs(chunk_size=1000):
+    """
+    Yield the path and JSON of the apps installed by each user, reading the
+    installs of `chunk_size` users at a time.
+    """
+    zone = pytz.timezone(settings.TIME_ZONE)
+    user_ids = sorted(set(Installed.objects
+                          .filter(addon__type=amo.ADDON_WEBAPP)
+                          .values_list('user', flat=True)))
+    for ids in chunked(user_ids, chunk_size):
+        installed = defaultdict(list)
+        installs = (Installed.objects.filter(user__in=ids,
+                                             addon__type=amo.ADDON_WEBAPP)
+                    .values_list('user', 'addon', 'addon__status',
+                                 'addon__app_slug', 'created')
+                    .order_by('pk'))
+        for user_id, app_id, status, slug, created in installs:
+            # We can't recommend deleted apps, so don't include them.
+            if status == amo.STATUS_DELETED:
                 continue
-
-            installed.append({
-                'id': app.id,
-                'slug': app.app_slug,
+            installed[user_id].append({
+                'id': app_id,
+                'slug': slug,
                 'installed': pytz.utc.normalize(
-                    zone.localize(install.created)).strftime(
-                        '%Y-%m-%dT%H:%M:%S')
+                    zone.localize(created)).strftime('%Y-%m-%dT%H:%M:%S')
             })
 
-        data = {
-            'user': hash,
-            'region': user.region,
-            'lang': user.lang,
-            'installed_apps': installed,
-        }
-
-        task_log.info('Dumping user {0} to {1}'.format(user.id, target_file))
-        json.dump(data, open(target_file, 'w'), cls=JSONEncoder)
-
-
-@task
-def zip_users(*args, **kw):
-    # Note: not using storage because all these operations should be local.
+        users = (UserProfile.objects.filter(pk__in=ids)
+                 .values_list('pk', 'region', 'lang').order_by('pk'))
+        for user_id, region, lang in users:
+            hash = hashlib.sha256('%s%s' % (str(user_id),
+                                            settings.SECRET_KEY)).hexdigest()
+            data = {
+                'user': hash,
+                'region': region,
+                'lang': lang,
+                'installed_apps': installed[user_id],
+            }
+            yield (os.path.join('users', hash[0], '%s.json' % hash),
+                   json.dumps(data, cls=JSONEncoder))
+
+
+@task(time_limit=installs_time_limits['hard'],
+      soft_time_limit=installs_time_limits['soft'])
+def dump_user_installs(name=None):
     today = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-    target_dir = os.path.join(settings.DUMPED_USERS_PATH, 'tarballs')
-    target_file = os.path.join(target_dir, '{0}.tgz'.format(today))
-
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
-
-    # Put some .txt files in place.
-    context = Context({'date': today, 'url': settings.SITE_URL})
-    files = ['license.txt', 'readme.txt']
-    for f in files:
-        template = loader.get_template('webapps/dump/users/' + f)
-        dest = os.path.join(settings.DUMPED_USERS_PATH, 'users', f)
-        open(dest, 'w').write(template.render(context))
-
-    cmd = ['tar', 'czf', target_file, '-C',
-           settings.DUMPED_USERS_PATH, 'users']
-    task_log.info(u'Creating user dump {0}'.format(target_file))
-    subprocess.call(cmd)
-    return target_file
+    if name is None:
+        name = today
+    members = itertools.chain(
+        _export_user_installs(),
+        ((os.path.join('users', f), content) for f, content in
+         _export_extra_files('users', today)))
+    with statsd.timer('webapps.dump_user_installs'):
+        return _write_export(settings.DUMPED_USERS_PATH, name, members)
 
 
 def _fix_missing_icons(id):
@@ -563,16 +811,20 @@ def _regenerate_icons_and_thumbnails(pk):
         # enough for us to generate a thumbnail.
         resize_preview.delay(preview.image_path, preview, generate_image=False)
 
-    # Icons. The only thing we need to do is crush the 64x64 icon.
+    # Icons. The only thing we need to do is crush the 64x64 icon, return its
+    # path so that the icons can be crushed together.
     icon_path = os.path.join(webapp.get_icon_dir(), '%s-64.png' % webapp.id)
-    pngcrush_image.delay(icon_path)
+    if storage.exists(icon_path):
+        return icon_path
 
 
 @task
 @write
 def regenerate_icons_and_thumbnails(ids, **kw):
-    for pk in ids:
-        _regenerate_icons_and_thumbnails(pk);
+    icon_paths = filter(None, [_regenerate_icons_and_thumbnails(pk)
+                               for pk in ids])
+    if icon_paths:
+        pngcrush_images.delay(icon_paths)
 
 
 @task
@@ -602,149 +854,135 @@ def import_manifests(ids, **kw):
                               '%s: %s' % (app.id, version.id, e))
 
 
-def _get_trending(app_id, region=None):
+def _trending_value(count_1, count_3):
     """
-    Calculate trending.
-
-    a = installs from 7 days ago to now
-    b = installs from 28 days ago to 8 days ago, averaged per week
-
-    trending = (a - b) / b if a > 100 and b > 1 else 0
+    Calculate trending from the installs of the past week, `count_1`, and the
+    average weekly installs of the 3 weeks before, `count_3`.
 
     """
-    client = get_monolith_client()
+    if count_1 > 100 and count_3 > 1:
+        return (count_1 - count_3) / count_3
+    return 0.0
 
-    kwargs = {'app-id': app_id}
-    if region:
-        kwargs['region'] = region.slug
 
-    today = datetime.datetime.today()
+def _get_installs(ids, periods, regions=()):
+    """
+    Get the installs of several apps over several periods with a single
+    Monolith query.
 
-    # If we query monolith with interval=week and the past 7 days
-    # crosses a Monday, Monolith splits the counts into two. We want
-    # the sum over the past week so we need to `sum` these.
-    try:
-        count_1 = sum(
-            c['count'] for c in
-            client('app_installs', days_ago(7), today, 'week', **kwargs)
-            if c.get('count'))
-    except ValueError as e:
-        task_log.info('Call to ES failed: {0}'.format(e))
-        count_1 = 0
+    `periods` is a dict of `name: (start, end)` datetimes, `None` meaning no
+    bound. Installs are counted across all regions and in each of `regions`.
 
-    # If count_1 isn't more than 100, stop here to avoid extra Monolith calls.
-    if not count_1 > 100:
-        return 0.0
+    Returns a dict of `(name, region id, app id): installs`, where the region
+    id is 0 for the installs across all regions. Apps without installs are
+    left out.
 
-    # Get the average installs for the prior 3 weeks. Don't use the `len` of
-    # the returned counts because of week boundaries.
-    try:
-        count_3 = sum(
-            c['count'] for c in
-            client('app_installs', days_ago(28), days_ago(8), 'week', **kwargs)
-            if c.get('count')) / 3
-    except ValueError as e:
-        task_log.info('Call to ES failed: {0}'.format(e))
-        count_3 = 0
-
-    if count_3 > 1:
-        return (count_1 - count_3) / count_3
-    else:
-        return 0.0
+    """
+    facets = {}
+    for name, (start, end) in periods.items():
+        date_range = {}
+        if start:
+            date_range['gte'] = start.date().strftime('%Y-%m-%d')
+        if end:
+            date_range['lte'] = end.date().strftime('%Y-%m-%d')
+
+        for region in [None] + list(regions):
+            filters = [{'terms': {'app-id': list(ids)}}]
+            if date_range:
+                filters.append({'range': {'date': date_range}})
+            if region:
+                filters.append({'term': {'region': region.slug}})
+            facets['%s-%s' % (name, region.id if region else 0)] = {
+                'terms_stats': {'key_field': 'app-id',
+                                'value_field': 'app_installs',
+                                'size': len(ids)},
+                'facet_filter': {'and': filters}}
+
+    resp = get_monolith_client().raw({'query': {'match_all': {}},
+                                      'facets': facets,
+                                      'size': 0})
+
+    installs = {}
+    for key, facet in resp.get('facets', {}).items():
+        name, region_id = key.rsplit('-', 1)
+        for entry in facet.get('terms', []):
+            installs[name, int(region_id), int(entry['term'])] = (
+                entry.get('total', 0))
+    return installs
 
 
 @task
 @write
 def update_trending(ids, **kw):
-    count = 0
-    times = []
+    """
+    Update global and per region trending of the apps.
 
-    for app in Webapp.objects.filter(id__in=ids).no_transforms():
+    The installs of all the apps are fetched at once and only the trending
+    values that changed are written.
 
-        count += 1
-        t_start = time.time()
+    """
+    t_start = time.time()
+    regions = mkt.regions.REGIONS_DICT.values()
 
-        # Calculate global trending, then per-region trending below.
-        value = _get_trending(app.id)
-        if value:
-            trending, created = app.trending.get_or_create(
-                region=0, defaults={'value': value})
-            if not created:
-                trending.update(value=value)
+    try:
+        installs = _get_installs(ids, {
+            'week': (days_ago(7), datetime.datetime.today()),
+            'prior': (days_ago(28), days_ago(8))}, regions)
+    except Exception as e:
+        task_log.info('Call to ES failed: {0}'.format(e))
+        return
 
-        for region in mkt.regions.REGIONS_DICT.values():
-            value = _get_trending(app.id, region)
-            if value:
-                trending, created = app.trending.get_or_create(
-                    region=region.id, defaults={'value': value})
-                if not created:
-                    trending.update(value=value)
+    existing = dict(((t.addon_id, t.region), t)
+                    for t in Trending.objects.filter(addon__in=ids))
+    created = []
+    updated = 0
+
+    for app_id in Webapp.objects.filter(id__in=ids).values_list('id',
+                                                                 flat=True):
+        for region_id in [0] + [region.id for region in regions]:
+            value = _trending_value(
+                installs.get(('week', region_id, app_id), 0),
+                installs.get(('prior', region_id, app_id), 0) / 3.0)
+            # Like before, apps without trending keep their previous value.
+            if not value:
+                continue
+            trending = existing.get((app_id, region_id))
+            if trending is None:
+                created.append(Trending(addon_id=app_id, region=region_id,
+                                        value=value))
+            elif trending.value != value:
+                Trending.objects.filter(pk=trending.pk).update(value=value)
+                updated += 1
 
-        times.append(time.time() - t_start)
+    Trending.objects.bulk_create(created)
 
-    task_log.info('Trending calculated for %s apps. Avg time overall: '
-                  '%0.2fs' % (count, sum(times) / count))
+    task_log.info('Trending calculated for %s apps in %0.2fs: %s created, '
+                  '%s updated.' % (len(ids), time.time() - t_start,
+                                   len(created), updated))
 
 
 @task
 @write
 def update_downloads(ids, **kw):
-    client = get_monolith_client()
-    count = 0
+    """
+    Update the weekly and total downloads of the apps.
 
-    for app in Webapp.objects.filter(id__in=ids).no_transforms():
+    The installs of all the apps are fetched at once and only the apps whose
+    downloads changed are written.
 
-        appid = {'app-id': app.id}
-
-        # Get weekly downloads.
-        query = {
-            'query': {'match_all': {}},
-            'facets': {
-                'installs': {
-                    'date_histogram': {
-                        'value_field': 'app_installs',
-                        'interval': 'week',
-                        'key_field': 'date',
-                    },
-                    'facet_filter': {
-                        'and': [
-                            {'term': appid},
-                            {'range': {'date': {
-                                'gte': days_ago(8).date().strftime('%Y-%m-%d'),
-                                'lte': days_ago(1).date().strftime('%Y-%m-%d'),
-                            }}}
-                        ]
-                    }
-                }
-            },
-            'size': 0}
+    """
+    try:
+        installs = _get_installs(ids, {'weekly': (days_ago(8), days_ago(1)),
+                                       'total': (None, None)})
+    except Exception as e:
+        task_log.info('Call to ES failed: {0}'.format(e))
+        return
 
-        try:
-            resp = client.raw(query)
-            # If we query monolith with interval=week and the past 7 days
-            # crosses a Monday, Monolith splits the counts into two. We want
-            # the sum over the past week so we need to `sum` these.
-            weekly = sum(
-                c['total'] for c in
-                resp.get('facets', {}).get('installs', {}).get('entries')
-                if c.get('total'))
-        except Exception as e:
-            task_log.info('Call to ES failed: {0}'.format(e))
-            weekly = 0
-
-        # Get total downloads.
-        query = {'query': {'match_all': {}},
-                 'facets': {
-                     'installs': {
-                         'statistical': {'field': 'app_installs'},
-                         'facet_filter': {'term': appid}}},
-                 'size': 0}
-        try:
-            resp = client.raw(query)
-            total = resp.get('facets', {}).get('installs', {}).get('total', 0)
-        except Exception as e:
-            task_log.info('Call to ES failed: {0}'.format(e))
-            total = 0
+    count = 0
+
+    for app in Webapp.objects.filter(id__in=ids).no_transforms():
+        weekly = installs.get(('weekly', 0, app.id), 0)
+        total = installs.get(('total', 0, app.id), 0)
 
         # Update Webapp object, if needed.
         update = False
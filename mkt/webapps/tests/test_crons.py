@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
-from datetime import date
+from datetime import datetime
 
 from django.conf import settings
 from django.core.files.storage import default_storage as storage
@@ -18,7 +18,7 @@ from mkt.site.fixtures import fixture
 from mkt.webapps.cron import (clean_old_signed, update_app_trending,
                               update_downloads)
 from mkt.webapps.models import Webapp
-from mkt.webapps.tasks import _get_trending
+from mkt.webapps.tasks import _get_installs, _trending_value
 
 
 class TestWeeklyDownloads(amo.tests.TestCase):
@@ -30,25 +30,26 @@ class TestWeeklyDownloads(amo.tests.TestCase):
     def get_app(self):
         return Webapp.objects.get(pk=self.app.pk)
 
-    @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_weekly_downloads(self, _mock):
-        client = mock.Mock()
-        raw = {
+    def facets(self, weekly, total):
+        return {
             'facets': {
-                'installs': {
-                    '_type': 'date_histogram',
-                    'entries': [
-                        {'count': 3,
-                         'time': 1390780800000,
-                         'total': 19.0},
-                        {'count': 62,
-                         'time': 1391385600000,
-                         'total': 236.0}
-                    ]
+                'weekly-0': {
+                    '_type': 'terms_stats',
+                    'terms': [{'term': self.app.pk, 'count': 65,
+                               'total': weekly}]
+                },
+                'total-0': {
+                    '_type': 'terms_stats',
+                    'terms': [{'term': self.app.pk, 'count': 49,
+                               'total': total}]
                 }
             }
         }
-        client.raw.return_value = raw
+
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_weekly_downloads(self, _mock):
+        client = mock.Mock()
+        client.raw.return_value = self.facets(255.0, 6638.0)
         _mock.return_value = client
 
         eq_(self.app.weekly_downloads, 0)
@@ -61,16 +62,7 @@ class TestWeeklyDownloads(amo.tests.TestCase):
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_total_downloads(self, _mock):
         client = mock.Mock()
-        raw = {
-            'facets': {
-                'installs': {
-                    u'_type': u'statistical',
-                    u'count': 49,
-                    u'total': 6638.0
-                }
-            }
-        }
-        client.raw.return_value = raw
+        client.raw.return_value = self.facets(255.0, 6638.0)
         _mock.return_value = client
 
         eq_(self.app.total_downloads, 0)
@@ -80,18 +72,36 @@ class TestWeeklyDownloads(amo.tests.TestCase):
         self.app.reload()
         eq_(self.app.total_downloads, 6638)
 
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_single_query(self, _mock):
+        client = mock.Mock()
+        client.raw.return_value = {}
+        _mock.return_value = client
+        app = Webapp.objects.create(type=amo.ADDON_WEBAPP,
+                                    status=amo.STATUS_PUBLIC)
+
+        update_downloads([self.app.pk, app.pk])
+
+        eq_(client.raw.call_count, 1)
+        facets = client.raw.call_args[0][0]['facets']
+        eq_(sorted(facets.keys()), ['total-0', 'weekly-0'])
+        eq_(facets['total-0']['facet_filter'],
+            {'and': [{'terms': {'app-id': [self.app.pk, app.pk]}}]})
+
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_monolith_error(self, _mock):
         client = mock.Mock()
         client.side_effect = ValueError
         client.raw.side_effect = Exception
         _mock.return_value = client
+        self.app.update(weekly_downloads=10, total_downloads=100)
 
         update_downloads([self.app.pk])
 
+        # The downloads are left alone.
         self.app.reload()
-        eq_(self.app.weekly_downloads, 0)
-        eq_(self.app.total_downloads, 0)
+        eq_(self.app.weekly_downloads, 10)
+        eq_(self.app.total_downloads, 100)
 
 
 class TestCleanup(amo.tests.TestCase):
@@ -153,52 +163,97 @@ class TestUpdateTrending(amo.tests.TestCase):
         self.app = Webapp.objects.create(type=amo.ADDON_WEBAPP,
                                          status=amo.STATUS_PUBLIC)
 
-    @mock.patch('mkt.webapps.tasks._get_trending')
+    def facets(self, week, prior):
+        facets = {}
+        regions = mkt.regions.REGIONS_DICT.values()
+        for region_id in [0] + [region.id for region in regions]:
+            facets['week-%s' % region_id] = {
+                'terms': [{'term': self.app.pk, 'total': week}]}
+            facets['prior-%s' % region_id] = {
+                'terms': [{'term': self.app.pk, 'total': prior}]}
+        return {'facets': facets}
+
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_trending_saved(self, _mock):
-        _mock.return_value = 12.0
+        client = mock.Mock()
+        # (255 - 255 / 3) / (255 / 3) = 2.0
+        client.raw.return_value = self.facets(255.0, 255.0)
+        _mock.return_value = client
         update_app_trending()
 
-        eq_(self.app.get_trending(), 12.0)
+        eq_(client.raw.call_count, 1)
+        eq_(self.app.get_trending(), 2.0)
         for region in mkt.regions.REGIONS_DICT.values():
-            eq_(self.app.get_trending(region=region), 12.0)
+            eq_(self.app.get_trending(region=region), 2.0)
 
         # Test running again updates the values as we'd expect.
-        _mock.return_value = 2.0
+        # (150 - 300 / 3) / (300 / 3) = 0.5
+        client.raw.return_value = self.facets(150.0, 300.0)
         update_app_trending()
-        eq_(self.app.get_trending(), 2.0)
+        eq_(self.app.get_trending(), 0.5)
         for region in mkt.regions.REGIONS_DICT.values():
-            eq_(self.app.get_trending(region=region), 2.0)
+            eq_(self.app.get_trending(region=region), 0.5)
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_get_trending(self, _mock):
+    def test_trending_threshold(self, _mock):
         client = mock.Mock()
-        client.return_value = [
-            {'count': 133.0, 'date': date(2013, 8, 26)},
-            {'count': 122.0, 'date': date(2013, 9, 2)},
-        ]
+        client.raw.return_value = self.facets(99.0, 3.0)
         _mock.return_value = client
+        update_app_trending()
+        eq_(self.app.trending.count(), 0)
 
-        # 1st week count: 133 + 122 = 255
-        # Prior 3 weeks get averaged: (133 + 122) / 3 = 85
-        # (255 - 85) / 85 = 2.0
-        eq_(_get_trending(self.app.id), 2.0)
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_get_installs(self, _mock):
+        client = mock.Mock()
+        client.raw.return_value = {'facets': {
+            'week-0': {'terms': [{'term': self.app.pk, 'total': 255.0}]},
+            'week-%s' % mkt.regions.US.id: {
+                'terms': [{'term': self.app.pk, 'total': 133.0}]}}}
+        _mock.return_value = client
+
+        installs = _get_installs(
+            [self.app.pk], {'week': (datetime(2013, 8, 26),
+                                     datetime(2013, 9, 2))},
+            [mkt.regions.US])
+        eq_(installs, {('week', 0, self.app.pk): 255.0,
+                       ('week', mkt.regions.US.id, self.app.pk): 133.0})
+
+        eq_(client.raw.call_count, 1)
+        facets = client.raw.call_args[0][0]['facets']
+        eq_(sorted(facets), ['week-0', 'week-%s' % mkt.regions.US.id])
+        eq_(facets['week-%s' % mkt.regions.US.id]['facet_filter'],
+            {'and': [{'terms': {'app-id': [self.app.pk]}},
+                     {'range': {'date': {'gte': '2013-08-26',
+                                         'lte': '2013-09-02'}}},
+                     {'term': {'region': mkt.regions.US.slug}}]})
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_get_trending_threshold(self, _mock):
+    def test_get_installs_unbounded(self, _mock):
         client = mock.Mock()
-        client.return_value = [
-            {'count': 49.0, 'date': date(2013, 8, 26)},
-            {'count': 50.0, 'date': date(2013, 9, 2)},
-        ]
+        client.raw.return_value = {}
         _mock.return_value = client
 
-        # 1st week count: 49 + 50 = 99
+        eq_(_get_installs([self.app.pk], {'total': (None, None)}), {})
+        facets = client.raw.call_args[0][0]['facets']
+        eq_(facets['total-0']['facet_filter'],
+            {'and': [{'terms': {'app-id': [self.app.pk]}}]})
+
+    def test_trending_value(self):
+        # 1st week count: 255
+        # Prior 3 weeks get averaged: 255 / 3 = 85
+        # (255 - 85) / 85 = 2.0
+        eq_(_trending_value(255.0, 85.0), 2.0)
+
+    def test_trending_value_threshold(self):
         # 99 is less than 100 so we return 0.0.
-        eq_(_get_trending(self.app.id), 0.0)
+        eq_(_trending_value(99.0, 33.0), 0.0)
+        # Too few prior installs to compare with.
+        eq_(_trending_value(255.0, 1.0), 0.0)
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_get_trending_monolith_error(self, _mock):
+    def test_trending_monolith_error(self, _mock):
         client = mock.Mock()
-        client.side_effect = ValueError
+        client.raw.side_effect = ValueError
         _mock.return_value = client
-        eq_(_get_trending(self.app.id), 0.0)
+        update_app_trending()
+        eq_(self.app.trending.count(), 0)
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core import mail
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.db.models.signals import post_delete, post_save
 from django.test.utils import override_settings
@@ -45,6 +46,7 @@ from versions.models import update_status, Version
 
 import mkt
 from mkt.constants import apps
+from mkt.constants.features import FeatureProfile
 from mkt.developers.models import (AddonPaymentAccount, PaymentAccount,
                                    SolitudeSeller)
 from mkt.site.fixtures import fixture
@@ -53,7 +55,8 @@ from mkt.submit.tests.test_views import BasePackagedAppTest, BaseWebAppTest
 from mkt.webapps.models import (AddonExcludedRegion, AppFeatures, AppManifest,
                                 ContentRating, Geodata, get_excluded_in,
                                 IARCInfo, Installed, RatingDescriptors,
-                                RatingInteractives, Webapp, WebappIndexer)
+                                RatingInteractives, REGION_EXCLUSIONS_KEY,
+                                RegionExclusions, Webapp, WebappIndexer)
 
 
 class TestWebapp(amo.tests.TestCase):
@@ -487,6 +490,51 @@ class TestWebapp(amo.tests.TestCase):
         self.assertSetEqual(get_excluded_in(mkt.regions.BR.id), [])
         self.assertSetEqual(get_excluded_in(mkt.regions.DE.id), [app.id])
 
+    def test_excluded_in_updated(self):
+        app = app_factory()
+        eq_(get_excluded_in(mkt.regions.BR.id), set())
+        aer = AddonExcludedRegion.objects.create(addon=app,
+                                                 region=mkt.regions.BR.id)
+        with self.assertNumQueries(0):
+            eq_(get_excluded_in(mkt.regions.BR.id), set([app.id]))
+            eq_(app.get_region_ids(),
+                sorted(set(mkt.regions.REGION_IDS) - set([mkt.regions.BR.id])))
+        aer.delete()
+        eq_(get_excluded_in(mkt.regions.BR.id), set())
+
+    def test_excluded_in_reloaded(self):
+        app = app_factory()
+        eq_(get_excluded_in(mkt.regions.BR.id), set())
+        AddonExcludedRegion.objects.create(addon=app,
+                                           region=mkt.regions.BR.id)
+        # Another process changed the exclusions.
+        cache.set(REGION_EXCLUSIONS_KEY, 'other')
+        AddonExcludedRegion.objects.filter(addon=app).update(
+            region=mkt.regions.DE.id)
+        eq_(get_excluded_in(mkt.regions.BR.id), set())
+        eq_(get_excluded_in(mkt.regions.DE.id), set([app.id]))
+        eq_(app.get_excluded_region_ids(), [mkt.regions.DE.id])
+
+    def test_excluded_in_unchanged_geodata(self):
+        app = app_factory()
+        eq_(get_excluded_in(mkt.regions.BR.id), set())
+        generation = cache.get(REGION_EXCLUSIONS_KEY)
+        app._geodata.update(restricted=True)
+        eq_(cache.get(REGION_EXCLUSIONS_KEY), generation)
+        app._geodata.update(region_br_iarc_exclude=True)
+        eq_(cache.get(REGION_EXCLUSIONS_KEY), generation + 1)
+
+    def test_excluded_in_caught_up(self):
+        app = app_factory()
+        other = RegionExclusions()
+        eq_(other.get_excluded_in(mkt.regions.BR.id), set())
+        # Another process changed the exclusions of one app.
+        AddonExcludedRegion.objects.create(addon=app,
+                                           region=mkt.regions.BR.id)
+        with mock.patch.object(other, 'load') as load:
+            eq_(other.get_excluded_in(mkt.regions.BR.id), set([app.id]))
+        assert not load.called
+
     def test_supported_locale_property(self):
         app = app_factory()
         app.versions.latest().update(supported_locales='de,fr', _signal=False)
@@ -1815,6 +1863,16 @@ class TestAppFeatures(DynamicBoolFieldsTestMixin, amo.tests.TestCase):
         self.af.set_flags(signature)
         self._check(self.af)
 
+    def test_features_mask(self):
+        self.af.update(has_apps=True, has_sms=True)
+        eq_(AppFeatures.objects.get(pk=self.af.pk).features_mask,
+            FeatureProfile(apps=True, sms=True).to_int())
+
+        self.af.has_sms = False
+        self.af.save()
+        eq_(AppFeatures.objects.get(pk=self.af.pk).features_mask,
+            FeatureProfile(apps=True).to_int())
+
     def test_bad_data(self):
         self.af.set_flags('foo')
         self.af.set_flags('<script>')
@@ -1904,6 +1962,8 @@ class TestWebappIndexer(amo.tests.TestCase):
         obj, doc = self._get_doc()
         for k, v in doc['features'].iteritems():
             eq_(v, k in enabled)
+        eq_(doc['required_features'],
+            FeatureProfile(apps=True, sms=True, geolocation=True).to_bits())
 
     def test_extract_regions(self):
         self.app.addonexcludedregion.create(region=mkt.regions.BR.id)
@@ -1972,6 +2032,28 @@ class TestWebappIndexer(amo.tests.TestCase):
         eq_(doc['release_notes_translations'][1],
             {'lang': 'fr', 'string': release_notes['fr']})
 
+    def test_extract_documents(self):
+        app2 = app_factory()
+        EscalationQueue.objects.create(addon=app2)
+        self.app.addonexcludedregion.create(region=mkt.regions.BR.id)
+        qs = Webapp.indexing_transformer(
+            Webapp.objects.no_cache().filter(id__in=[self.app.pk, app2.pk]))
+        docs = WebappIndexer.extract_documents(
+            [self.app.pk, app2.pk], objs=qs)
+        eq_(len(docs), 2)
+        docs = dict((doc['id'], doc) for doc in docs)
+        eq_(docs[self.app.pk]['is_escalated'], False)
+        eq_(docs[self.app.pk]['region_exclusions'], [mkt.regions.BR.id])
+        eq_(docs[app2.pk]['is_escalated'], True)
+        eq_(docs[app2.pk]['region_exclusions'], [])
+        for obj in qs:
+            eq_(docs[obj.pk], WebappIndexer.extract_document(obj.pk, obj))
+
+    def test_extract_documents_no_objs(self):
+        docs = WebappIndexer.extract_documents([self.app.pk])
+        eq_([doc['id'] for doc in docs], [self.app.pk])
+        eq_(WebappIndexer.extract_documents([]), [])
+
 
 class TestRatingDescriptors(DynamicBoolFieldsTestMixin, amo.tests.TestCase):
 
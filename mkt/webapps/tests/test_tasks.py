@@ -30,11 +30,12 @@ from versions.models import Version
 
 from mkt.site.fixtures import fixture
 from mkt.webapps.models import Webapp
-from mkt.webapps.tasks import (dump_app, dump_user_installs,
-                               export_data,
+from mkt.webapps.tasks import (_log_fetch_times, dump_app,
+                               dump_user_installs, export_data,
                                notify_developers_of_failure,
                                pre_generate_apk,
                                PreGenAPKError,
+                               regenerate_icons_and_thumbnails,
                                rm_directory,
                                update_manifests,
                                zip_apps)
@@ -202,6 +203,32 @@ class TestUpdateManifest(amo.tests.TestCase):
         self._run()
         eq_(ActivityLog.objects.for_apps(self.addon).count(), 1)
 
+    def test_conditional_not_modified(self):
+        self.response_mock.headers['etag'] = '"abc"'
+        self._hash = ohash
+        self._run()
+        eq_(self.req_mock.call_args[1]['headers'], None)
+
+        self.response_mock.status_code = 304
+        with mock.patch('mkt.webapps.tasks._get_content_hash') as hash_:
+            update_manifests(ids=(self.addon.pk,))
+        eq_(self.req_mock.call_args[1]['headers'],
+            {'If-None-Match': '"abc"'})
+        assert not hash_.called
+        assert not self.validator.called
+
+    def test_conditional_other_manifest(self):
+        self.response_mock.headers['etag'] = '"abc"'
+        self._hash = ohash
+        self._run()
+
+        # The file changed since, the validators can't be used.
+        self.file.update(hash='sha256:foo')
+        self.response_mock.status_code = 304
+        self._run()
+        eq_(self.req_mock.call_count, 3)
+        eq_(self.req_mock.call_args[1]['headers'], None)
+
     @mock.patch('mkt.webapps.tasks._update_manifest')
     def test_ignore_not_webapp(self, mock_):
         self.addon.update(type=amo.ADDON_EXTENSION)
@@ -316,6 +343,30 @@ class TestUpdateManifest(amo.tests.TestCase):
         assert not retry.called
         assert RereviewQueue.objects.filter(addon=self.addon).exists()
 
+    @mock.patch('mkt.webapps.tasks._fetch_manifest')
+    @mock.patch('mkt.webapps.tasks.update_manifests.retry')
+    @mock.patch('mkt.webapps.tasks.task_log')
+    def test_manifest_fetch_failure_logs_traceback(self, task_log, retry,
+                                                   fetch):
+        fetch.side_effect = RuntimeError('oops')
+        update_manifests(ids=(self.addon.pk,))
+        messages = [call[0][0] for call in task_log.info.call_args_list]
+        failure = [m for m in messages if 'Failed to get manifest' in m][0]
+        ok_('Traceback (most recent call last)' in failure)
+        ok_('RuntimeError: oops' in failure)
+
+    @mock.patch('mkt.webapps.tasks.task_log')
+    def test_log_fetch_times(self, task_log):
+        _log_fetch_times([('http://a.com/manifest.webapp', 1.0, False),
+                          ('http://a.com/other.webapp', 3.0, True),
+                          ('http://a.com/last.webapp', 2.0, False),
+                          ('https://b.com/manifest.webapp', 0.5, False)])
+        eq_([call[0][0] for call in task_log.info.call_args_list],
+            ['Fetched 3 manifests from a.com: p50 2.00s, max 3.00s, '
+             '1 failed.',
+             'Fetched 1 manifests from b.com: p50 0.50s, max 0.50s, '
+             '0 failed.'])
+
     @mock.patch('mkt.webapps.models.Webapp.set_iarc_storefront_data')
     def test_manifest_validation_failure(self, _iarc):
         # We are already mocking validator, but this test needs to make sure
@@ -560,12 +611,18 @@ class TestDumpUserInstalls(amo.tests.TestCase):
         self.app.installed.create(user=self.user)
         self.hash = hashlib.sha256('%s%s' % (str(self.user.pk),
                                              settings.SECRET_KEY)).hexdigest()
-        self.path = os.path.join(settings.DUMPED_USERS_PATH, 'users',
-                                 self.hash[0], '%s.json' % self.hash)
+        self.path = os.path.join('users', self.hash[0], '%s.json' % self.hash)
+        self.export_directory = mkdtemp()
+
+    def tearDown(self):
+        rm_directory(self.export_directory)
+
+    def dump(self):
+        with self.settings(DUMPED_USERS_PATH=self.export_directory):
+            return tarfile.open(dump_user_installs(name='users'))
 
     def dump_and_load(self):
-        dump_user_installs([self.user.pk])
-        return json.load(open(self.path, 'r'))
+        return json.load(self.dump().extractfile(self.path))
 
     def test_dump_user_installs(self):
         data = self.dump_and_load()
@@ -591,6 +648,13 @@ class TestDumpUserInstalls(amo.tests.TestCase):
         installed = data['installed_apps'][0]
         eq_(installed['id'], self.app.id)
 
+    def test_dump_extra_files(self):
+        names = self.dump().getnames()
+        for f in ['license.txt', 'readme.txt']:
+            ok_(os.path.join('users', f) in names)
+        ok_(not os.path.exists(os.path.join(self.export_directory,
+                                            'tarballs', 'users.tgz.tmp')))
+
 
 class TestFixMissingIcons(amo.tests.TestCase):
     fixtures = fixture('webapp_337141')
@@ -641,14 +705,26 @@ class TestFixMissingIcons(amo.tests.TestCase):
 class TestRegenerateIconsAndThumbnails(amo.tests.TestCase):
     fixtures = fixture('webapp_337141')
 
+    @mock.patch('mkt.webapps.tasks.pngcrush_images.delay')
     @mock.patch('mkt.webapps.tasks.resize_preview.delay')
-    def test_command(self, resize_preview):
+    def test_command(self, resize_preview, pngcrush_images):
         preview = Preview.objects.create(filetype='image/png', addon_id=337141)
         call_command('process_addons', task='regenerate_icons_and_thumbnails')
 
         resize_preview.assert_called_once_with(preview.image_path, preview,
                                                generate_image=False)
 
+    @mock.patch('mkt.webapps.tasks.storage.exists', lambda path: True)
+    @mock.patch('mkt.webapps.tasks.pngcrush_images.delay')
+    @mock.patch('mkt.webapps.tasks.resize_preview.delay')
+    def test_icons_crushed_together(self, resize_preview, pngcrush_images):
+        app = Webapp.objects.get(pk=337141)
+        other = amo.tests.app_factory()
+        regenerate_icons_and_thumbnails([app.pk, other.pk])
+        pngcrush_images.assert_called_once_with([
+            os.path.join(app.get_icon_dir(), '337141-64.png'),
+            os.path.join(other.get_icon_dir(), '%s-64.png' % other.pk)])
+
 
 @mock.patch('mkt.webapps.tasks.requests')
 class TestPreGenAPKs(amo.tests.WebappTestCase):
@@ -715,6 +791,10 @@ class TestExportData(amo.tests.TestCase):
         for expected_file in expected_files:
             assert expected_file in actual_files, expected_file
 
+    def test_export_is_streamed(self):
+        self.create_export('tarball-name')
+        eq_(os.listdir(self.export_directory), ['tarballs'])
+
     def test_collections_point_to_apps(self):
         tarball = self.create_export('tarball-name')
         collection_file = tarball.extractfile(self.collection_path)
@@ -411,6 +411,26 @@ class TestESAppToDict(amo.tests.ESTestCase):
         with self.assertNumQueries(0):
             self.test_basic()
 
+    @mock.patch.object(ESAppSerializer, 'create_fake_app')
+    def test_basic_no_fake_app(self, create_fake_app):
+        # A free app is serialized straight from the ES data.
+        self.test_basic()
+        ok_(not create_fake_app.called)
+
+    def test_user_many(self):
+        other = amo.tests.app_factory()
+        self.app.addonuser_set.create(user=self.profile)
+        other.installed.create(user=self.profile)
+        self.refresh('webapp')
+
+        serializer = ESAppSerializer(
+            S(WebappIndexer).filter(id__in=[self.app.pk, other.pk])
+                            .order_by('id').execute().objects,
+            many=True, context={'request': self.request})
+        eq_([res['user'] for res in serializer.data],
+            [{'developed': True, 'installed': False, 'purchased': False},
+             {'developed': False, 'installed': True, 'purchased': False}])
+
     def test_basic_with_lang(self):
         # Check that when ?lang is passed, we get the right language and we get
         # empty strings instead of None if the strings don't exist.
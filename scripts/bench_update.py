@@ -0,0 +1,81 @@
+"""
+A script for benchmarking the update service (services/update.py) at the WSGI
+level, without a web server in front of it.
+
+It calls the WSGI application in this process with the query strings given on
+the command line (or read one per line from a file), and reports how many
+requests per second it served along with the response time percentiles. Run
+it from the root of the checkout, with the same settings the service uses, eg:
+
+    python scripts/bench_update.py -n 5000 \\
+        'id=...&version=1.0&reqVersion=2&appID=...&appVersion=24.0'
+
+Set UPDATE_RESPONSES_TIMEOUT in the settings to compare the run with and
+without the responses being reused.
+"""
+import optparse
+import os
+import sys
+import time
+from wsgiref.util import setup_testing_defaults
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (ROOT, os.path.join(ROOT, 'apps'), os.path.join(ROOT, 'services'),
+             os.path.join(ROOT, 'vendor', 'lib', 'python')):
+    sys.path.insert(0, path)
+
+
+def percentile(timings, pct):
+    return timings[min(len(timings) - 1, int(len(timings) * pct / 100.0))]
+
+
+def run(application, query_strings, count):
+    timings = []
+
+    def start_response(status, headers):
+        if not status.startswith('200'):
+            raise ValueError('Got %s for %s' % (status, environ))
+
+    for i in xrange(count):
+        environ = {'QUERY_STRING': query_strings[i % len(query_strings)]}
+        setup_testing_defaults(environ)
+        start = time.time()
+        ''.join(application(environ, start_response))
+        timings.append(time.time() - start)
+    return timings
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog [options] QUERY_STRING [QUERY_STRING ...]')
+    parser.add_option('-n', '--requests', type='int', default=1000,
+                      help='Number of requests to send [default: %default]')
+    parser.add_option('-f', '--file',
+                      help='File with one query string per line')
+    parser.add_option('-w', '--warmup', type='int', default=10,
+                      help='Number of requests sent before measuring '
+                           '[default: %default]')
+    options, query_strings = parser.parse_args()
+    if options.file:
+        with open(options.file) as f:
+            query_strings.extend(l.strip() for l in f if l.strip())
+    if not query_strings:
+        parser.error('No query string to send.')
+
+    from update import application
+
+    run(application, query_strings, options.warmup)
+    start = time.time()
+    timings = sorted(run(application, query_strings, options.requests))
+    elapsed = time.time() - start
+
+    print 'Requests:     %d (%d distinct)' % (len(timings),
+                                              len(set(query_strings)))
+    print 'Requests/sec: %.1f' % (len(timings) / elapsed)
+    for pct in (50, 90, 99):
+        print 'p%d:          %.2fms' % (pct, percentile(timings, pct) * 1000)
+    print 'max:          %.2fms' % (timings[-1] * 1000)
+
+
+if __name__ == '__main__':
+    main()
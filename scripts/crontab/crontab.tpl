@@ -7,6 +7,9 @@ HOME=/tmp
 # Every minute!
 * * * * * %(z_cron)s fast_current_version
 
+# Every 5 minutes.
+*/5 * * * * %(z_cron)s update_queue_stats --settings=settings_local_mkt
+
 # Every 30 minutes.
 */30 * * * * %(z_cron)s update_addons_current_version
 
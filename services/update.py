@@ -1,3 +1,4 @@
+import hashlib
 import smtplib
 import sys
 import traceback
@@ -11,7 +12,9 @@ from django.utils.http import urlencode
 
 import settings_local as settings
 
-# This has to be imported after the settings so statsd knows where to log to.
+# These have to be imported after the settings so statsd knows where to log
+# to and the cache where to store things.
+from django.core.cache import cache
 from django_statsd.clients import statsd
 
 import commonware.log
@@ -325,6 +328,48 @@ class Update(object):
                 ('Content-Length', str(length))]
 
 
+# Responses rendered by this process, by request, with the time they expire
+# at and the token of their add-on when they were rendered.
+_responses = {}
+
+
+def _response_key(update):
+    return (tuple(update.data.get(field) for field in
+                  ('id', 'version', 'reqVersion', 'appID', 'appVersion',
+                   'appOS')) + (update.compat_mode,))
+
+
+def get_rdf(update):
+    """
+    Return the RDF for the `Update` request, reusing the response rendered for
+    the same request within the last UPDATE_RESPONSES_TIMEOUT seconds unless
+    the add-on changed since.
+
+    Saving the add-on, its versions, files, compatible applications or
+    compat overrides sets a new token under UPDATE_RESPONSES_KEY, which
+    makes us render the responses for it again.
+    """
+    timeout = getattr(settings, 'UPDATE_RESPONSES_TIMEOUT', 0)
+    if not timeout:
+        return update.get_rdf()
+
+    key = _response_key(update)
+    token = cache.get(base.UPDATE_RESPONSES_KEY %
+                      hashlib.md5(update.data.get('id', '')).hexdigest())
+    cached = _responses.get(key)
+    if cached and cached[0] > time() and cached[1] == token:
+        statsd.incr('services.update.cache.hit')
+        return cached[2]
+
+    statsd.incr('services.update.cache.miss')
+    rdf = update.get_rdf()
+    if len(_responses) >= getattr(settings, 'UPDATE_RESPONSES_MAX', 10000):
+        # Expired responses are only replaced, start over once full.
+        _responses.clear()
+    _responses[key] = (time() + timeout, token, rdf)
+    return rdf
+
+
 def mail_exception(data):
     if settings.EMAIL_BACKEND != 'django.core.mail.backends.smtp.EmailBackend':
         return
@@ -353,7 +398,7 @@ def application(environ, start_response):
         compat_mode = data.pop('compatMode', 'strict')
         try:
             update = Update(data, compat_mode)
-            output = update.get_rdf()
+            output = get_rdf(update)
             start_response(status, update.get_headers(len(output)))
         except:
             #mail_exception(data)
@@ -36,7 +36,8 @@ from constants.base import (ADDON_PREMIUM, STATUS_PUBLIC, STATUS_DISABLED,
                             STATUS_BETA, STATUS_LITE,
                             STATUS_LITE_AND_NOMINATED)
 from constants.payments import (CONTRIB_CHARGEBACK, CONTRIB_PURCHASE,
-                                CONTRIB_NO_CHARGE, CONTRIB_REFUND)
+                                CONTRIB_NO_CHARGE, CONTRIB_REFUND,
+                                VERIFY_PURCHASE_KEY)
 
 APP_GUIDS = dict([(app.guid, app.id) for app in APPS_ALL.values()])
 PLATFORMS = dict([(plat.api_name, plat.id) for plat in PLATFORMS.values()])
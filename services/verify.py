@@ -1,4 +1,6 @@
 import calendar
+import copy
+import hashlib
 import json
 from datetime import datetime
 from time import gmtime, time
@@ -16,8 +18,11 @@ from receipts import certs
 
 from services.utils import settings
 
+# This has to be imported after the settings so the cache is configured.
+from django.core.cache import cache
+
 from utils import (CONTRIB_CHARGEBACK, CONTRIB_NO_CHARGE,
-                   CONTRIB_PURCHASE, CONTRIB_REFUND,
+                   CONTRIB_PURCHASE, CONTRIB_REFUND, VERIFY_PURCHASE_KEY,
                    log_configure, log_exception, log_info, mypool)
 # Go configure the log.
 log_configure()
@@ -180,7 +185,6 @@ class Verify:
         if not self.decoded:
             raise ValueError('decode not run')
 
-        self.setup_db()
         # Get the addon and user information from the installed table.
         try:
             self.uuid = self.decoded['user']['value']
@@ -202,12 +206,7 @@ class Verify:
         """
         Verifies that the app has been purchased.
         """
-        sql = """SELECT id, type FROM addon_purchase
-                 WHERE addon_id = %(addon_id)s
-                 AND uuid = %(uuid)s LIMIT 1;"""
-        self.cursor.execute(sql, {'addon_id': self.addon_id,
-                                  'uuid': self.uuid})
-        result = self.cursor.fetchone()
+        result = self.get_purchase()
         if not result:
             log_info('Invalid receipt, no purchase')
             raise InvalidReceipt('NO_PURCHASE')
@@ -224,6 +223,34 @@ class Verify:
             log_info('Valid receipt, but invalid contribution')
             raise InvalidReceipt('WRONG_PURCHASE')
 
+    def get_purchase(self):
+        """
+        Return the id and type of the purchase of the receipt, or None.
+
+        The result is kept for WEBAPPS_RECEIPT_PURCHASE_TIMEOUT seconds, saving
+        the purchase clears it (see `market.models.clear_verify_purchase`).
+        """
+        timeout = getattr(settings, 'WEBAPPS_RECEIPT_PURCHASE_TIMEOUT', 0)
+        key = VERIFY_PURCHASE_KEY % (
+            self.addon_id, hashlib.md5(self.uuid.encode('utf-8')).hexdigest())
+        if timeout:
+            cached = cache.get(key)
+            if cached is not None:
+                statsd.incr('services.verify.purchase.cache.hit')
+                return cached[0]
+
+        self.setup_db()
+        sql = """SELECT id, type FROM addon_purchase
+                 WHERE addon_id = %(addon_id)s
+                 AND uuid = %(uuid)s LIMIT 1;"""
+        self.cursor.execute(sql, {'addon_id': self.addon_id,
+                                  'uuid': self.uuid})
+        result = self.cursor.fetchone()
+        if timeout:
+            # Wrapped so that missing purchases are kept too.
+            cache.set(key, (result,), timeout)
+        return result
+
     def invalid(self, reason=''):
         receipt_cef.log(self.environ, self.addon_id, 'verify',
                         'Invalid receipt')
@@ -278,15 +305,57 @@ def get_headers(length):
             ('Last-Modified', format_date_time(time()))]
 
 
+# Verifiers and keys reused across requests, so that the certificates they
+# fetched and the keys we parsed are kept.
+_verifiers = {}
+_keys = {}
+# Contents of the receipts decoded recently, by hash of the receipt, with the
+# time they expire at.
+_decoded = {}
+
+
+def get_verifier():
+    key = (certs.ReceiptVerifier, tuple(settings.SIGNING_VALID_ISSUERS))
+    if key not in _verifiers:
+        _verifiers[key] = certs.ReceiptVerifier(
+            valid_issuers=settings.SIGNING_VALID_ISSUERS)
+    return _verifiers[key]
+
+
+def get_key(path):
+    if path not in _keys:
+        _keys[path] = jwt.rsa_load(path)
+    return _keys[path]
+
+
 def decode_receipt(receipt):
     """
     Cracks the receipt using the private key. This will probably change
     to using the cert at some point, especially when we get the HSM.
+
+    The contents of a receipt are reused for WEBAPPS_RECEIPT_DECODE_TIMEOUT
+    seconds, apps verifying the same receipt every time they are launched.
     """
+    timeout = getattr(settings, 'WEBAPPS_RECEIPT_DECODE_TIMEOUT', 0)
+    if not timeout:
+        return _decode_receipt(receipt)
+
+    key = (hashlib.sha1(receipt).hexdigest(), settings.SIGNING_SERVER_ACTIVE)
+    now = time()
+    if key in _decoded and _decoded[key][0] > now:
+        statsd.incr('services.decode.cache.hit')
+    else:
+        if len(_decoded) >= 10000:
+            _decoded.clear()
+        _decoded[key] = (now + timeout, _decode_receipt(receipt))
+    # The caller may change the receipt, eg. its expiry.
+    return copy.deepcopy(_decoded[key][1])
+
+
+def _decode_receipt(receipt):
     with statsd.timer('services.decode'):
         if settings.SIGNING_SERVER_ACTIVE:
-            verifier = certs.ReceiptVerifier(valid_issuers=
-                                             settings.SIGNING_VALID_ISSUERS)
+            verifier = get_verifier()
             try:
                 result = verifier.verify(receipt)
             except ExpiredSignatureError:
@@ -296,7 +365,7 @@ def decode_receipt(receipt):
                 raise VerificationError()
             return jwt.decode(receipt.split('~')[1], verify=False)
         else:
-            key = jwt.rsa_load(settings.WEBAPPS_RECEIPT_KEY)
+            key = get_key(settings.WEBAPPS_RECEIPT_KEY)
             raw = jwt.decode(receipt, key)
     return raw
 